@@ -0,0 +1,38 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def replica_reads():
+    """Чтения внутри блока идут на реплику (если она настроена)."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Всё пишется и по умолчанию читается из default.
+    Реплику используют только явно помеченные чтения — публичные списки API,
+    которым допустимо небольшое отставание; бронирование всегда идёт в default.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and "replica" in settings.DATABASES:
+            return "replica"
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
+from .db import database_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -77,12 +81,11 @@ WSGI_APPLICATION = 'admin_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# Из DATABASE_URL (по умолчанию SQLite рядом с manage.py), см. admin_backend/db.py
+DATABASES = database_settings(BASE_DIR)
+
+# Реплика (DATABASE_REPLICA_URL) обслуживает только чтения публичных списков API
+DATABASE_ROUTERS = ["admin_backend.routers.ReplicaRouter"]
 
 
 # Password validation
@@ -121,3 +124,38 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+
+# 1 — чтение API (списки и карточки отелей и номеров) через нативные
+# async-представления; имеет смысл при запуске под ASGI (uvicorn admin_backend.asgi:application)
+ASYNC_API = os.getenv("ASYNC_API", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+# Кэш ответов API (/api/hotels/, /api/rooms/)
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# locmem — в памяти процесса (один процесс), file — общий для воркеров на одной машине,
+# redis — общий для всех (нужен пакет redis)
+
+API_CACHE_BACKEND = os.getenv("API_CACHE_BACKEND", "locmem")
+API_CACHE_TTL = int(os.getenv("API_CACHE_TTL", "300"))  # 0 — выключить
+API_CACHE_LOCK_TIMEOUT = 10  # блокировка пересчёта при промахе, секунды
+API_CACHE_LOCK_WAIT = 2.0  # сколько остальные ждут результат пересчёта
+
+_API_CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "smarthotel-api"),
+    "file": ("django.core.cache.backends.filebased.FileBasedCache", os.path.join(tempfile.gettempdir(), "smarthotel-api-cache")),
+    "redis": ("django.core.cache.backends.redis.RedisCache", "redis://127.0.0.1:6379/1"),
+}
+_backend, _location = _API_CACHE_BACKENDS[API_CACHE_BACKEND]
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "api": {
+        "BACKEND": _backend,
+        "LOCATION": os.getenv("API_CACHE_LOCATION", _location),
+        "KEY_PREFIX": "api",
+        "TIMEOUT": API_CACHE_TTL,
+        "OPTIONS": {"MAX_ENTRIES": 10_000} if API_CACHE_BACKEND != "redis" else {},
+    },
+}
@@ -0,0 +1,193 @@
+import base64
+import binascii
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views import View
+from rest_framework.exceptions import ValidationError
+
+from admin_backend.routers import replica_reads
+from hotels.models import Hotel
+from rooms.models import Room
+from . import cache as api_cache
+from .pagination import IdCursorPagination
+from .serializers import HotelCatalogueSerializer, HotelSerializer, RoomSerializer
+from .views import LIST_STATE, available_room_queryset, list_validators, room_cache_scopes
+
+# Нативные async-представления для чтения (ASYNC_API=1): под ASGI запрос
+# обслуживается в event loop через async ORM, без перехода в поток.
+# Ответы совпадают с синхронными DRF-представлениями, кроме формата курсора
+# (непрозрачная строка — клиент просто идёт по ссылке next) и previous,
+# который здесь всегда null.
+
+
+def _json(data, status: int = 200) -> JsonResponse:
+    return JsonResponse(
+        data, status=status, safe=False, encoder=DjangoJSONEncoder, json_dumps_params={"ensure_ascii": False}
+    )
+
+
+def _encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode()
+
+
+def _decode_cursor(raw: str | None) -> int | None:
+    if not raw:
+        return None
+    try:
+        return int(base64.urlsafe_b64decode(raw.encode()).decode())
+    except (ValueError, binascii.Error):
+        raise ValidationError({"cursor": "Неверный курсор."})
+
+
+def _page_size(params) -> int:
+    raw = params.get(IdCursorPagination.page_size_query_param)
+    if raw and raw.isdigit() and int(raw) > 0:
+        return min(int(raw), IdCursorPagination.max_page_size)
+    return IdCursorPagination.page_size
+
+
+class AsyncListView(View):
+    """Список с курсорной пагинацией по id, ?fields=, ETag/Last-Modified и кэшем ответов."""
+    serializer_class = None
+
+    def get_queryset(self, params):
+        raise NotImplementedError
+
+    def cache_scopes(self, params) -> list[str]:
+        return []
+
+    async def get(self, request):
+        with replica_reads():
+            try:
+                return await self.conditional_list(request)
+            except ValidationError as e:
+                return _json(e.detail, status=400)
+
+    async def conditional_list(self, request):
+        fields = self.serializer_class.requested_fields(request) or self.serializer_class.Meta.fields
+        queryset = self.get_queryset(request.GET)
+
+        scopes = self.cache_scopes(request.GET)
+        if api_cache.enabled() and scopes and not api_cache.bypassed(request):
+            # Страницы async-представлений отличаются курсором — свой ключ
+            key = await api_cache.aresponse_key(scopes, f"async:{request.build_absolute_uri()}")
+            etag, last_modified, data = await api_cache.aget_or_compute(
+                key, lambda: self.snapshot(request, queryset, fields, with_data=True)
+            )
+        else:
+            etag, last_modified, data = await self.snapshot(request, queryset, fields, with_data=False)
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        if data is None:
+            data = await self.page_data(request, queryset, fields)
+        response = _json(data)
+        response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified)
+        response["Cache-Control"] = "no-cache"
+        return response
+
+    async def snapshot(self, request, queryset, fields, with_data: bool):
+        etag, last_modified = list_validators(await queryset.aaggregate(**LIST_STATE), request.get_full_path())
+        return etag, last_modified, await self.page_data(request, queryset, fields) if with_data else None
+
+    async def page_data(self, request, queryset, fields) -> dict:
+        size = _page_size(request.GET)
+        after = _decode_cursor(request.GET.get("cursor"))
+
+        queryset = queryset.order_by("id")
+        if after is not None:
+            queryset = queryset.filter(id__gt=after)
+        rows = [row async for row in queryset.values("id", *fields)[: size + 1]]
+
+        next_url = None
+        if len(rows) > size:
+            rows = rows[:size]
+            params = request.GET.copy()
+            params["cursor"] = _encode_cursor(rows[-1]["id"])
+            next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+        if "id" not in fields:
+            for row in rows:
+                del row["id"]
+        return {"next": next_url, "previous": None, "results": rows}
+
+
+class AsyncDetailView(View):
+    model = None
+    serializer_class = None
+
+    async def get(self, request, pk: int):
+        with replica_reads():
+            try:
+                fields = self.serializer_class.requested_fields(request) or self.serializer_class.Meta.fields
+            except ValidationError as e:
+                return _json(e.detail, status=400)
+            row = await self.model.objects.filter(pk=pk).values(*fields).afirst()
+        if row is None:
+            return _json({"detail": "Не найдено."}, status=404)
+        return _json(row)
+
+
+class AsyncHotelListView(AsyncListView):
+    serializer_class = HotelSerializer
+
+    def get_queryset(self, params):
+        return Hotel.objects.all()
+
+    def cache_scopes(self, params):
+        return ["hotels"]
+
+
+class AsyncRoomListView(AsyncListView):
+    serializer_class = RoomSerializer
+
+    def get_queryset(self, params):
+        return available_room_queryset(params)
+
+    def cache_scopes(self, params):
+        return room_cache_scopes(params)
+
+
+class AsyncHotelDetailView(AsyncDetailView):
+    model = Hotel
+    serializer_class = HotelSerializer
+
+
+class AsyncRoomDetailView(AsyncDetailView):
+    model = Room
+    serializer_class = RoomSerializer
+
+
+class AsyncHotelCatalogueView(View):
+    """Отель со свободными номерами: два запроса к базе на любой размер отеля."""
+
+    async def get(self, request, pk: int):
+        with replica_reads():
+            try:
+                if not api_cache.enabled():
+                    data = await self.catalogue(request, pk)
+                else:
+                    key = await api_cache.aresponse_key(
+                        ["hotels", f"rooms:{pk}"], f"async:{request.build_absolute_uri()}"
+                    )
+                    data = await api_cache.aget_or_compute(key, lambda: self.catalogue(request, pk))
+            except ValidationError as e:
+                return _json(e.detail, status=400)
+        if data is None:
+            return _json({"detail": "Не найдено."}, status=404)
+        return _json(data)
+
+    async def catalogue(self, request, pk: int) -> dict | None:
+        fields = HotelCatalogueSerializer.requested_fields(request) or HotelCatalogueSerializer.Meta.fields
+        rooms = available_room_queryset(request.GET).filter(hotel_id=pk).order_by("id")
+
+        hotel = await Hotel.objects.filter(pk=pk).values(*[f for f in fields if f != "rooms"]).afirst()
+        if hotel is not None and "rooms" in fields:
+            hotel["rooms"] = [room async for room in rooms.values(*RoomSerializer.Meta.fields)]
+        return hotel
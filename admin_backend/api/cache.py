@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Ответы списков лежат в отдельном кэше "api" (см. CACHES в settings).
+# Ключ ответа содержит поколения его областей: сигнал об изменении модели
+# меняет поколение, и все старые ключи области просто перестают читаться.
+
+_MISSING = object()
+
+
+def _cache():
+    return caches["api"]
+
+
+def enabled() -> bool:
+    return settings.API_CACHE_TTL > 0
+
+
+def _generation(scope: str) -> str:
+    cache = _cache()
+    key = f"gen:{scope}"
+    gen = cache.get(key)
+    if gen is None:
+        gen = uuid.uuid4().hex[:12]
+        # add: если другой процесс успел первым — берём его поколение
+        if not cache.add(key, gen, None):
+            gen = cache.get(key, gen)
+    return gen
+
+
+def bypassed(request) -> bool:
+    """
+    Запрос с Cache-Control: no-cache читает базу мимо кэша ответов: так бот
+    проверяет номер перед бронью, а брони через api_backend сигналов не шлют.
+    """
+    return "no-cache" in request.headers.get("Cache-Control", "")
+
+
+def bump(*scopes: str):
+    """Сбросить закэшированные ответы областей."""
+    cache = _cache()
+    cache.set_many({f"gen:{scope}": uuid.uuid4().hex[:12] for scope in scopes}, None)
+
+
+def response_key(scopes: list[str], url: str) -> str:
+    gens = ":".join(_generation(scope) for scope in scopes)
+    return f"resp:{gens}:{hashlib.md5(url.encode()).hexdigest()}"
+
+
+def get_or_compute(key: str, compute, ttl: int = None):
+    """
+    Значение из кэша или compute() с защитой от лавины промахов:
+    считает только тот, кто взял блокировку, остальные ждут его результат
+    до API_CACHE_LOCK_WAIT секунд и лишь потом считают сами.
+    """
+    cache = _cache()
+    ttl = settings.API_CACHE_TTL if ttl is None else ttl
+
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    lock = f"lock:{key}"
+    if cache.add(lock, 1, settings.API_CACHE_LOCK_TIMEOUT):
+        try:
+            value = compute()
+            cache.set(key, value, ttl)
+            return value
+        finally:
+            cache.delete(lock)
+
+    deadline = time.monotonic() + settings.API_CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.01)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+    return compute()
+
+
+# Те же операции для асинхронных представлений (см. async_views.py)
+
+async def _ageneration(scope: str) -> str:
+    cache = _cache()
+    key = f"gen:{scope}"
+    gen = await cache.aget(key)
+    if gen is None:
+        gen = uuid.uuid4().hex[:12]
+        if not await cache.aadd(key, gen, None):
+            gen = await cache.aget(key, gen)
+    return gen
+
+
+async def aresponse_key(scopes: list[str], url: str) -> str:
+    gens = ":".join([await _ageneration(scope) for scope in scopes])
+    return f"resp:{gens}:{hashlib.md5(url.encode()).hexdigest()}"
+
+
+async def aget_or_compute(key: str, compute, ttl: int = None):
+    """get_or_compute для корутины compute(): ожидание не блокирует event loop."""
+    cache = _cache()
+    ttl = settings.API_CACHE_TTL if ttl is None else ttl
+
+    value = await cache.aget(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    lock = f"lock:{key}"
+    if await cache.aadd(lock, 1, settings.API_CACHE_LOCK_TIMEOUT):
+        try:
+            value = await compute()
+            await cache.aset(key, value, ttl)
+            return value
+        finally:
+            await cache.adelete(lock)
+
+    deadline = time.monotonic() + settings.API_CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+        value = await cache.aget(key, _MISSING)
+        if value is not _MISSING:
+            return value
+    return await compute()
@@ -0,0 +1,134 @@
+import asyncio
+import random
+import secrets
+import socketserver
+import threading
+import time
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer, get_internal_wsgi_application
+
+from hotels.models import Hotel
+from rooms.models import Room
+
+
+def populate(n_hotels: int, n_rooms: int) -> list[int]:
+    """Синтетическая сеть: n_hotels отелей по n_rooms номеров. Возвращает id отелей."""
+    tag = secrets.token_hex(4)
+    hotels = Hotel.objects.bulk_create(
+        Hotel(
+            name=f"Bench {i}", slug=f"bench-{tag}-{i}", api_key=secrets.token_hex(32),
+            address=f"ул. Лесная, {i}", description="Описание отеля. " * 40,
+        )
+        for i in range(n_hotels)
+    )
+    Room.objects.bulk_create(
+        Room(hotel=h, room_number=str(r), room_type="Стандарт", price_per_night=5000 + r * 100)
+        for h in hotels
+        for r in range(n_rooms)
+    )
+    return [h.id for h in hotels]
+
+
+def random_url(rnd: random.Random, hotels: list[int]) -> str:
+    # Смесь, похожая на трафик бота: каталог, номера отеля, номера на даты
+    kind = rnd.random()
+    hotel = rnd.choice(hotels[:20])
+    if kind < 0.3:
+        return "/hotels/?fields=id,name,address,description"
+    if kind < 0.8:
+        return f"/rooms/?hotel={hotel}&fields=id,room_number,room_type,price_per_night"
+    day = rnd.randint(1, 20)
+    return f"/rooms/?hotel={hotel}&date_from=2026-01-{day:02d}&date_to=2026-01-{day + 3:02d}"
+
+
+async def run_load(base_url: str, urls: list, concurrency: int, headers: dict = None, warmup: bool = True) -> dict:
+    """
+    Прогнать urls с concurrency параллельными клиентами: запр/с и перцентили задержки, мс.
+    Элемент urls — путь для GET или кортеж (метод, путь, json-тело).
+    """
+    queue = [url if isinstance(url, tuple) else ("GET", url, None) for url in reversed(urls)]
+    latencies = []
+    errors = 0
+
+    async def worker(client):
+        nonlocal errors
+        while queue:
+            method, url, body = queue.pop()
+            start = time.perf_counter()
+            try:
+                r = await client.request(method, url, json=body)
+                r.raise_for_status()
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60, headers=headers) as client:
+        if warmup:
+            # Прогрев соединений и кэшей сервера — не в зачёт (для записей выключают)
+            method, url, body = queue[-1]
+            await client.request(method, url, json=body)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {"rps": len(latencies) / elapsed, "p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99), "errors": errors}
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class _ThreadedServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный бенчмарк /api/hotels/ и /api/rooms/ без кэша и с кэшем ответов. "
+        "Поднимает многопоточный WSGI-сервер внутри процесса, создаёт синтетическую "
+        "сеть отелей и удаляет её после замера."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hotels", type=int, default=200)
+        parser.add_argument("--rooms", type=int, default=20, help="номеров на отель")
+        parser.add_argument("--requests", type=int, default=3000)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        server = _ThreadedServer(("127.0.0.1", 0), _QuietHandler)
+        server.set_app(get_internal_wsgi_application())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/api"
+
+        hotels = populate(options["hotels"], options["rooms"])
+        ttl = settings.API_CACHE_TTL or 300
+        try:
+            rnd = random.Random(options["seed"])
+            urls = [random_url(rnd, hotels) for _ in range(options["requests"])]
+            self.stdout.write(
+                f"{len(hotels)} отелей × {options['rooms']} номеров, {len(urls)} запросов, "
+                f"{options['concurrency']} параллельно, кэш: {settings.API_CACHE_BACKEND}"
+            )
+            for title, cache_ttl in (("без кэша", 0), ("с кэшем", ttl)):
+                settings.API_CACHE_TTL = cache_ttl
+                result = asyncio.run(run_load(base_url, urls, options["concurrency"]))
+                self.stdout.write(
+                    f"{title:<10} {result['rps']:8.0f} запр/с   p50 {result['p50']:6.1f} мс   "
+                    f"p95 {result['p95']:6.1f} мс   ошибок {result['errors']}"
+                )
+        finally:
+            settings.API_CACHE_TTL = ttl
+            server.shutdown()
+            Hotel.objects.filter(id__in=hotels).delete()
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from hotels.models import Hotel
+from .bench_api import populate, random_url, run_load
+
+# (название, команда запуска сервера, ASYNC_API)
+DEPLOYMENTS = [
+    ("WSGI, потоки", ["{python}", "manage.py", "runserver", "127.0.0.1:{port}", "--noreload", "--skip-checks"], "0"),
+    ("ASGI, sync-views", ["{python}", "-m", "uvicorn", "admin_backend.asgi:application", "--port", "{port}"], "0"),
+    ("ASGI, async-views", ["{python}", "-m", "uvicorn", "admin_backend.asgi:application", "--port", "{port}"], "1"),
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url: str, timeout: float = 30.0):
+    """Ждать, пока сервер не ответит 200 на GET url."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Сервер {url} не поднялся за {timeout} с")
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнение развёртываний API под нагрузкой: WSGI-сервер с потоками, "
+        "ASGI (uvicorn) с синхронными DRF-представлениями и ASGI с async-представлениями. "
+        "Кэш ответов выключен, чтобы мерить сами представления и ORM."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hotels", type=int, default=50)
+        parser.add_argument("--rooms", type=int, default=20)
+        parser.add_argument("--requests", type=int, default=3000)
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        hotels = populate(options["hotels"], options["rooms"])
+        try:
+            rnd = random.Random(options["seed"])
+            urls = [random_url(rnd, hotels) for _ in range(options["requests"])]
+            self.stdout.write(
+                f"{len(hotels)} отелей × {options['rooms']} номеров, {len(urls)} запросов, "
+                f"{options['concurrency']} параллельно, база: {settings.DATABASES['default']['ENGINE']}"
+            )
+            for title, command, async_api in DEPLOYMENTS:
+                result = self._run(command, async_api, urls, options["concurrency"])
+                self.stdout.write(
+                    f"{title:<18} {result['rps']:7.0f} запр/с   p50 {result['p50']:7.1f} мс   "
+                    f"p99 {result['p99']:7.1f} мс   ошибок {result['errors']}"
+                )
+        finally:
+            Hotel.objects.filter(id__in=hotels).delete()
+
+    def _run(self, command, async_api, urls, concurrency):
+        port = free_port()
+        env = {**os.environ, "ASYNC_API": async_api, "API_CACHE_TTL": "0"}
+        args = [part.format(python=sys.executable, port=port) for part in command]
+        server = subprocess.Popen(
+            args, cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}/api"
+            wait_ready(f"{base_url}/hotels/?page_size=1")
+            return asyncio.run(run_load(base_url, urls, concurrency))
+        finally:
+            server.terminate()
+            server.wait(10)
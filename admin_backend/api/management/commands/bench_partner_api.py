@@ -0,0 +1,148 @@
+import asyncio
+import os
+import random
+import subprocess
+import sys
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.pagination import IdCursorPagination
+from hotels.models import Hotel
+from rooms.models import Room
+from .bench_api import populate, run_load
+from .bench_deploy import free_port, wait_ready
+
+API_BACKEND_DIR = settings.BASE_DIR.parent / "api_backend"
+
+# Поля, которые отдают оба API (total_price DRF не считает)
+ROOM_FIELDS = "id,room_number,room_type,price_per_night"
+
+
+def database_url() -> str:
+    """Та же база, что у Django, для api_backend."""
+    if os.getenv("DATABASE_URL"):
+        return os.environ["DATABASE_URL"]
+    return f"sqlite:///{settings.DATABASES['default']['NAME']}"
+
+
+def check_requests(rnd: random.Random, hotel: Hotel, n: int, page_size: int):
+    """
+    Одинаковые вопросы к обоим API: свободные номера отеля на случайные даты.
+    DRF отдаёт их одной страницей и теми же полями, что и FastAPI.
+    """
+    for _ in range(n):
+        start = date(2027, 1, 1) + timedelta(days=rnd.randint(0, 300))
+        end = start + timedelta(days=rnd.randint(1, 7))
+        yield (
+            (
+                "GET",
+                f"/api/rooms/?hotel={hotel.id}&date_from={start}&date_to={end}"
+                f"&page_size={page_size}&fields={ROOM_FIELDS}",
+                None,
+            ),
+            ("POST", f"/api/{hotel.slug}/check", {"date_from": str(start), "date_to": str(end)}),
+        )
+
+
+def reserve_requests(hotel: Hotel, room_ids: list[int], n: int, year: int, partner: bool):
+    """Брони без пересечений: номер за номером, по две ночи подряд."""
+    for i in range(n):
+        start = date(year, 1, 1) + timedelta(days=2 * (i // len(room_ids)))
+        body = {
+            "date_from": str(start),
+            "date_to": str(start + timedelta(days=2)),
+            "guest_name": "Анна Смирнова",
+            "guest_phone": "+79001234567",
+        }
+        if partner:
+            yield "POST", f"/api/{hotel.slug}/reserve", {"room_id": room_ids[i % len(room_ids)], **body}
+        else:
+            yield "POST", "/api/booking/", {"room": room_ids[i % len(room_ids)], **body}
+
+
+class Command(BaseCommand):
+    help = (
+        "Партнёрский API (api_backend, FastAPI + async SQLAlchemy) против того же "
+        "в Django DRF под uvicorn: проверка свободных номеров и бронь. "
+        "Оба сервера работают с одной базой; кэш ответов DRF выключен. "
+        "Нужны пакеты fastapi, sqlalchemy и aiosqlite (или asyncpg для Postgres)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=200)
+        parser.add_argument("--requests", type=int, default=3000)
+        parser.add_argument("--reserves", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        hotel = Hotel.objects.get(id=populate(1, options["rooms"])[0])
+        try:
+            room_ids = list(Room.objects.filter(hotel=hotel).values_list("id", flat=True))
+            rnd = random.Random(options["seed"])
+            page_size = min(len(room_ids), IdCursorPagination.max_page_size)
+            drf_check, fast_check = zip(*check_requests(rnd, hotel, options["requests"], page_size))
+            # Разные годы — брони двух API не пересекаются
+            drf_reserve = reserve_requests(hotel, room_ids, options["reserves"], 2028, partner=False)
+            fast_reserve = reserve_requests(hotel, room_ids, options["reserves"], 2030, partner=True)
+
+            self.stdout.write(
+                f"Отель из {len(room_ids)} номеров, {options['concurrency']} параллельно, "
+                f"база: {settings.DATABASES['default']['ENGINE']}"
+            )
+            self.stdout.write(
+                f"check: DRF — GET /api/rooms/ одной страницей (page_size={page_size}, fields={ROOM_FIELDS}), "
+                "FastAPI — те же поля плюс total_price за проживание"
+            )
+            if page_size < len(room_ids):
+                self.stdout.write(self.style.WARNING(
+                    f"Номеров больше API_MAX_PAGE_SIZE={page_size}: DRF отдаёт только первую страницу, "
+                    "сравнение check неравное"
+                ))
+            servers = [
+                ("Django DRF", self._django_server, drf_check, drf_reserve),
+                ("FastAPI", self._fastapi_server, fast_check, fast_reserve),
+            ]
+            for title, start_server, checks, reserves in servers:
+                server, base_url, ready_url = start_server()
+                try:
+                    wait_ready(ready_url)
+                    for kind, requests, warmup in (("check", checks, True), ("reserve", reserves, False)):
+                        result = asyncio.run(run_load(
+                            base_url, list(requests), options["concurrency"],
+                            headers={"X-Api-Key": hotel.api_key}, warmup=warmup,
+                        ))
+                        self.stdout.write(
+                            f"{title:<11} {kind:<8} {result['rps']:7.0f} запр/с   p50 {result['p50']:7.1f} мс   "
+                            f"p99 {result['p99']:7.1f} мс   ошибок {result['errors']}"
+                        )
+                finally:
+                    server.terminate()
+                    server.wait(10)
+        finally:
+            hotel.delete()
+
+    def _spawn(self, args, cwd, env):
+        return subprocess.Popen(
+            args, cwd=cwd, env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+    def _django_server(self):
+        port = free_port()
+        server = self._spawn(
+            [sys.executable, "-m", "uvicorn", "admin_backend.asgi:application", "--port", str(port)],
+            settings.BASE_DIR,
+            {"ASYNC_API": "0", "API_CACHE_TTL": "0"},
+        )
+        return server, f"http://127.0.0.1:{port}", f"http://127.0.0.1:{port}/api/hotels/?page_size=1"
+
+    def _fastapi_server(self):
+        port = free_port()
+        server = self._spawn(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+            API_BACKEND_DIR,
+            {"DATABASE_URL": database_url()},
+        )
+        return server, f"http://127.0.0.1:{port}", f"http://127.0.0.1:{port}/ping"
@@ -0,0 +1,15 @@
+import os
+
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация по id: страница стоит одинаково на любой глубине
+    и не съезжает, если между запросами добавились записи.
+    Ответ: {"next": url | null, "previous": url | null, "results": [...]}
+    """
+    ordering = "id"
+    page_size = int(os.getenv("API_PAGE_SIZE", "100"))
+    page_size_query_param = "page_size"
+    max_page_size = int(os.getenv("API_MAX_PAGE_SIZE", "1000"))
@@ -4,18 +4,55 @@ from rooms.models import Room
 from bookings.models import Booking
 
 
-class HotelSerializer(serializers.ModelSerializer):
+def parse_fields(raw: str | None, allowed: list[str]) -> list[str] | None:
+    """Значение ?fields= -> список полей; None — отдавать все."""
+    if not raw:
+        return None
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = set(fields) - set(allowed)
+    if unknown:
+        raise serializers.ValidationError({"fields": f"Неизвестные поля: {', '.join(sorted(unknown))}"})
+    return fields
+
+
+class SparseFieldsMixin:
+    """
+    ?fields=id,name — отдать только перечисленные поля.
+    Без параметра сериализатор отдаёт всё, как раньше.
+    """
+
+    @classmethod
+    def requested_fields(cls, request) -> list[str] | None:
+        return parse_fields(request.GET.get("fields") if request is not None else None, cls.Meta.fields)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.requested_fields(self.context.get("request"))
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class HotelSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Hotel
         fields = ["id", "name", "slug", "address", "description"]
 
 
-class RoomSerializer(serializers.ModelSerializer):
+class RoomSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Room
         fields = ["id", "hotel", "room_number", "room_type", "price_per_night", "is_available"]
 
 
+class HotelCatalogueSerializer(HotelSerializer):
+    # Номера берутся из Prefetch(..., to_attr="catalogue_rooms") в представлении
+    rooms = RoomSerializer(source="catalogue_rooms", many=True, read_only=True)
+
+    class Meta(HotelSerializer.Meta):
+        fields = HotelSerializer.Meta.fields + ["rooms"]
+
+
 class BookingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
@@ -31,3 +68,14 @@ class BookingSerializer(serializers.ModelSerializer):
             "total_price",
             "is_confirmed",
         ]
+        # Стоимость считает сервер, подтверждает — администратор
+        read_only_fields = ["total_price", "is_confirmed"]
+        extra_kwargs = {"hotel": {"required": False}}
+
+    def validate(self, attrs):
+        if attrs["date_to"] <= attrs["date_from"]:
+            raise serializers.ValidationError({"date_to": "Дата выезда должна быть позже даты заезда."})
+        hotel = attrs.get("hotel")
+        if hotel is not None and attrs["room"].hotel_id != hotel.id:
+            raise serializers.ValidationError({"room": "Номер не принадлежит выбранному отелю."})
+        return attrs
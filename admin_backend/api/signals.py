@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from bookings.models import Booking
+from hotels.models import Hotel
+from rooms.models import Room
+from . import cache as api_cache
+
+
+def _bump_on_commit(*scopes: str):
+    # После коммита: иначе параллельный запрос успеет закэшировать
+    # ещё не изменённые данные уже под новым поколением
+    transaction.on_commit(lambda: api_cache.bump(*scopes))
+
+
+@receiver([post_save, post_delete], sender=Hotel)
+def hotel_changed(sender, instance, **kwargs):
+    _bump_on_commit("hotels")
+
+
+@receiver([post_save, post_delete], sender=Room)
+def room_changed(sender, instance, **kwargs):
+    _bump_on_commit("rooms", f"rooms:{instance.hotel_id}")
+
+
+@receiver([post_save, post_delete], sender=Booking)
+def booking_changed(sender, instance, **kwargs):
+    # Бронь меняет выдачу номеров отеля на даты
+    _bump_on_commit("rooms", f"rooms:{instance.hotel_id}")
@@ -1,3 +1,396 @@
-from django.test import TestCase
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from django.urls import path
+from rest_framework.test import APIClient
+
+from bookings.models import Booking, RoomNight
+from hotels.models import Hotel
+from rooms.models import Room
+from . import async_views
+from . import cache as api_cache
+
+
+@override_settings(API_CACHE_TTL=0)
+class RoomAvailabilityAPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name="EcoHouse", slug="ecohouse", api_key="k1")
+        cls.room1 = Room.objects.create(hotel=cls.hotel, room_number="1", room_type="Стандарт", price_per_night=7800)
+        cls.room2 = Room.objects.create(hotel=cls.hotel, room_number="2", room_type="Семейный", price_per_night=13500)
+        Booking.objects.create(
+            hotel=cls.hotel, room=cls.room1, guest_name="Иван", guest_phone="+79990000000",
+            date_from=date(2025, 12, 20), date_to=date(2025, 12, 23), total_price=23400,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def room_ids(self, **params):
+        r = self.client.get("/api/rooms/", {"hotel": self.hotel.id, **params})
+        self.assertEqual(r.status_code, 200)
+        return sorted(room["id"] for room in r.json()["results"])
+
+    def test_without_dates_lists_all_available_rooms(self):
+        self.assertEqual(self.room_ids(), [self.room1.id, self.room2.id])
+
+    def test_overlapping_range_excludes_booked_room(self):
+        self.assertEqual(self.room_ids(date_from="2025-12-22", date_to="2025-12-25"), [self.room2.id])
+
+    def test_checkout_day_is_free(self):
+        self.assertEqual(self.room_ids(date_from="2025-12-23", date_to="2025-12-24"), [self.room1.id, self.room2.id])
+
+    def test_invalid_ranges_are_rejected(self):
+        for params in (
+            {"date_from": "2025-12-22"},
+            {"date_from": "22.12.2025", "date_to": "2025-12-25"},
+            {"date_from": "2025-12-25", "date_to": "2025-12-25"},
+        ):
+            r = self.client.get("/api/rooms/", params)
+            self.assertEqual(r.status_code, 400, params)
+
+
+class BookingCreateAPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name="EcoHouse", slug="ecohouse", api_key="k1")
+        cls.other = Hotel.objects.create(name="Other", slug="other", api_key="k2")
+        cls.room = Room.objects.create(hotel=cls.hotel, room_number="1", room_type="Стандарт", price_per_night=7800)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def post(self, key=None, **overrides):
+        payload = {
+            "hotel": self.hotel.id, "room": self.room.id, "guest_name": "Иван",
+            "guest_phone": "+79990000000", "date_from": "2025-12-20", "date_to": "2025-12-23",
+            "total_price": "1.00", **overrides,
+        }
+        headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+        return self.client.post("/api/booking/", payload, format="json", **headers)
+
+    def test_price_from_client_is_ignored(self):
+        r = self.post()
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(r.json()["total_price"], "23400.00")
+
+    def test_overlap_returns_conflict(self):
+        self.assertEqual(self.post().status_code, 201)
+        self.assertEqual(self.post(date_from="2025-12-22", date_to="2025-12-24").status_code, 409)
+
+    def test_retry_with_same_key_returns_existing_booking(self):
+        first = self.post(key="tg-1-42")
+        again = self.post(key="tg-1-42")
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(first.json()["id"], again.json()["id"])
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_room_from_other_hotel_is_rejected(self):
+        self.assertEqual(self.post(hotel=self.other.id).status_code, 400)
+
+
+@override_settings(API_CACHE_TTL=0)
+class ListQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name="EcoHouse", slug="ecohouse", api_key="k1")
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def add_rooms(self, n):
+        Room.objects.bulk_create(
+            Room(hotel=self.hotel, room_number=str(Room.objects.count() + i), room_type="Стандарт", price_per_night=5000)
+            for i in range(n)
+        )
+
+    def test_lists_use_constant_queries(self):
+        # Агрегат для ETag/Last-Modified + сама страница
+        for rows in (2, 40):
+            self.add_rooms(rows)
+            with self.assertNumQueries(2):
+                self.client.get("/api/hotels/")
+            with self.assertNumQueries(2):
+                self.client.get("/api/rooms/", {"hotel": self.hotel.id})
+            with self.assertNumQueries(2):
+                self.client.get("/api/rooms/", {"hotel": self.hotel.id, "date_from": "2025-12-20", "date_to": "2025-12-23"})
+
+
+@override_settings(API_CACHE_TTL=0)
+class ListPaginationAndConditionalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name="EcoHouse", slug="ecohouse", api_key="k1", description="Длинное описание")
+        Room.objects.bulk_create(
+            Room(hotel=cls.hotel, room_number=str(i), room_type="Стандарт", price_per_night=5000) for i in range(5)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_cursor_pagination_walks_all_rooms(self):
+        ids = []
+        url, params = "/api/rooms/", {"hotel": self.hotel.id, "page_size": 2}
+        while url:
+            page = self.client.get(url, params).json()
+            ids += [room["id"] for room in page["results"]]
+            url, params = page["next"], None
+        self.assertEqual(ids, list(Room.objects.order_by("id").values_list("id", flat=True)))
+
+    def test_sparse_fields(self):
+        r = self.client.get("/api/hotels/", {"fields": "id,name"})
+        self.assertEqual(r.json()["results"], [{"id": self.hotel.id, "name": "EcoHouse"}])
+        self.assertEqual(self.client.get("/api/hotels/", {"fields": "id,secret"}).status_code, 400)
+
+    def test_repeat_poll_is_not_modified(self):
+        params = {"hotel": self.hotel.id}
+        first = self.client.get("/api/rooms/", params)
+        self.assertTrue(first["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", first)
+
+        with self.assertNumQueries(1):
+            again = self.client.get("/api/rooms/", params, headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+
+        # Бронь убирает номер из выдачи на эти даты — ETag меняется
+        dated = {**params, "date_from": "2025-12-20", "date_to": "2025-12-22"}
+        etag = self.client.get("/api/rooms/", dated)["ETag"]
+        Booking.objects.create(
+            hotel=self.hotel, room=Room.objects.first(), guest_name="Иван", guest_phone="+79990000000",
+            date_from=date(2025, 12, 20), date_to=date(2025, 12, 22), total_price=0,
+        )
+        self.assertEqual(self.client.get("/api/rooms/", dated, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        room = Room.objects.last()
+        room.price_per_night = 6000
+        room.save()
+        self.assertEqual(self.client.get("/api/rooms/", params, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+
+
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name="EcoHouse", slug="ecohouse", api_key="k1")
+        cls.other = Hotel.objects.create(name="Other", slug="other", api_key="k2")
+        cls.room = Room.objects.create(hotel=cls.hotel, room_number="1", room_type="Стандарт", price_per_night=7800)
+
+    def setUp(self):
+        caches["api"].clear()
+        self.client = APIClient()
+
+    def rooms(self, **params):
+        return self.client.get("/api/rooms/", {"hotel": self.hotel.id, **params}).json()["results"]
+
+    def test_repeat_request_is_served_from_cache(self):
+        self.rooms()
+        self.client.get("/api/hotels/")
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.rooms()), 1)
+            self.client.get("/api/hotels/")
+
+    def test_room_change_invalidates_only_its_hotel(self):
+        self.rooms()
+        self.client.get("/api/rooms/", {"hotel": self.other.id})
+        self.client.get("/api/hotels/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.create(hotel=self.hotel, room_number="2", room_type="Семейный", price_per_night=13500)
+
+        self.assertEqual(len(self.rooms()), 2)
+        with self.assertNumQueries(0):
+            self.client.get("/api/rooms/", {"hotel": self.other.id})
+            self.client.get("/api/hotels/")
+
+    def test_booking_invalidates_dated_room_list(self):
+        dates = {"date_from": "2025-12-20", "date_to": "2025-12-22"}
+        self.assertEqual(len(self.rooms(**dates)), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(
+                hotel=self.hotel, room=self.room, guest_name="Иван", guest_phone="+79990000000",
+                date_from=date(2025, 12, 20), date_to=date(2025, 12, 22), total_price=0,
+            )
+        self.assertEqual(self.rooms(**dates), [])
+
+    def test_no_cache_request_reads_database(self):
+        dates = {"date_from": "2025-12-20", "date_to": "2025-12-22"}
+        self.assertEqual(len(self.rooms(**dates)), 1)
+        # Как бронь через api_backend: строки пишутся мимо сигналов Django
+        booking = Booking.objects.bulk_create([Booking(
+            hotel=self.hotel, room=self.room, guest_name="Иван", guest_phone="+79990000000",
+            date_from=date(2025, 12, 20), date_to=date(2025, 12, 22), total_price=0,
+        )])[0]
+        RoomNight.objects.bulk_create([
+            RoomNight(room=self.room, booking=booking, night=date(2025, 12, 20)),
+            RoomNight(room=self.room, booking=booking, night=date(2025, 12, 21)),
+        ])
+
+        self.assertEqual(len(self.rooms(**dates)), 1)
+        fresh = self.client.get("/api/rooms/", {"hotel": self.hotel.id, **dates}, HTTP_CACHE_CONTROL="no-cache")
+        self.assertEqual(fresh.json()["results"], [])
+
+    def test_catalogue_is_cached_and_invalidated(self):
+        url = f"/api/hotels/{self.hotel.id}/catalogue/"
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get(url).json()["rooms"]), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.create(hotel=self.hotel, room_number="2", room_type="Семейный", price_per_night=13500)
+        self.assertEqual(len(self.client.get(url).json()["rooms"]), 2)
+
+    def test_hotel_delete_invalidates_hotel_list(self):
+        self.client.get("/api/hotels/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.delete()
+        names = [h["name"] for h in self.client.get("/api/hotels/").json()["results"]]
+        self.assertEqual(names, ["EcoHouse"])
+
+
+class StampedeTests(SimpleTestCase):
+    def setUp(self):
+        caches["api"].clear()
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+        lock = threading.Lock()
+
+        def compute():
+            with lock:
+                calls.append(1)
+            time.sleep(0.05)
+            return "value"
+
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            results = list(pool.map(lambda _: api_cache.get_or_compute("k", compute), range(20)))
+        self.assertEqual(results, ["value"] * 20)
+        self.assertEqual(len(calls), 1)
+
+
+@override_settings(API_CACHE_TTL=0)
+class RoomDetailAndCatalogueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name="EcoHouse", slug="ecohouse", api_key="k1")
+        cls.rooms = Room.objects.bulk_create(
+            Room(hotel=cls.hotel, room_number=str(i), room_type="Стандарт", price_per_night=7800) for i in range(3)
+        )
+        Booking.objects.create(
+            hotel=cls.hotel, room=cls.rooms[0], guest_name="Иван", guest_phone="+79990000000",
+            date_from=date(2025, 12, 20), date_to=date(2025, 12, 23), total_price=0,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_room_detail(self):
+        r = self.client.get(f"/api/rooms/{self.rooms[1].id}/")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["room_number"], "1")
+        self.assertEqual(self.client.get("/api/rooms/999/").status_code, 404)
+
+    def test_batch_by_ids(self):
+        ids = f"{self.rooms[0].id},{self.rooms[2].id}"
+        r = self.client.get("/api/rooms/", {"ids": ids})
+        self.assertEqual([room["id"] for room in r.json()["results"]], [self.rooms[0].id, self.rooms[2].id])
+
+        # Вместе с датами — какие из выбранных номеров ещё свободны
+        r = self.client.get("/api/rooms/", {"ids": ids, "date_from": "2025-12-21", "date_to": "2025-12-22"})
+        self.assertEqual([room["id"] for room in r.json()["results"]], [self.rooms[2].id])
+
+        self.assertEqual(self.client.get("/api/rooms/", {"ids": "1,abc"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/rooms/", {"ids": ",".join(["1"] * 101)}).status_code, 400)
+
+    def test_catalogue_in_two_queries(self):
+        url = f"/api/hotels/{self.hotel.id}/catalogue/"
+        with self.assertNumQueries(2):
+            r = self.client.get(url)
+        self.assertEqual(r.json()["name"], "EcoHouse")
+        self.assertEqual(len(r.json()["rooms"]), 3)
+
+        Room.objects.bulk_create(
+            Room(hotel=self.hotel, room_number=f"x{i}", room_type="Семейный", price_per_night=13500) for i in range(20)
+        )
+        with self.assertNumQueries(2):
+            r = self.client.get(url, {"date_from": "2025-12-21", "date_to": "2025-12-22"})
+        self.assertEqual(len(r.json()["rooms"]), 22)
+        self.assertEqual(self.client.get("/api/hotels/999/catalogue/").status_code, 404)
+
+
+# Маршруты с async-представлениями независимо от ASYNC_API
+urlpatterns = [
+    path("api/hotels/", async_views.AsyncHotelListView.as_view()),
+    path("api/hotels/<int:pk>/", async_views.AsyncHotelDetailView.as_view()),
+    path("api/rooms/", async_views.AsyncRoomListView.as_view()),
+    path("api/rooms/<int:pk>/", async_views.AsyncRoomDetailView.as_view()),
+    path("api/hotels/<int:pk>/catalogue/", async_views.AsyncHotelCatalogueView.as_view()),
+]
+
+
+@override_settings(API_CACHE_TTL=0)
+class AsyncReadViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name="EcoHouse", slug="ecohouse", api_key="k1", address="Лес")
+        cls.rooms = Room.objects.bulk_create(
+            Room(hotel=cls.hotel, room_number=str(i), room_type="Стандарт", price_per_night=7800) for i in range(5)
+        )
+        Booking.objects.create(
+            hotel=cls.hotel, room=cls.rooms[0], guest_name="Иван", guest_phone="+79990000000",
+            date_from=date(2025, 12, 20), date_to=date(2025, 12, 23), total_price=0,
+        )
+
+    def setUp(self):
+        self.async_client = AsyncClient()
+
+    def sync_get(self, url, params):
+        return APIClient().get(url, params).json()
+
+    async def async_get(self, url, params=None, headers=None):
+        with self.settings(ROOT_URLCONF="api.tests"):
+            return await self.async_client.get(url, params or {}, headers=headers)
+
+    async def test_matches_sync_views(self):
+        cases = [
+            ("/api/hotels/", {}),
+            ("/api/hotels/", {"fields": "name,address"}),
+            ("/api/rooms/", {"hotel": self.hotel.id, "date_from": "2025-12-21", "date_to": "2025-12-22"}),
+            (f"/api/rooms/{self.rooms[1].id}/", {"fields": "id,price_per_night"}),
+            (f"/api/hotels/{self.hotel.id}/", {}),
+            ("/api/rooms/", {"ids": f"{self.rooms[0].id},{self.rooms[2].id}"}),
+            (f"/api/hotels/{self.hotel.id}/catalogue/", {"date_from": "2025-12-21", "date_to": "2025-12-22"}),
+        ]
+        for url, params in cases:
+            expected = await sync_to_async(self.sync_get)(url, params)
+            r = await self.async_get(url, params)
+            self.assertEqual(r.status_code, 200, url)
+            actual = r.json()
+            if "results" in actual:
+                expected, actual = expected["results"], actual["results"]
+            self.assertEqual(actual, expected, url)
+
+    async def test_cursor_walk_and_not_modified(self):
+        ids, params = [], {"hotel": self.hotel.id, "page_size": 2}
+        url = "/api/rooms/"
+        while url:
+            page = (await self.async_get(url, params)).json()
+            ids += [room["id"] for room in page["results"]]
+            url, params = page["next"], None
+        self.assertEqual(ids, [room.id for room in self.rooms])
+
+        first = await self.async_get("/api/rooms/", {"hotel": self.hotel.id})
+        again = await self.async_get("/api/rooms/", {"hotel": self.hotel.id}, headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+    async def test_errors(self):
+        self.assertEqual((await self.async_get("/api/hotels/999/")).status_code, 404)
+        self.assertEqual((await self.async_get("/api/hotels/999/catalogue/")).status_code, 404)
+        self.assertEqual((await self.async_get("/api/rooms/", {"ids": "1,x"})).status_code, 400)
+        self.assertEqual((await self.async_get("/api/hotels/", {"fields": "secret"})).status_code, 400)
+        self.assertEqual((await self.async_get("/api/rooms/", {"date_from": "2025-12-20"})).status_code, 400)
+        self.assertEqual((await self.async_get("/api/rooms/", {"cursor": "!!"})).status_code, 400)
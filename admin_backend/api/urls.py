@@ -1,8 +1,29 @@
+from django.conf import settings
 from django.urls import path
-from .views import HotelListAPIView, RoomListAPIView, BookingCreateAPIView
+from .views import (
+    HotelListAPIView,
+    HotelDetailAPIView,
+    HotelCatalogueAPIView,
+    RoomListAPIView,
+    RoomDetailAPIView,
+    BookingCreateAPIView,
+)
+
+if settings.ASYNC_API:
+    # Под ASGI чтение обслуживают нативные async-представления
+    from .async_views import (
+        AsyncHotelListView as HotelListAPIView,
+        AsyncHotelDetailView as HotelDetailAPIView,
+        AsyncHotelCatalogueView as HotelCatalogueAPIView,
+        AsyncRoomListView as RoomListAPIView,
+        AsyncRoomDetailView as RoomDetailAPIView,
+    )
 
 urlpatterns = [
     path("hotels/", HotelListAPIView.as_view(), name="hotel-list"),
+    path("hotels/<int:pk>/", HotelDetailAPIView.as_view(), name="hotel-detail"),
+    path("hotels/<int:pk>/catalogue/", HotelCatalogueAPIView.as_view(), name="hotel-catalogue"),
     path("rooms/", RoomListAPIView.as_view(), name="room-list"),
+    path("rooms/<int:pk>/", RoomDetailAPIView.as_view(), name="room-detail"),
     path("booking/", BookingCreateAPIView.as_view(), name="booking-create"),
 ]
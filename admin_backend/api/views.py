@@ -1,33 +1,241 @@
-from rest_framework import generics
+import hashlib
+
+from django.db.models import Count, Max, Prefetch, Sum
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date, quote_etag
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from admin_backend.routers import replica_reads
 from hotels.models import Hotel
 from rooms.models import Room
 from bookings.models import Booking
-from .serializers import HotelSerializer, RoomSerializer, BookingSerializer
+from bookings.availability import available_rooms
+from bookings.services import BookingConflict, create_booking
+from . import cache as api_cache
+from .pagination import IdCursorPagination
+from .serializers import HotelSerializer, HotelCatalogueSerializer, RoomSerializer, BookingSerializer
+
+
+def parse_date_range(params):
+    """date_from/date_to из параметров запроса; None, если даты не переданы."""
+    raw_from, raw_to = params.get("date_from"), params.get("date_to")
+    if not raw_from and not raw_to:
+        return None
+    if not raw_from or not raw_to:
+        raise ValidationError("Нужно указать обе даты: date_from и date_to.")
+
+    try:
+        date_from, date_to = parse_date(raw_from), parse_date(raw_to)
+    except ValueError:
+        date_from = date_to = None
+    if not date_from or not date_to:
+        raise ValidationError("Даты должны быть в формате ГГГГ-ММ-ДД.")
+    if date_to <= date_from:
+        raise ValidationError("Дата выезда должна быть позже даты заезда.")
+    return date_from, date_to
+
+
+# Сколько номеров можно запросить одним ?ids=
+MAX_BATCH_IDS = 100
+
+
+def parse_ids(raw: str) -> list[int]:
+    ids = [part.strip() for part in raw.split(",") if part.strip()]
+    if not all(part.isdigit() for part in ids):
+        raise ValidationError({"ids": "Ожидается список id через запятую."})
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValidationError({"ids": f"Не больше {MAX_BATCH_IDS} id за запрос."})
+    return [int(part) for part in ids]
+
+
+def available_room_queryset(params):
+    """
+    Возвращает только свободные комнаты.
+    Возможна фильтрация по отелю: /api/rooms/?hotel=1,
+    по датам проживания: /api/rooms/?hotel=1&date_from=2025-12-20&date_to=2025-12-23
+    и по списку номеров: /api/rooms/?ids=1,2,3
+    """
+    qs = Room.objects.filter(is_available=True)
+
+    hotel_id = params.get("hotel")
+
+    if hotel_id:
+        qs = qs.filter(hotel_id=hotel_id)
+
+    raw_ids = params.get("ids")
+    if raw_ids:
+        qs = qs.filter(id__in=parse_ids(raw_ids))
+
+    dates = parse_date_range(params)
+    if dates:
+        qs = available_rooms(qs, *dates)
+
+    return qs
+
+
+def room_cache_scopes(params) -> list[str]:
+    # Изменения номеров и броней отеля сбрасывают только его списки
+    hotel_id = params.get("hotel")
+    if hotel_id is None:
+        return ["rooms"]
+    return [f"rooms:{int(hotel_id)}"] if hotel_id.isdigit() else []
+
+
+# Агрегат, из которого строятся ETag и Last-Modified списка
+LIST_STATE = {"count": Count("id"), "ids": Sum("id"), "modified": Max("updated_at")}
+
+
+def list_validators(state: dict, full_path: str) -> tuple[str, int | None]:
+    fingerprint = f"{full_path}|{state['count']}|{state['ids']}|{state['modified']}"
+    etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+    last_modified = int(state["modified"].timestamp()) if state["modified"] else None
+    return etag, last_modified
+
+
+class ConditionalListMixin:
+    """
+    Списки с курсорной пагинацией, ?fields= и условными запросами.
+    ETag и Last-Modified считаются одним агрегатом по отфильтрованной выборке
+    до сериализации: повторный опрос без изменений получает 304 без тела,
+    а сами строки из базы не читаются.
+    Если у представления есть области кэша (cache_scopes), готовая страница
+    вместе с ETag берётся из кэша "api" и база не трогается вовсе.
+    """
+    pagination_class = IdCursorPagination
+
+    def cache_scopes(self) -> list[str]:
+        return []
 
+    def list(self, request, *args, **kwargs):
+        # Списки терпят небольшое отставание — читаем с реплики, если она есть
+        with replica_reads():
+            return self.conditional_list(request)
 
-class HotelListAPIView(generics.ListAPIView):
+    def conditional_list(self, request):
+        scopes = self.cache_scopes()
+        if api_cache.enabled() and scopes and not api_cache.bypassed(request):
+            key = api_cache.response_key(scopes, request.build_absolute_uri())
+            etag, last_modified, data = api_cache.get_or_compute(key, lambda: self.snapshot(with_data=True))
+        else:
+            etag, last_modified, data = self.snapshot(with_data=False)
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        if data is None:
+            data = self.page_data(self.filter_queryset(self.get_queryset()))
+        response = Response(data)
+        response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified)
+        # Кэшировать можно, но каждый раз сверяясь с сервером
+        response["Cache-Control"] = "no-cache"
+        return response
+
+    def snapshot(self, with_data: bool):
+        """(ETag, Last-Modified, данные страницы или None)."""
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = list_validators(queryset.aggregate(**LIST_STATE), self.request.get_full_path())
+        return etag, last_modified, self.page_data(queryset) if with_data else None
+
+    def page_data(self, queryset) -> dict:
+        fields = self.get_serializer_class().requested_fields(self.request)
+        if fields:
+            queryset = queryset.only("id", *fields)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data).data
+
+
+class HotelListAPIView(ConditionalListMixin, generics.ListAPIView):
     queryset = Hotel.objects.all()
     serializer_class = HotelSerializer
 
+    def cache_scopes(self):
+        return ["hotels"]
 
-class RoomListAPIView(generics.ListAPIView):
+
+class RoomListAPIView(ConditionalListMixin, generics.ListAPIView):
     serializer_class = RoomSerializer
 
+    def cache_scopes(self):
+        return room_cache_scopes(self.request.query_params)
+
+    def get_queryset(self):
+        return available_room_queryset(self.request.query_params)
+
+
+class SparseRetrieveMixin:
     def get_queryset(self):
-        """
-        Возвращает только свободные комнаты.
-        Возможна фильтрация по отелю: /api/rooms/?hotel=1
-        """
-        qs = Room.objects.filter(is_available=True)
+        fields = self.get_serializer_class().requested_fields(self.request)
+        return self.queryset.only("id", *fields) if fields else self.queryset.all()
+
+
+class HotelDetailAPIView(SparseRetrieveMixin, generics.RetrieveAPIView):
+    queryset = Hotel.objects.all()
+    serializer_class = HotelSerializer
+
+
+class RoomDetailAPIView(SparseRetrieveMixin, generics.RetrieveAPIView):
+    queryset = Room.objects.all()
+    serializer_class = RoomSerializer
 
-        hotel_id = self.request.query_params.get("hotel")
 
-        if hotel_id:
-            qs = qs.filter(hotel_id=hotel_id)
+class HotelCatalogueAPIView(generics.RetrieveAPIView):
+    """
+    Отель вместе со свободными номерами за один запрос к API:
+    /api/hotels/1/catalogue/?date_from=2025-12-20&date_to=2025-12-23
+    Номера подгружаются одним prefetch-запросом.
+    """
+    serializer_class = HotelCatalogueSerializer
 
-        return qs
+    def get_queryset(self):
+        rooms = available_room_queryset(self.request.query_params).order_by("id")
+        return Hotel.objects.prefetch_related(Prefetch("rooms", queryset=rooms, to_attr="catalogue_rooms"))
+
+    def retrieve(self, request, *args, **kwargs):
+        with replica_reads():
+            if not api_cache.enabled():
+                return super().retrieve(request, *args, **kwargs)
+            key = api_cache.response_key(["hotels", f"rooms:{int(kwargs['pk'])}"], request.build_absolute_uri())
+            data = api_cache.get_or_compute(key, lambda: super(HotelCatalogueAPIView, self).retrieve(request).data)
+            return Response(data)
 
 
 class BookingCreateAPIView(generics.CreateAPIView):
+    """
+    Создание брони. Заголовок Idempotency-Key делает повторный POST безопасным:
+    вернётся уже созданная бронь (200 вместо 201).
+    Занятые даты — 409 Conflict.
+    """
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        key = request.headers.get("Idempotency-Key", "").strip()
+        if len(key) > 64:
+            raise ValidationError({"Idempotency-Key": "Не длиннее 64 символов."})
+
+        try:
+            booking, created = create_booking(
+                room=data["room"],
+                guest_name=data["guest_name"],
+                guest_phone=data["guest_phone"],
+                guest_email=data.get("guest_email"),
+                date_from=data["date_from"],
+                date_to=data["date_to"],
+                idempotency_key=key or None,
+            )
+        except BookingConflict as e:
+            return Response({"detail": str(e)}, status=status.HTTP_409_CONFLICT)
+
+        return Response(
+            self.get_serializer(booking).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
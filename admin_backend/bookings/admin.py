@@ -1,8 +1,53 @@
+import re
+
 from django.contrib import admin
+
+from rooms.models import Room
 from .models import Booking
 
+_PHONE_RE = re.compile(r"^\+?\d{6,}$")
+
+
+class RoomFilter(admin.SimpleListFilter):
+    """
+    Фильтр по номеру только внутри выбранного отеля:
+    без отеля боковая панель не выгружает все номера системы.
+    """
+    title = "номер"
+    parameter_name = "room"
+
+    def lookups(self, request, model_admin):
+        hotel_id = request.GET.get("hotel__id__exact")
+        if not hotel_id:
+            return ()
+        rooms = Room.objects.filter(hotel_id=hotel_id).only("id", "room_number", "room_type").order_by("room_number")
+        return [(room.id, f"{room.room_number} — {room.room_type}") for room in rooms]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(room_id=self.value())
+        return queryset
+
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ("id", "hotel", "room", "guest_name", "date_from", "date_to", "is_confirmed")
-    list_filter = ("hotel", "room", "is_confirmed")
+    list_filter = ("hotel", RoomFilter, "is_confirmed")
+    # Room.__str__ обращается к room.hotel
+    list_select_related = ("hotel", "room__hotel")
     search_fields = ("guest_name", "guest_phone", "guest_email")
+    autocomplete_fields = ("hotel", "room")
+
+    def get_search_results(self, request, queryset, search_term):
+        # Телефон или почту сначала ищем точным совпадением по индексу,
+        # полный перебор icontains — только если ничего не нашлось
+        term = search_term.strip()
+        if "@" in term:
+            exact = queryset.filter(guest_email=term)
+        elif _PHONE_RE.match(term):
+            exact = queryset.filter(guest_phone=term)
+        else:
+            exact = None
+        if exact is not None and exact.exists():
+            return exact, False
+        return super().get_search_results(request, queryset, search_term)
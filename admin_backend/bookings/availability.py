@@ -0,0 +1,35 @@
+from datetime import date, timedelta
+
+from .models import Booking, RoomNight
+
+
+def nights(date_from: date, date_to: date) -> list[date]:
+    """Ночи проживания: от даты заезда включительно до даты выезда (не включая)."""
+    return [date_from + timedelta(days=i) for i in range((date_to - date_from).days)]
+
+
+def overlapping_bookings(room_id, date_from: date, date_to: date):
+    """Брони номера, пересекающиеся с [date_from, date_to) — по индексу (room, date_from, date_to)."""
+    return Booking.objects.filter(room_id=room_id, date_from__lt=date_to, date_to__gt=date_from)
+
+
+def is_room_available(room_id, date_from: date, date_to: date, exclude_booking=None) -> bool:
+    qs = RoomNight.objects.filter(room_id=room_id, night__gte=date_from, night__lt=date_to)
+    if exclude_booking is not None:
+        qs = qs.exclude(booking_id=exclude_booking)
+    return not qs.exists()
+
+
+def available_rooms(rooms, date_from: date, date_to: date):
+    """Номера из rooms, у которых нет ни одной занятой ночи в диапазоне."""
+    busy = RoomNight.objects.filter(night__gte=date_from, night__lt=date_to).values("room_id")
+    return rooms.exclude(id__in=busy)
+
+
+def sync_room_nights(booking: Booking):
+    """Пересобрать занятые ночи брони после её сохранения."""
+    RoomNight.objects.filter(booking=booking).delete()
+    RoomNight.objects.bulk_create(
+        RoomNight(room_id=booking.room_id, booking=booking, night=night)
+        for night in nights(booking.date_from, booking.date_to)
+    )
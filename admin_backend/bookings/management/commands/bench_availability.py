@@ -0,0 +1,99 @@
+import random
+import secrets
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from bookings.availability import available_rooms, is_room_available, overlapping_bookings
+from bookings.models import Booking, RoomNight
+from hotels.models import Hotel
+from rooms.models import Room
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк проверки доступности на синтетических бронях: пересечение дат "
+        "по индексу (room, date_from, date_to) против таблицы занятых ночей. "
+        "Все данные создаются в транзакции и откатываются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bookings", type=int, default=100_000)
+        parser.add_argument("--rooms", type=int, default=500)
+        parser.add_argument("--queries", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options["seed"])
+        with transaction.atomic():
+            start = time.perf_counter()
+            hotel, rooms = self._populate(rnd, options["rooms"], options["bookings"])
+            self.stdout.write(
+                f"Создано: {options['rooms']} номеров, {Booking.objects.filter(hotel=hotel).count()} броней, "
+                f"{RoomNight.objects.filter(room__hotel=hotel).count()} ночей за {time.perf_counter() - start:.1f} с"
+            )
+
+            horizon = (self.last_day - self.first_day).days
+            ranges = []
+            for _ in range(options["queries"]):
+                d = self.first_day + timedelta(days=rnd.randrange(horizon))
+                ranges.append((rnd.choice(rooms).id, d, d + timedelta(days=rnd.randint(1, 7))))
+
+            hotel_rooms = Room.objects.filter(hotel=hotel, is_available=True)
+            overlap_list = lambda f, t: hotel_rooms.exclude(
+                id__in=Booking.objects.filter(date_from__lt=t, date_to__gt=f).values("room_id")
+            ).count()
+
+            self._report("один номер, пересечение дат", ranges, lambda r, f, t: overlapping_bookings(r, f, t).exists())
+            self._report("один номер, занятые ночи", ranges, lambda r, f, t: is_room_available(r, f, t))
+            self._report("список отеля, пересечение дат", ranges[:50], lambda r, f, t: overlap_list(f, t))
+            self._report("список отеля, занятые ночи", ranges[:50], lambda r, f, t: available_rooms(hotel_rooms, f, t).count())
+
+            transaction.set_rollback(True)
+
+    def _populate(self, rnd, n_rooms, n_bookings):
+        hotel = Hotel.objects.create(
+            name="Benchmark", slug=f"bench-{secrets.token_hex(4)}", api_key=secrets.token_hex(32)
+        )
+        rooms = Room.objects.bulk_create(
+            Room(hotel=hotel, room_number=str(i), room_type="Стандарт", price_per_night=5000)
+            for i in range(n_rooms)
+        )
+
+        # Для каждого номера — цепочка непересекающихся броней
+        self.first_day = date(2025, 1, 1)
+        cursors = {room.id: self.first_day for room in rooms}
+        bookings = []
+        for i in range(n_bookings):
+            room = rooms[i % n_rooms]
+            date_from = cursors[room.id] + timedelta(days=rnd.randint(0, 3))
+            date_to = date_from + timedelta(days=rnd.randint(1, 7))
+            cursors[room.id] = date_to
+            bookings.append(Booking(
+                hotel=hotel, room=room, guest_name="Гость", guest_phone="+70000000000",
+                date_from=date_from, date_to=date_to, total_price=0,
+            ))
+        self.last_day = max(cursors.values())
+
+        # bulk_create обходит Booking.save, поэтому ночи заполняем сами
+        for chunk in range(0, len(bookings), 5000):
+            batch = Booking.objects.bulk_create(bookings[chunk:chunk + 5000])
+            RoomNight.objects.bulk_create(
+                RoomNight(room_id=b.room_id, booking_id=b.id, night=b.date_from + timedelta(days=d))
+                for b in batch
+                for d in range((b.date_to - b.date_from).days)
+            )
+        return hotel, rooms
+
+    def _report(self, title, ranges, fn):
+        timings = []
+        for room_id, date_from, date_to in ranges:
+            start = time.perf_counter()
+            fn(room_id, date_from, date_to)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        avg = sum(timings) / len(timings) * 1000
+        p95 = timings[int(len(timings) * 0.95)] * 1000
+        self.stdout.write(f"{title:<34} ср. {avg:7.3f} мс   p95 {p95:7.3f} мс   ({len(timings)} запросов)")
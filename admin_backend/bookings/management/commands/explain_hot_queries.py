@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from bookings.availability import available_rooms, overlapping_bookings
+from bookings.models import Booking, RoomNight
+from hotels.models import Hotel
+from rooms.models import Room
+
+
+def hot_queries(hotel_id: int, room_id: int, day: date) -> list[tuple[str, object]]:
+    """Запросы горячих путей API, админки и проверки доступности — (название, QuerySet)."""
+    until = day + timedelta(days=3)
+    free = Room.objects.filter(is_available=True, hotel_id=hotel_id)
+    return [
+        ("hotel by api_key", Hotel.objects.filter(api_key="x")),
+        ("hotel by slug", Hotel.objects.filter(slug="x")),
+        ("rooms: available in hotel", free),
+        ("rooms: available in hotel for dates", available_rooms(free, day, until)),
+        ("room: busy nights", RoomNight.objects.filter(room_id=room_id, night__gte=day, night__lt=until)),
+        ("room: overlapping bookings", overlapping_bookings(room_id, day, until)),
+        ("bookings: arrivals on date", Booking.objects.filter(date_from=day)),
+        ("bookings: by guest phone", Booking.objects.filter(guest_phone="+79990000000")),
+        ("bookings: by guest email", Booking.objects.filter(guest_email="guest@example.com")),
+        ("admin: bookings of hotel", Booking.objects.filter(hotel_id=hotel_id).select_related("hotel", "room__hotel")),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Печатает план выполнения (EXPLAIN) для каждого горячего запроса "
+        "на текущей базе — SQLite или PostgreSQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--analyze", action="store_true", help="EXPLAIN ANALYZE (только PostgreSQL)")
+        parser.add_argument("--sql", action="store_true", help="Печатать и сам SQL")
+
+    def handle(self, *args, **options):
+        hotel = Hotel.objects.order_by("id").first()
+        room = Room.objects.order_by("id").first()
+        options_explain = {}
+        if options["analyze"] and connection.vendor == "postgresql":
+            options_explain = {"analyze": True, "buffers": True}
+
+        self.stdout.write(f"База: {connection.vendor}")
+        for title, qs in hot_queries(hotel.id if hotel else 1, room.id if room else 1, date.today()):
+            self.stdout.write("")
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            if options["sql"]:
+                self.stdout.write(str(qs.query))
+            self.stdout.write(qs.explain(**options_explain))
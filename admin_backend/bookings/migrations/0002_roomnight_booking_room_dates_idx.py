@@ -0,0 +1,72 @@
+# Generated by Django 6.0 on 2026-10-17 20:40
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_room_nights(apps, schema_editor):
+    Booking = apps.get_model("bookings", "Booking")
+    RoomNight = apps.get_model("bookings", "RoomNight")
+    nights = []
+    taken = {}
+    # (бронь, пересекающаяся бронь) -> номер и первая общая ночь
+    overlaps = {}
+    for b in Booking.objects.only("id", "room_id", "date_from", "date_to").order_by("id").iterator():
+        for i in range((b.date_to - b.date_from).days):
+            night = b.date_from + timedelta(days=i)
+            other = taken.setdefault((b.room_id, night), b.id)
+            if other != b.id:
+                overlaps.setdefault((other, b.id), (b.room_id, night))
+                continue
+            nights.append(RoomNight(room_id=b.room_id, booking_id=b.id, night=night))
+    # Ночь, которую нельзя записать, потом даст IntegrityError при сохранении брони
+    if overlaps:
+        lines = [
+            f"  #{first} и #{second}: номер id={room_id}, с {night}"
+            for (first, second), (room_id, night) in list(overlaps.items())[:50]
+        ]
+        if len(overlaps) > 50:
+            lines.append(f"  ... и ещё {len(overlaps) - 50}")
+        raise RuntimeError(
+            "Брони пересекаются по датам, исправьте их и повторите migrate:\n" + "\n".join(lines)
+        )
+    RoomNight.objects.bulk_create(nights, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomNight',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('night', models.DateField(verbose_name='Ночь')),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='bookings.booking', verbose_name='Бронь')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='rooms.room', verbose_name='Номер')),
+            ],
+            options={
+                'verbose_name': 'Занятая ночь',
+                'verbose_name_plural': 'Занятые ночи',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'date_from', 'date_to'], name='booking_room_dates_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='roomnight',
+            constraint=models.UniqueConstraint(fields=('room', 'night'), name='roomnight_unique_room_night'),
+        ),
+        migrations.AddIndex(
+            model_name='roomnight',
+            index=models.Index(fields=['night', 'room'], name='roomnight_night_room_idx'),
+        ),
+        migrations.RunPython(fill_room_nights, migrations.RunPython.noop),
+    ]
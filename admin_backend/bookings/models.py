@@ -1,4 +1,5 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from hotels.models import Hotel
 from rooms.models import Room
 
@@ -17,10 +18,65 @@ class Booking(models.Model):
     is_confirmed = models.BooleanField(default=False, verbose_name="Подтверждено")
 
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
+    # Повторный POST с тем же ключом возвращает уже созданную бронь
+    idempotency_key = models.CharField(
+        max_length=64, unique=True, null=True, blank=True, editable=False, verbose_name="Ключ идемпотентности"
+    )
 
     class Meta:
         verbose_name = "Бронирование"
         verbose_name_plural = "Бронирования"
+        indexes = [
+            # Поиск пересекающихся броней номера
+            models.Index(fields=["room", "date_from", "date_to"], name="booking_room_dates_idx"),
+            # Заезды и выезды по датам во всех номерах
+            models.Index(fields=["date_from", "date_to"], name="booking_dates_idx"),
+            # Поиск броней гостя по телефону или почте
+            models.Index(fields=["guest_phone"], name="booking_guest_phone_idx"),
+            models.Index(fields=["guest_email"], name="booking_guest_email_idx"),
+        ]
 
     def __str__(self):
         return f"Бронь #{self.id} — {self.guest_name}"
+
+    def clean(self):
+        from .availability import is_room_available
+
+        if self.date_from and self.date_to and self.date_to <= self.date_from:
+            raise ValidationError({"date_to": "Дата выезда должна быть позже даты заезда."})
+        if self.room_id and self.date_from and self.date_to and not is_room_available(
+            self.room_id, self.date_from, self.date_to, exclude_booking=self.pk
+        ):
+            raise ValidationError({"room": "Номер уже забронирован на эти даты."})
+
+    def save(self, *args, **kwargs):
+        from .availability import sync_room_nights
+
+        # Бронь и занятые ею ночи пишутся вместе
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            sync_room_nights(self)
+
+
+class RoomNight(models.Model):
+    """
+    Занятость номера по ночам: одна строка на каждую ночь брони.
+    Проверка диапазона дат — выборка по уникальному индексу (room, night).
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="nights", verbose_name="Номер")
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name="nights", verbose_name="Бронь")
+    night = models.DateField(verbose_name="Ночь")
+
+    class Meta:
+        verbose_name = "Занятая ночь"
+        verbose_name_plural = "Занятые ночи"
+        constraints = [
+            models.UniqueConstraint(fields=["room", "night"], name="roomnight_unique_room_night"),
+        ]
+        indexes = [
+            # Занятые номера всего отеля на диапазон дат
+            models.Index(fields=["night", "room"], name="roomnight_night_room_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.room_id} — {self.night}"
@@ -0,0 +1,96 @@
+import threading
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import date
+
+from django.db import IntegrityError, connection, transaction
+
+from rooms.models import Room
+from .availability import is_room_available, nights
+from .models import Booking
+
+
+class BookingConflict(Exception):
+    """Номер уже занят на эти даты или ключ идемпотентности использован для другой брони."""
+
+
+# SQLite не умеет SELECT ... FOR UPDATE: создание броней одного номера
+# сериализуем блокировкой внутри процесса. Между процессами защищает
+# уникальный индекс (room, night) в RoomNight.
+_room_locks: dict[int, threading.Lock] = defaultdict(threading.Lock)
+_room_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _sqlite_room_lock(room_id: int):
+    with _room_locks_guard:
+        lock = _room_locks[room_id]
+    with lock:
+        yield
+
+
+def _room_lock(room_id: int):
+    if connection.vendor == "sqlite":
+        return _sqlite_room_lock(room_id)
+    return nullcontext()
+
+
+def _same_request(booking: Booking, room: Room, date_from: date, date_to: date) -> bool:
+    return booking.room_id == room.pk and booking.date_from == date_from and booking.date_to == date_to
+
+
+def _replay(idempotency_key: str, room: Room, date_from: date, date_to: date) -> Booking | None:
+    booking = Booking.objects.filter(idempotency_key=idempotency_key).first()
+    if booking is not None and not _same_request(booking, room, date_from, date_to):
+        raise BookingConflict("Ключ идемпотентности уже использован для другой брони.")
+    return booking
+
+
+def create_booking(
+    *,
+    room: Room,
+    guest_name: str,
+    guest_phone: str,
+    date_from: date,
+    date_to: date,
+    guest_email: str | None = None,
+    idempotency_key: str | None = None,
+) -> tuple[Booking, bool]:
+    """
+    Создаёт бронь, если номер свободен на [date_from, date_to).
+    Стоимость считается по цене номера. Возвращает (бронь, создана ли она сейчас):
+    повтор с тем же idempotency_key возвращает ранее созданную бронь.
+    """
+    try:
+        with _room_lock(room.pk), transaction.atomic():
+            # На Postgres/MySQL конкурирующие брони номера ждут здесь друг друга,
+            # поэтому повтор с тем же ключом видит уже закоммиченную бронь
+            room = Room.objects.select_for_update().get(pk=room.pk)
+            if idempotency_key:
+                existing = _replay(idempotency_key, room, date_from, date_to)
+                if existing is not None:
+                    return existing, False
+            if not is_room_available(room.pk, date_from, date_to):
+                raise BookingConflict("Номер уже забронирован на эти даты.")
+
+            booking = Booking(
+                hotel_id=room.hotel_id,
+                room=room,
+                guest_name=guest_name,
+                guest_phone=guest_phone,
+                guest_email=guest_email,
+                date_from=date_from,
+                date_to=date_to,
+                total_price=room.price_per_night * len(nights(date_from, date_to)),
+                idempotency_key=idempotency_key or None,
+            )
+            booking.save()
+    except IntegrityError:
+        # Гонку проиграли: параллельный запрос с тем же ключом или те же ночи
+        if idempotency_key:
+            existing = _replay(idempotency_key, room, date_from, date_to)
+            if existing is not None:
+                return existing, False
+        raise BookingConflict("Номер уже забронирован на эти даты.")
+
+    return booking, True
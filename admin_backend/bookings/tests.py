@@ -1,3 +1,196 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+
+from hotels.models import Hotel
+from rooms.models import Room
+from .availability import is_room_available
+from .management.commands.explain_hot_queries import hot_queries
+from .models import Booking, RoomNight
+from .services import BookingConflict, create_booking
+
+
+class RoomNightTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name="EcoHouse", slug="ecohouse", api_key="k1")
+        cls.room = Room.objects.create(hotel=cls.hotel, room_number="1", room_type="Стандарт", price_per_night=7800)
+
+    def make_booking(self, date_from, date_to, **kwargs):
+        return Booking(
+            hotel=self.hotel, room=self.room, guest_name="Иван", guest_phone="+79990000000",
+            date_from=date_from, date_to=date_to, total_price=0, **kwargs,
+        )
+
+    def test_nights_follow_booking_dates(self):
+        booking = self.make_booking(date(2025, 12, 20), date(2025, 12, 23))
+        booking.save()
+        self.assertEqual(
+            list(booking.nights.order_by("night").values_list("night", flat=True)),
+            [date(2025, 12, 20), date(2025, 12, 21), date(2025, 12, 22)],
+        )
+
+        booking.date_to = date(2025, 12, 21)
+        booking.save()
+        self.assertEqual(booking.nights.count(), 1)
+
+        booking.delete()
+        self.assertFalse(RoomNight.objects.exists())
+
+    def test_clean_rejects_overlap(self):
+        self.make_booking(date(2025, 12, 20), date(2025, 12, 23)).save()
+        self.assertFalse(is_room_available(self.room.id, date(2025, 12, 22), date(2025, 12, 24)))
+        with self.assertRaises(ValidationError):
+            self.make_booking(date(2025, 12, 22), date(2025, 12, 24)).full_clean()
+        self.make_booking(date(2025, 12, 23), date(2025, 12, 24)).full_clean()
+
+    def test_migration_refuses_overlapping_legacy_bookings(self):
+        fill_room_nights = import_module("bookings.migrations.0002_roomnight_booking_room_dates_idx").fill_room_nights
+        first, second, third = Booking.objects.bulk_create([
+            self.make_booking(date(2025, 12, 20), date(2025, 12, 23)),
+            self.make_booking(date(2025, 12, 22), date(2025, 12, 24)),
+            self.make_booking(date(2025, 12, 24), date(2025, 12, 25)),
+        ])
+
+        message = f"#{first.id} и #{second.id}: номер id={self.room.id}, с 2025-12-22"
+        with self.assertRaisesMessage(RuntimeError, message):
+            fill_room_nights(apps, None)
+        self.assertFalse(RoomNight.objects.exists())
+
+        second.delete()
+        fill_room_nights(apps, None)
+        self.assertEqual(RoomNight.objects.count(), 4)
+
+
+class CreateBookingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = Hotel.objects.create(name="EcoHouse", slug="ecohouse", api_key="k1")
+        cls.room = Room.objects.create(hotel=cls.hotel, room_number="1", room_type="Стандарт", price_per_night=7800)
+
+    def book(self, date_from, date_to, **kwargs):
+        return create_booking(
+            room=self.room, guest_name="Иван", guest_phone="+79990000000",
+            date_from=date_from, date_to=date_to, **kwargs,
+        )
+
+    def test_price_is_computed_from_room(self):
+        booking, created = self.book(date(2025, 12, 20), date(2025, 12, 23))
+        self.assertTrue(created)
+        self.assertEqual(booking.total_price, Decimal("23400"))
+        self.assertEqual(booking.hotel_id, self.hotel.id)
+
+    def test_overlap_raises_conflict(self):
+        self.book(date(2025, 12, 20), date(2025, 12, 23))
+        with self.assertRaises(BookingConflict):
+            self.book(date(2025, 12, 22), date(2025, 12, 24))
+        self.book(date(2025, 12, 23), date(2025, 12, 24))
+
+    def test_idempotency_key_replays_booking(self):
+        first, created = self.book(date(2025, 12, 20), date(2025, 12, 23), idempotency_key="abc")
+        again, created_again = self.book(date(2025, 12, 20), date(2025, 12, 23), idempotency_key="abc")
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(first.pk, again.pk)
+        self.assertEqual(Booking.objects.count(), 1)
+
+        with self.assertRaises(BookingConflict):
+            self.book(date(2026, 1, 10), date(2026, 1, 12), idempotency_key="abc")
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    """Сотни параллельных броней одного номера: ни одна ночь не продаётся дважды."""
+
+    THREADS = 200
+
+    def setUp(self):
+        self.hotel = Hotel.objects.create(name="EcoHouse", slug="ecohouse", api_key="k1")
+        self.room = Room.objects.create(hotel=self.hotel, room_number="1", room_type="Стандарт", price_per_night=7800)
+
+    def run_parallel(self, requests):
+        def attempt(args):
+            date_from, date_to, key = args
+            try:
+                create_booking(
+                    room=self.room, guest_name="Гость", guest_phone="+70000000000",
+                    date_from=date_from, date_to=date_to, idempotency_key=key,
+                )
+                return "ok"
+            except BookingConflict:
+                return "conflict"
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            return list(pool.map(attempt, requests))
+
+    def test_same_dates_booked_once(self):
+        start = date(2025, 12, 20)
+        results = self.run_parallel([(start, start + timedelta(days=3), None)] * self.THREADS)
+        self.assertEqual(results.count("ok"), 1)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(RoomNight.objects.count(), 3)
+
+    def test_overlapping_ranges_never_share_a_night(self):
+        start = date(2025, 12, 1)
+        requests = [(start + timedelta(days=i % 30), start + timedelta(days=i % 30 + 1 + i % 3), None)
+                    for i in range(self.THREADS)]
+        self.run_parallel(requests)
+        booked = [(b.date_from, b.date_to) for b in Booking.objects.all()]
+        nights = sum((t - f).days for f, t in booked)
+        self.assertEqual(RoomNight.objects.count(), nights)
+        self.assertEqual(RoomNight.objects.values("night").distinct().count(), nights)
+
+    def test_retried_posts_with_same_key_create_one_booking(self):
+        start = date(2025, 12, 20)
+        self.run_parallel([(start, start + timedelta(days=2), "retry-1")] * self.THREADS)
+        self.assertEqual(Booking.objects.filter(idempotency_key="retry-1").count(), 1)
+
+
+class BookingAdminQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth.models import User
+
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        cls.hotel = Hotel.objects.create(name="EcoHouse", slug="ecohouse", api_key="k1")
+
+    def add_bookings(self, n):
+        start = date(2025, 1, 1) + timedelta(days=Booking.objects.count() * 2)
+        for i in range(n):
+            room = Room.objects.create(hotel=self.hotel, room_number=str(Room.objects.count() + 1),
+                                       room_type="Стандарт", price_per_night=5000)
+            Booking.objects.create(
+                hotel=self.hotel, room=room, guest_name="Гость", guest_phone="+70000000000",
+                date_from=start + timedelta(days=i * 2), date_to=start + timedelta(days=i * 2 + 1), total_price=0,
+            )
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.client.force_login(self.admin)
+        url = "/admin/bookings/booking/"
+
+        self.add_bookings(3)
+        with self.assertNumQueries(6):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.add_bookings(30)
+        with self.assertNumQueries(6):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        # Фильтр по номеру внутри отеля — ещё один запрос на список номеров
+        with self.assertNumQueries(7):
+            self.assertEqual(self.client.get(url, {"hotel__id__exact": self.hotel.id}).status_code, 200)
+
+
+class HotQueryPlanTests(TestCase):
+    @skipUnlessDBFeature("supports_explaining_query_execution")
+    def test_hot_queries_do_not_scan_tables(self):
+        for title, qs in hot_queries(hotel_id=1, room_id=1, day=date(2025, 12, 20)):
+            plan = qs.explain()
+            if connection.vendor == "sqlite":
+                self.assertNotIn("SCAN", plan, title)
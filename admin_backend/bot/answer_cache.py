@@ -0,0 +1,113 @@
+# admin_backend/bot/answer_cache.py
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Кэш ответов AI по смыслу вопроса, отдельно для каждого отеля.
+
+    Вопрос считается повтором, если косинусная близость его эмбеддинга
+    к сохранённому не ниже threshold. Записи живут ttl секунд, общий размер
+    ограничен max_entries (вытесняются давно не использованные).
+    version_fn(hotel) — версия базы знаний отеля: когда она меняется,
+    все ответы этого отеля сбрасываются.
+    """
+
+    def __init__(self, threshold: float = 0.92, ttl: float = 3600.0, max_entries: int = 1000, version_fn=None):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._version_fn = version_fn
+
+        # hotel -> {id: (нормированный эмбеддинг, ответ, время записи)}
+        self._by_hotel: dict[str, dict[int, tuple[np.ndarray, str, float]]] = {}
+        # Общий порядок использования (hotel, id) для LRU-вытеснения
+        self._lru: OrderedDict[tuple[str, int], None] = OrderedDict()
+        self._versions: dict[str, object] = {}
+        self._next_id = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        v = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def _check_version(self, hotel: str):
+        if self._version_fn is None:
+            return
+        version = self._version_fn(hotel)
+        if self._versions.get(hotel, version) != version:
+            self.invalidate(hotel)
+        self._versions[hotel] = version
+
+    def get(self, hotel: str, embedding) -> str | None:
+        self._check_version(hotel)
+        entries = self._by_hotel.get(hotel)
+        if entries:
+            now = time.monotonic()
+            for entry_id in [i for i, e in entries.items() if now - e[2] > self.ttl]:
+                self._remove(hotel, entry_id)
+                self.expirations += 1
+
+        if not entries:
+            self.misses += 1
+            return None
+
+        ids = list(entries)
+        matrix = np.stack([entries[i][0] for i in ids])
+        sims = matrix @ self._normalize(embedding)
+        best = int(np.argmax(sims))
+        if sims[best] < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._lru.move_to_end((hotel, ids[best]))
+        return entries[ids[best]][1]
+
+    def put(self, hotel: str, embedding, answer: str):
+        self._check_version(hotel)
+        self._next_id += 1
+        entry = (self._normalize(embedding), answer, time.monotonic())
+        self._by_hotel.setdefault(hotel, {})[self._next_id] = entry
+        self._lru[(hotel, self._next_id)] = None
+        while len(self._lru) > self.max_entries:
+            old_hotel, old_id = next(iter(self._lru))
+            self._remove(old_hotel, old_id)
+            self.evictions += 1
+
+    def invalidate(self, hotel: str | None = None):
+        """Сбросить ответы одного отеля или весь кэш."""
+        hotels = [hotel] if hotel is not None else list(self._by_hotel)
+        for h in hotels:
+            for entry_id in list(self._by_hotel.get(h, ())):
+                self._remove(h, entry_id)
+        self.invalidations += 1
+
+    def _remove(self, hotel: str, entry_id: int):
+        entries = self._by_hotel[hotel]
+        del entries[entry_id]
+        if not entries:
+            del self._by_hotel[hotel]
+        del self._lru[(hotel, entry_id)]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._lru),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,196 @@
+# admin_backend/bot/api_client.py
+import asyncio
+import logging
+import os
+import random
+from collections import OrderedDict
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class ApiClient:
+    """
+    Долгоживущий HTTP-клиент к Django API.
+    Один пул соединений на весь процесс бота: keep-alive, опциональный HTTP/2,
+    таймауты и повтор идемпотентных GET (и POST с Idempotency-Key)
+    с экспоненциальной задержкой.
+    Ответы с ETag запоминаются: повторный GET шлёт If-None-Match и на 304
+    возвращает сохранённые данные.
+    """
+
+    # Статусы, при которых GET имеет смысл повторить
+    RETRY_STATUSES = {502, 503, 504}
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        retries: int = 2,
+        backoff: float = 0.2,
+        etag_cache_size: int = 256,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.http2 = http2
+        self.retries = retries
+        self.backoff = backoff
+        self._client: httpx.AsyncClient | None = None
+
+        self.etag_cache_size = etag_cache_size
+        self._etags: OrderedDict[str, tuple[str, object]] = OrderedDict()
+        self.not_modified = 0
+
+    @classmethod
+    def from_env(cls, base_url: str) -> "ApiClient":
+        return cls(
+            base_url,
+            max_connections=_env_int("API_POOL_MAX_CONNECTIONS", 20),
+            max_keepalive=_env_int("API_POOL_MAX_KEEPALIVE", 10),
+            keepalive_expiry=_env_float("API_KEEPALIVE_EXPIRY", 30.0),
+            http2=_env_bool("API_HTTP2"),
+            timeout=_env_float("API_TIMEOUT", 10.0),
+            connect_timeout=_env_float("API_CONNECT_TIMEOUT", 3.0),
+            retries=_env_int("API_RETRIES", 2),
+            backoff=_env_float("API_RETRY_BACKOFF", 0.2),
+            etag_cache_size=_env_int("API_ETAG_CACHE_SIZE", 256),
+        )
+
+    def start(self):
+        if self._client is not None:
+            return
+
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("API_HTTP2 включён, но пакет h2 не установлен — используем HTTP/1.1")
+                http2 = False
+
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=self.limits,
+            timeout=self.timeout,
+            http2=http2,
+        )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _delay(self, attempt: int) -> float:
+        # Экспоненциальная задержка с джиттером, чтобы ретраи не шли синхронно
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    async def get(self, path: str, params=None, *, fresh: bool = False):
+        """fresh=True — ответ прямо из базы, мимо кэша ответов API (Cache-Control: no-cache)."""
+        if self._client is None:
+            self.start()
+
+        key = str(self._client.build_request("GET", path, params=params).url)
+        cached = self._etags.get(key)
+        headers = {}
+        if cached:
+            headers["If-None-Match"] = cached[0]
+        if fresh:
+            headers["Cache-Control"] = "no-cache"
+
+        for attempt in range(self.retries + 1):
+            try:
+                r = await self._client.get(path, params=params, headers=headers or None)
+            except httpx.TransportError as e:
+                if attempt >= self.retries:
+                    raise
+                logger.warning(f"GET {path}: {e!r}, повтор #{attempt + 1}")
+                await asyncio.sleep(self._delay(attempt))
+                continue
+
+            if r.status_code in self.RETRY_STATUSES and attempt < self.retries:
+                logger.warning(f"GET {path}: HTTP {r.status_code}, повтор #{attempt + 1}")
+                await asyncio.sleep(self._delay(attempt))
+                continue
+
+            if r.status_code == 304 and cached:
+                self.not_modified += 1
+                self._etags.move_to_end(key)
+                return cached[1]
+
+            r.raise_for_status()
+            data = r.json()
+            etag = r.headers.get("ETag")
+            if etag and self.etag_cache_size:
+                self._etags[key] = (etag, data)
+                self._etags.move_to_end(key)
+                while len(self._etags) > self.etag_cache_size:
+                    self._etags.popitem(last=False)
+            return data
+
+    async def post(self, path: str, json=None, *, idempotency_key: str | None = None) -> httpx.Response:
+        """
+        POST без проверки статуса: ответ разбирает вызывающий.
+        Повторяется только с Idempotency-Key — сервер не создаст вторую запись.
+        """
+        if self._client is None:
+            self.start()
+
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        retries = self.retries if idempotency_key else 0
+
+        for attempt in range(retries + 1):
+            try:
+                r = await self._client.post(path, json=json, headers=headers)
+            except httpx.TransportError as e:
+                if attempt >= retries:
+                    raise
+                logger.warning(f"POST {path}: {e!r}, повтор #{attempt + 1}")
+                await asyncio.sleep(self._delay(attempt))
+                continue
+
+            if r.status_code in self.RETRY_STATUSES and attempt < retries:
+                logger.warning(f"POST {path}: HTTP {r.status_code}, повтор #{attempt + 1}")
+                await asyncio.sleep(self._delay(attempt))
+                continue
+            return r
+
+    async def get_all(self, path: str, params=None, *, fresh: bool = False) -> list:
+        """GET списка целиком: проходит по ссылкам next курсорной пагинации."""
+        data = await self.get(path, params=params, fresh=fresh)
+        if not isinstance(data, dict) or "results" not in data:
+            return data
+
+        items = list(data["results"])
+        while data.get("next"):
+            data = await self.get(data["next"], fresh=fresh)
+            items += data["results"]
+        return items
@@ -0,0 +1,86 @@
+# admin_backend/bot/bench_ingest.py
+"""
+Бенчмарк загрузки базы знаний на синтетическом корпусе.
+
+    python bench_ingest.py --files 3000 --lines 40 [--workers 4]
+
+Создаёт во временной папке N файлов отелей, загружает их в отдельную
+коллекцию Chroma и печатает пропускную способность, затем замеряет
+повторную загрузку без изменений и загрузку после правки одного файла.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import rag
+
+TOPICS = [
+    "Завтрак подаётся в ресторане на первом этаже с {h} до {h2} часов, шведский стол.",
+    "Трансфер из аэропорта стоит {p} рублей, заказывать заранее у администратора.",
+    "Бассейн открыт с {h} до {h2}, обязательно иметь при себе шапочку, прокат {p2} руб.",
+    "Поздний выезд до {h2}:00 возможен за {p} рублей при наличии свободных номеров.",
+    "Парковка для гостей отеля {name} бесплатная, охраняемая, мест ограниченное количество.",
+    "Номер стандарт {n} площадью {a} кв.м, двуспальная кровать, душ, кондиционер, вид на лес.",
+    "Сауна и хаммам работают по предварительной записи, стоимость часа {p} рублей.",
+    "С домашними животными до {a} кг можно заселиться за дополнительную плату {p2} рублей в сутки.",
+]
+
+
+def make_corpus(path: str, files: int, lines: int, seed: int = 42):
+    rnd = random.Random(seed)
+    for i in range(files):
+        name = f"Hotel{i:05d}"
+        rows = [
+            rnd.choice(TOPICS).format(
+                name=name, h=rnd.randint(6, 10), h2=rnd.randint(11, 23),
+                p=rnd.randint(5, 50) * 100, p2=rnd.randint(1, 9) * 50,
+                n=rnd.randint(1, 6), a=rnd.randint(12, 45),
+            )
+            for _ in range(lines)
+        ]
+        with open(os.path.join(path, f"{name}.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(rows))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=3000)
+    parser.add_argument("--lines", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rag.KNOWLEDGE_DIR = os.path.join(tmp, "knowledge")
+        rag.CHROMA_DIR = os.path.join(tmp, "chroma_db")
+        os.makedirs(rag.KNOWLEDGE_DIR)
+
+        start = time.perf_counter()
+        make_corpus(rag.KNOWLEDGE_DIR, args.files, args.lines)
+        print(f"Корпус: {args.files} файлов × {args.lines} строк за {time.perf_counter() - start:.1f} с")
+
+        start = time.perf_counter()
+        rag.get_model()
+        print(f"Загрузка модели: {time.perf_counter() - start:.1f} с")
+
+        full = rag.load_all_knowledge(workers=args.workers)
+
+        start = time.perf_counter()
+        rag.load_all_knowledge(workers=args.workers)
+        noop = time.perf_counter() - start
+
+        with open(os.path.join(rag.KNOWLEDGE_DIR, "Hotel00000.txt"), "a", encoding="utf-8") as f:
+            f.write("\nНовая услуга: прокат велосипедов, 300 рублей в час, выдача на ресепшене.")
+        start = time.perf_counter()
+        rag.load_all_knowledge(workers=args.workers)
+        one = time.perf_counter() - start
+
+        print()
+        print(f"Полная загрузка:      {full['added']} чанков, {full['seconds']:.1f} с, {full['chunks_per_sec']:.0f} чанков/с")
+        print(f"Повтор без изменений: {noop * 1000:.0f} мс")
+        print(f"Правка одного файла:  {one * 1000:.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
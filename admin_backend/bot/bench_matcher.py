@@ -0,0 +1,96 @@
+# admin_backend/bot/bench_matcher.py
+"""
+Микробенчмарк: старые линейные проверки handle_message против MessageMatcher.
+
+    python bench_matcher.py [количество_отелей]
+"""
+import random
+import sys
+import time
+
+from matcher import MessageMatcher
+
+BOOKING_TRIGGER_PHRASES = [
+    "забронируй", "хочу забронировать", "давай бронь", "отлично давай", "беру",
+    "забираю", "оформи", "хочу снять", "забронировать", "давай его", "забронь",
+    "забронировать номер", "хочу забронировать номер", "давай забронируем"
+]
+
+MESSAGES = [
+    "Во сколько завтрак?",
+    "Есть ли трансфер из аэропорта до отеля?",
+    "Покажи семейный номер",
+    "Расскажи про номер 4, там есть балкон?",
+    "3",
+    "Хочу забронировать номер на выходные",
+    "Какие услуги есть в спа и сколько стоит массаж после бассейна?",
+]
+
+
+def extract_room_query_loops(text):
+    text = text.lower().strip()
+    if "семейн" in text:
+        return "семейный"
+    for i in range(1, 7):
+        if f"номер {i}" in text or text == str(i):
+            return f"стандарт {i}"
+    if "стандарт" in text:
+        return "стандарт 1"
+    return None
+
+
+def match_loops(hotels, text):
+    """Точная копия прежних шагов 1–3 handle_message."""
+    hotel = None
+    for h in hotels:
+        if h["name"].lower() in text.lower():
+            hotel = h
+            break
+    room_key = extract_room_query_loops(text)
+    booking = any(phrase in text.lower() for phrase in BOOKING_TRIGGER_PHRASES)
+    return hotel, room_key, booking
+
+
+def make_hotels(n):
+    rnd = random.Random(42)
+    words = ["эко", "парк", "лес", "море", "гранд", "уют", "река", "сосна", "берег", "холм"]
+    return [
+        {"id": i, "name": f"{rnd.choice(words).title()}{rnd.choice(words)} {i}"}
+        for i in range(1, n + 1)
+    ]
+
+
+def bench(fn, messages, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for m in messages:
+            fn(m)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(messages)) * 1e6
+
+
+def main():
+    n_hotels = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    hotels = make_hotels(n_hotels)
+    messages = MESSAGES + [f"Интересует отель {hotels[-1]['name']}"]
+
+    start = time.perf_counter()
+    matcher = MessageMatcher(hotels, BOOKING_TRIGGER_PHRASES)
+    build_ms = (time.perf_counter() - start) * 1e3
+
+    # Сначала убеждаемся, что результаты совпадают
+    for m in messages:
+        found = matcher.match(m)
+        assert (found.hotel, found.room_key, found.booking) == match_loops(hotels, m), m
+
+    rounds = 200
+    loops_us = bench(lambda m: match_loops(hotels, m), messages, rounds)
+    ac_us = bench(matcher.match, messages, rounds)
+
+    print(f"отелей: {n_hotels}, сообщений: {len(messages)}, сборка автомата: {build_ms:.1f} мс")
+    print(f"линейные проверки: {loops_us:8.1f} мкс/сообщение")
+    print(f"Ахо–Корасик:       {ac_us:8.1f} мкс/сообщение  (x{loops_us / ac_us:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# admin_backend/bot/bench_retrieval.py
+"""
+Качество и задержка поиска по knowledge/EcoHouse.txt для разных режимов
+нарезки и поиска (вектор / BM25 / гибрид).
+
+    python bench_retrieval.py [--k 3]
+
+Попадание — ожидаемый фрагмент ответа есть в собранном контексте.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import chunking
+import rag
+from retrieval import fit_budget
+
+HOTEL = "EcoHouse"
+
+# (вопрос гостя, фрагмент текста, который должен оказаться в контексте)
+QUESTIONS = [
+    ("Во сколько заселение и выезд?", "с 14:00"),
+    ("Сколько стоит стандартный номер?", "7800"),
+    ("Сколько стоит семейный номер на пятерых?", "14500"),
+    ("Во сколько работает кафе?", "с 9 до 21"),
+    ("Можно ли принести свой алкоголь в кафе?", "пробковый сбор"),
+    ("Сколько стоит русская баня?", "3500"),
+    ("Нужна ли шапочка в бассейн?", "шапочки"),
+    ("Есть ли парковка?", "парковка"),
+    ("Сколько стоит соляная комната для тех, кто не живёт в отеле?", "300 руб. - взрослый"),
+    ("Когда караоке?", "КАРАОКЕ"),
+    ("Есть ли детская комната?", "игровая комната"),
+    ("Какие зимние скидки?", "Зимние скидки"),
+]
+
+
+def run(mode: str, k: int) -> dict:
+    """mode: vector | bm25 | hybrid"""
+    hits = 0
+    latencies = []
+    for question, expected in QUESTIONS:
+        start = time.perf_counter()
+        if mode == "bm25":
+            found = rag._get_bm25(HOTEL).search(question, k)
+            context = "\n".join(fit_budget([doc for _, doc, _ in found], k, rag.CONTEXT_MAX_TOKENS))
+        else:
+            rag.HYBRID = mode == "hybrid"
+            context = rag.knowledge_query(question, filter={"hotel": HOTEL}, k=k)
+        latencies.append(time.perf_counter() - start)
+        hits += expected.lower() in context.lower()
+    latencies.sort()
+    return {
+        "hit_rate": hits / len(QUESTIONS),
+        "avg_ms": sum(latencies) / len(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--k", type=int, default=rag.TOP_K)
+    args = parser.parse_args()
+
+    source = os.path.join(rag.KNOWLEDGE_DIR, f"{HOTEL}.txt")
+    print(f"{'нарезка':<10} {'чанков':>6}  {'поиск':<7} {'hit@k':>6} {'ср., мс':>8} {'p95, мс':>8}")
+    for chunk_mode in ("line", "sentence", "paragraph"):
+        with tempfile.TemporaryDirectory() as tmp:
+            rag.KNOWLEDGE_DIR = os.path.join(tmp, "knowledge")
+            rag.CHROMA_DIR = os.path.join(tmp, "chroma_db")
+            rag._collection = None
+            os.makedirs(rag.KNOWLEDGE_DIR)
+            shutil.copy(source, rag.KNOWLEDGE_DIR)
+
+            chunking.CHUNK_MODE = chunk_mode
+            stats = rag.load_all_knowledge()
+            rag.knowledge_query("прогрев", filter={"hotel": HOTEL})
+
+            for mode in ("vector", "bm25", "hybrid"):
+                r = run(mode, args.k)
+                print(
+                    f"{chunk_mode:<10} {stats['added']:>6}  {mode:<7} "
+                    f"{r['hit_rate']:>6.0%} {r['avg_ms']:>8.1f} {r['p95_ms']:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# admin_backend/bot/booking_form.py
+"""
+Проверка полей брони на стороне бота: каждый шаг диалога проверяется
+локально, к API бот обращается только при подтверждении.
+"""
+import re
+from datetime import date, datetime
+
+DATE_FORMAT = "%d.%m.%Y"
+# Дальше вперёд и дольше не бронируем через бота
+MAX_DAYS_AHEAD = 365
+MAX_NIGHTS = 30
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def parse_date(text: str) -> date | None:
+    """ДД.ММ.ГГГГ (разделители . / -) -> date; None, если не разобрать."""
+    raw = re.sub(r"[/-]", ".", text.strip())
+    try:
+        return datetime.strptime(raw, DATE_FORMAT).date()
+    except ValueError:
+        return None
+
+
+def check_date_from(value: date, today: date) -> str | None:
+    """Текст ошибки или None."""
+    if value < today:
+        return "Дата заезда уже прошла."
+    if (value - today).days > MAX_DAYS_AHEAD:
+        return f"Бронируем не дальше чем на {MAX_DAYS_AHEAD} дней вперёд."
+    return None
+
+
+def check_date_to(value: date, date_from: date) -> str | None:
+    if value <= date_from:
+        return "Дата выезда должна быть позже даты заезда."
+    if (value - date_from).days > MAX_NIGHTS:
+        return f"Через бота можно забронировать не больше {MAX_NIGHTS} ночей."
+    return None
+
+
+def normalize_phone(text: str) -> str | None:
+    """+7 900 123-45-67, 8 (900) 1234567 -> +79001234567; None, если не похоже на телефон."""
+    raw = text.strip()
+    if not re.fullmatch(r"\+?[\d\s()\-]+", raw):
+        return None
+    digits = re.sub(r"\D", "", raw)
+    if len(digits) == 11 and digits[0] == "8" and not raw.startswith("+"):
+        digits = "7" + digits[1:]
+    if not 10 <= len(digits) <= 15:
+        return None
+    if len(digits) == 10:
+        digits = "7" + digits
+    return "+" + digits
+
+
+def normalize_email(text: str) -> str | None:
+    email = text.strip().lower()
+    if len(email) > 254 or not _EMAIL_RE.match(email):
+        return None
+    return email
+
+
+def normalize_name(text: str) -> str | None:
+    name = " ".join(text.split())
+    if not 2 <= len(name) <= 255 or not any(ch.isalpha() for ch in name):
+        return None
+    return name
@@ -1,5 +1,11 @@
 import os
+import asyncio
+import html
 import logging
+import time
+import uuid
+from datetime import date
+from decimal import Decimal
 from typing import Optional
 
 from aiogram import Bot, Dispatcher, F
@@ -13,13 +19,20 @@ from aiogram.types import (
     KeyboardButton,
 )
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
-from aiogram.fsm.storage.memory import MemoryStorage
 
 import httpx
 from dotenv import load_dotenv
 
+from fsm_storage import make_storage
+from pipeline import HandlerTiming, UpdatePipeline
+from throttling import AiThrottling
+from webhook import run_webhook
+
 # ===================================================
 # ЛОГИРОВАНИЕ И КОНФИГУРАЦИЯ
 # ===================================================
@@ -29,11 +42,68 @@ load_dotenv()
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 API_BASE_URL = os.getenv("API_BASE_URL", "http://127.0.0.1:8000/api")
 
-bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode="HTML"))
-dp = Dispatcher(storage=MemoryStorage())
-
-from gigachat_ai import ask_gigachat
-from rag import knowledge_query
+# Потоковые ответы AI: текст появляется по мере генерации
+STREAM_ANSWERS = os.getenv("STREAM_ANSWERS", "1").lower() in ("1", "true", "yes")
+# Не чаще одного edit_text в N секунд на сообщение (лимиты Telegram)
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.0"))
+TELEGRAM_TEXT_LIMIT = 4096
+STREAM_INTERRUPTED = "…\n\n⚠️ Ответ прервался. Спросите ещё раз."
+
+# Сколько ждать прогрева RAG, прежде чем отвечать без него, сек
+RAG_WARMUP_WAIT = float(os.getenv("RAG_WARMUP_WAIT", "60"))
+
+# polling — один процесс опрашивает Telegram; webhook — Telegram сам шлёт апдейты
+BOT_MODE = os.getenv("BOT_MODE", "polling").strip().lower()
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")  # публичный адрес, например https://bot.example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "64"))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "100"))
+WEBHOOK_MAX_QUEUED = int(os.getenv("WEBHOOK_MAX_QUEUED", "10000"))
+# POST /hotels/invalidate с заголовком X-Admin-Token сбрасывает кэш отелей
+BOT_ADMIN_TOKEN = os.getenv("BOT_ADMIN_TOKEN", "")
+# Свой сервер Bot API (локальный telegram-bot-api или fake_telegram.py)
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")
+
+session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)) if TELEGRAM_API_URL else None
+bot = Bot(token=BOT_TOKEN, session=session, default=DefaultBotProperties(parse_mode="HTML"))
+dp = Dispatcher(storage=make_storage())
+
+# Время каждого хендлера: p50/p95/p99 в /metrics webhook-сервера
+handler_timing = HandlerTiming()
+dp.message.middleware(handler_timing)
+dp.callback_query.middleware(handler_timing)
+
+# Вопросы к AI (хендлеры с flags={"ai": True}): ведро токенов на чат,
+# ожидание с «печатает…» и склейка одинаковых вопросов в работе
+ai_throttling = AiThrottling(
+    rate=float(os.getenv("AI_CHAT_RATE", "0.2")),
+    burst=int(os.getenv("AI_CHAT_BURST", "3")),
+    max_wait=float(os.getenv("AI_CHAT_MAX_WAIT", "30")),
+)
+dp.message.middleware(ai_throttling)
+
+import booking_form
+from api_client import ApiClient
+from catalogue import HotelCatalogue
+from gigachat_ai import UNAVAILABLE, UNAVAILABLE_RETRY, StreamInterrupted, ask_gigachat, gigachat, stream_gigachat
+from matcher import MessageMatcher
+from answer_cache import SemanticAnswerCache
+import rag
+from rag import aembed_query, aknowledge_query, knowledge_version
+
+# Один пул соединений к API на весь процесс (создаётся в main)
+api = ApiClient.from_env(API_BASE_URL)
+
+# Ответы на похожие вопросы к одному отелю берём из кэша, а не из GigaChat
+answer_cache = SemanticAnswerCache(
+    threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92")),
+    ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+    max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "1000")),
+    version_fn=knowledge_version,
+)
 
 
 # ===================================================
@@ -50,26 +120,99 @@ ROOM_TOURS = {
 }
 
 
-def extract_room_query(text: str) -> Optional[str]:
-    text = text.lower().strip()
-    if "семейн" in text:
-        return "семейный"
-    for i in range(1, 7):
-        if f"номер {i}" in text or text == str(i):
-            return f"стандарт {i}"
-    if "стандарт" in text:
-        return "стандарт 1"
-    return None
-
-
 # ===================================================
 # API HELPERS
 # ===================================================
 async def api_get(path: str, params=None):
-    async with httpx.AsyncClient() as client:
-        r = await client.get(f"{API_BASE_URL}{path}", params=params)
-        r.raise_for_status()
-        return r.json()
+    return await api.get(path, params=params)
+
+
+# Поля, которые бот реально показывает — остальное API не присылает
+HOTEL_FIELDS = "id,name,address,description"
+ROOM_FIELDS = "id,room_number,room_type,price_per_night"
+
+
+async def fetch_hotels():
+    return await api.get_all("/hotels/", params={"fields": HOTEL_FIELDS})
+
+
+async def fetch_rooms(hotel_id: int):
+    return await api.get_all("/rooms/", params={"hotel": hotel_id, "fields": ROOM_FIELDS})
+
+
+async def fetch_catalogue(hotel_id: int) -> Optional[dict]:
+    """Отель и его свободные номера одним запросом; None, если отеля нет."""
+    try:
+        return await api.get(f"/hotels/{hotel_id}/catalogue/", params={"fields": "id,name,rooms"})
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            return None
+        raise
+
+
+# Каталог отелей меняется редко — держим его в памяти
+hotels_cache = HotelCatalogue(
+    fetch_hotels,
+    ttl=float(os.getenv("HOTELS_CACHE_TTL", "300")),
+    stale_ttl=float(os.getenv("HOTELS_CACHE_STALE_TTL", "3600")),
+)
+
+
+# ===================================================
+# ПОТОКОВЫЕ ОТВЕТЫ
+# ===================================================
+async def _safe_edit(msg: Message, text: str):
+    try:
+        await msg.edit_text(text)
+    except TelegramRetryAfter as e:
+        # Пропускаем этот edit: накопленный текст уйдёт следующим
+        await asyncio.sleep(e.retry_after)
+    except TelegramBadRequest as e:
+        if "not modified" not in str(e):
+            logging.warning(f"Stream edit failed: {e}")
+
+
+async def answer_streaming(message: Message, chunks, reply_markup=None) -> Optional[str]:
+    """
+    Показывает потоковый ответ одним сообщением: отправляет его на первом
+    фрагменте и дальше редактирует не чаще STREAM_EDIT_INTERVAL,
+    объединяя всё, что пришло между правками.
+    Возвращает текст ответа или None, если поток оборвался на середине.
+    """
+    text = ""
+    shown = ""
+    sent = None
+    last_edit = 0.0
+    complete = True
+
+    try:
+        async for delta in chunks:
+            text += delta
+            if not text.strip():
+                continue
+            now = time.monotonic()
+            if sent is None:
+                shown = text[:TELEGRAM_TEXT_LIMIT]
+                sent = await message.answer(shown, reply_markup=reply_markup)
+                last_edit = now
+            elif now - last_edit >= STREAM_EDIT_INTERVAL and text[:TELEGRAM_TEXT_LIMIT] != shown:
+                shown = text[:TELEGRAM_TEXT_LIMIT]
+                await _safe_edit(sent, shown)
+                last_edit = time.monotonic()
+    except StreamInterrupted:
+        complete = False
+        text += STREAM_INTERRUPTED
+
+    if sent is None:
+        text = text.strip() or UNAVAILABLE
+        await message.answer(text[:TELEGRAM_TEXT_LIMIT], reply_markup=reply_markup)
+    elif text[:TELEGRAM_TEXT_LIMIT] != shown:
+        await _safe_edit(sent, text[:TELEGRAM_TEXT_LIMIT])
+
+    # Хвост длиннее лимита Telegram — отдельными сообщениями
+    for i in range(TELEGRAM_TEXT_LIMIT, len(text), TELEGRAM_TEXT_LIMIT):
+        await message.answer(text[i:i + TELEGRAM_TEXT_LIMIT])
+    return text if complete else None
 
 
 # ===================================================
@@ -99,6 +242,19 @@ BOOKING_TRIGGER_PHRASES = [
     "забронировать номер", "хочу забронировать номер", "давай забронируем"
 ]
 
+_matcher: Optional[MessageMatcher] = None
+_matcher_version = -1
+
+
+async def get_matcher() -> MessageMatcher:
+    """Автомат пересобирается только когда меняется каталог отелей."""
+    global _matcher, _matcher_version
+    hotels = await hotels_cache.get()
+    if _matcher is None or _matcher_version != hotels_cache.version:
+        _matcher = MessageMatcher(hotels, BOOKING_TRIGGER_PHRASES)
+        _matcher_version = hotels_cache.version
+    return _matcher
+
 
 # ===================================================
 # UI
@@ -127,7 +283,7 @@ async def cmd_start(message: Message, state: FSMContext):
 
 @dp.message(F.text == "🏢 Отели")
 async def list_hotels(message: Message, state: FSMContext):
-    hotels = await api_get("/hotels/")
+    hotels = await hotels_cache.get()
     if not hotels:
         await message.answer("У нас пока нет отелей.", reply_markup=bottom_menu())
         return
@@ -141,7 +297,7 @@ async def list_hotels(message: Message, state: FSMContext):
 
 @dp.message(F.text == "🎥 Туры 360°")
 async def reply_tours(message: Message, state: FSMContext):
-    hotels = await api_get("/hotels/")
+    hotels = await hotels_cache.get()
     if not hotels:
         await message.answer("Нет отелей.", reply_markup=bottom_menu())
         return
@@ -158,69 +314,82 @@ async def reply_tours(message: Message, state: FSMContext):
 # ===================================================
 # ОСНОВНОЙ ОБРАБОТЧИК
 # ===================================================
-@dp.message(AiStates.ai_mode)
+@dp.message(AiStates.ai_mode, flags={"ai": True})
 async def handle_message(message: Message, state: FSMContext):
     text = message.text.strip()
     data = await state.get_data()
     selected_hotel_name = data.get("selected_hotel_name")
 
+    # Отели, ключи номеров и триггеры брони — за один проход по тексту
+    matcher = await get_matcher()
+    found = matcher.match(text)
+
     # --- 1. Проверка: содержит ли текст название какого-то отеля? ---
-    hotels = await api_get("/hotels/")
-    for h in hotels:
-        if h["name"].lower() in text.lower():
-            await state.update_data(selected_hotel_id=h["id"], selected_hotel_name=h["name"])
-            await message.answer(
-                f"✅ Выбран отель: <b>{h['name']}</b>\n"
-                "Теперь вы можете спросить про номера, услуги или забронировать.",
-                reply_markup=bottom_menu()
-            )
-            return
+    h = found.hotel
+    if h:
+        await state.update_data(selected_hotel_id=h["id"], selected_hotel_name=h["name"])
+        await message.answer(
+            f"✅ Выбран отель: <b>{h['name']}</b>\n"
+            "Теперь вы можете спросить про номера, услуги или забронировать.",
+            reply_markup=bottom_menu()
+        )
+        return
 
     # --- 2. Запрос про конкретный номер ---
-    room_key = extract_room_query(text)
+    room_key = found.room_key
     if room_key:
         hotel_id = data.get("selected_hotel_id")
         if not hotel_id:
             await message.answer("Сначала выберите отель через кнопку «Отели».", reply_markup=bottom_menu())
             return
 
-        rooms = await api_get("/rooms/", params={"hotel": hotel_id})
-        found = None
-        for r in rooms:
-            rn = str(r["room_number"])
-            if room_key == "семейный" and "семейн" in r["room_type"].lower():
-                found = r
-                break
-            if room_key.endswith(rn):
-                found = r
-                break
-
-        if found:
+        rooms = await fetch_rooms(hotel_id)
+        room = next(
+            (
+                r for r in rooms
+                if (room_key == "семейный" and "семейн" in r["room_type"].lower())
+                or room_key.endswith(str(r["room_number"]))
+            ),
+            None,
+        )
+
+        if room:
             link = ROOM_TOURS.get(room_key)
             kb = InlineKeyboardMarkup(
                 inline_keyboard=[[InlineKeyboardButton(text="Открыть 360° тур", url=link)]]
             ) if link else None
 
             await message.answer(
-                f"<b>{found['room_type']}</b>\n"
-                f"Номер: {found['room_number']}\n"
-                f"Цена: {found['price_per_night']} ₽\n\n"
+                f"<b>{room['room_type']}</b>\n"
+                f"Номер: {room['room_number']}\n"
+                f"Цена: {room['price_per_night']} ₽\n\n"
                 f"Хочешь забронировать? Напиши «забронировать».",
                 reply_markup=kb or bottom_menu(),
             )
             return
 
     # --- 3. Явный переход к бронированию ---
-    if any(phrase in text.lower() for phrase in BOOKING_TRIGGER_PHRASES):
+    if found.booking:
         await start_booking(message, state)
         return
 
     # --- 4. Общий AI-ответ с контекстом отеля ---
-    try:
-        context = knowledge_query(text, filter={"hotel": selected_hotel_name}) if selected_hotel_name else ""
-    except Exception as e:
-        logging.error(f"RAG error: {e}")
-        context = ""
+    context = ""
+    query_emb = None
+    if selected_hotel_name:
+        if not rag.is_ready() and rag.is_warming_up():
+            # Модель ещё грузится в фоне — не блокируем event loop её загрузкой
+            await message.answer("⏳ Загружаю базу знаний, ответ будет через несколько секунд…")
+            await rag.wait_ready(RAG_WARMUP_WAIT)
+        try:
+            query_emb = await aembed_query(text)
+            cached = answer_cache.get(selected_hotel_name, query_emb)
+            if cached:
+                await message.answer(cached, reply_markup=bottom_menu())
+                return
+            context = await aknowledge_query(text, filter={"hotel": selected_hotel_name}, query_emb=query_emb)
+        except Exception as e:
+            logging.error(f"RAG error: {e}")
 
     system_prompt = (
     f"Ты — консьерж отеля «{selected_hotel_name}». "
@@ -236,15 +405,23 @@ async def handle_message(message: Message, state: FSMContext):
     "Не выдумывай отели или услуги."
      )
 
-    answer = ask_gigachat(f"{system_prompt}\n\nКонтекст:\n{context}\nВопрос:\n{text}")
-    await message.answer(answer, reply_markup=bottom_menu())
+    prompt = f"{system_prompt}\n\nКонтекст:\n{context}\nВопрос:\n{text}"
+    if STREAM_ANSWERS:
+        answer = await answer_streaming(message, stream_gigachat(prompt), reply_markup=bottom_menu())
+    else:
+        answer = await ask_gigachat(prompt)
+        await message.answer(answer, reply_markup=bottom_menu())
+
+    # answer is None — поток оборвался, неполный ответ не кэшируем
+    if query_emb is not None and answer and answer not in (UNAVAILABLE, UNAVAILABLE_RETRY):
+        answer_cache.put(selected_hotel_name, query_emb, answer)
 
 
 # ===================================================
 # БРОНИРОВАНИЕ
 # ===================================================
 async def start_booking(message_or_callback, state: FSMContext):
-    hotels = await api_get("/hotels/")
+    hotels = await hotels_cache.get()
     if not hotels:
         msg = message_or_callback if isinstance(message_or_callback, Message) else message_or_callback.message
         await msg.answer("Нет доступных отелей.", reply_markup=bottom_menu())
@@ -264,15 +441,18 @@ async def start_booking(message_or_callback, state: FSMContext):
 @dp.callback_query(F.data.startswith("hotel:"), BookingStates.choosing_hotel)
 async def choose_hotel(callback: CallbackQuery, state: FSMContext):
     hotel_id = int(callback.data.split(":")[1])
-    hotels = await api_get("/hotels/")
-    hotel = next((h for h in hotels if h["id"] == hotel_id), None)
+    hotel = await fetch_catalogue(hotel_id)
     if not hotel:
         await callback.answer("Отель не найден.", show_alert=True)
         return
 
-    await state.update_data(selected_hotel_id=hotel_id, selected_hotel_name=hotel["name"])
-    rooms = await api_get("/rooms/", params={"hotel": hotel_id})
-    available = [r for r in rooms if r.get("is_available", True)]
+    available = hotel["rooms"]
+    # Тип и цена номера понадобятся дальше — без повторного запроса к API
+    await state.update_data(
+        selected_hotel_id=hotel_id,
+        selected_hotel_name=hotel["name"],
+        hotel_rooms={str(r["id"]): [r["room_type"], r["price_per_night"]] for r in available},
+    )
 
     if not available:
         await callback.message.edit_text(
@@ -299,27 +479,199 @@ async def choose_hotel(callback: CallbackQuery, state: FSMContext):
 @dp.callback_query(F.data.startswith("room:"), BookingStates.choosing_room)
 async def choose_room(callback: CallbackQuery, state: FSMContext):
     room_id = int(callback.data.split(":")[1])
-    room = await api_get(f"/rooms/{room_id}/")
-    await state.update_data(selected_room_id=room_id, selected_room_type=room["room_type"])
+    data = await state.get_data()
+    room = data.get("hotel_rooms", {}).get(str(room_id))
+    if room is None:
+        room = await api_get(f"/rooms/{room_id}/", params={"fields": ROOM_FIELDS})
+        room = [room["room_type"], room["price_per_night"]]
+    await state.update_data(selected_room_id=room_id, selected_room_type=room[0], selected_room_price=room[1])
     await callback.message.edit_text("📅 Введите дату заезда (ДД.ММ.ГГГГ):")
     await state.set_state(BookingStates.entering_date_from)
 
 
-# Пример следующего шага (можно расширять)
+# Шаги ниже проверяют ввод локально; к API бот идёт только при подтверждении
 @dp.message(BookingStates.entering_date_from)
 async def enter_date_from(message: Message, state: FSMContext):
-    await state.update_data(date_from=message.text)
+    value = booking_form.parse_date(message.text or "")
+    error = booking_form.check_date_from(value, date.today()) if value else "Не понял дату. Формат: ДД.ММ.ГГГГ."
+    if error:
+        await message.answer(f"{error}\n📅 Введите дату заезда (ДД.ММ.ГГГГ):")
+        return
+    await state.update_data(date_from=value.isoformat())
     await message.answer("📅 Введите дату выезда (ДД.ММ.ГГГГ):")
     await state.set_state(BookingStates.entering_date_to)
 
 
+@dp.message(BookingStates.entering_date_to)
+async def enter_date_to(message: Message, state: FSMContext):
+    data = await state.get_data()
+    date_from = date.fromisoformat(data["date_from"])
+    value = booking_form.parse_date(message.text or "")
+    error = booking_form.check_date_to(value, date_from) if value else "Не понял дату. Формат: ДД.ММ.ГГГГ."
+    if error:
+        await message.answer(f"{error}\n📅 Введите дату выезда (ДД.ММ.ГГГГ):")
+        return
+    await state.update_data(date_to=value.isoformat())
+    await message.answer("👤 Как вас зовут? (имя и фамилия)")
+    await state.set_state(BookingStates.entering_guest_name)
+
+
+@dp.message(BookingStates.entering_guest_name)
+async def enter_guest_name(message: Message, state: FSMContext):
+    name = booking_form.normalize_name(message.text or "")
+    if not name:
+        await message.answer("Введите имя гостя текстом, например: Анна Смирнова.")
+        return
+    await state.update_data(guest_name=name)
+    await message.answer("📞 Телефон для связи (например, +7 900 123-45-67):")
+    await state.set_state(BookingStates.entering_phone)
+
+
+@dp.message(BookingStates.entering_phone)
+async def enter_phone(message: Message, state: FSMContext):
+    phone = booking_form.normalize_phone(message.text or "")
+    if not phone:
+        await message.answer("Не похоже на номер телефона. Пример: +7 900 123-45-67.")
+        return
+    await state.update_data(guest_phone=phone)
+    await message.answer("✉️ Email для подтверждения (или «-», чтобы пропустить):")
+    await state.set_state(BookingStates.entering_email)
+
+
+@dp.message(BookingStates.entering_email)
+async def enter_email(message: Message, state: FSMContext):
+    text = (message.text or "").strip()
+    email = None
+    if text not in ("-", "—"):
+        email = booking_form.normalize_email(text)
+        if not email:
+            await message.answer("Не похоже на email. Введите ещё раз или «-», чтобы пропустить.")
+            return
+
+    # Ключ идемпотентности — один на эту бронь: повторное нажатие
+    # «Подтвердить» или ретрай запроса не создадут вторую бронь
+    await state.update_data(guest_email=email, booking_key=uuid.uuid4().hex)
+    data = await state.get_data()
+    await message.answer(booking_summary(data), reply_markup=confirm_keyboard())
+    await state.set_state(BookingStates.confirming)
+
+
+def booking_summary(data: dict) -> str:
+    date_from, date_to = date.fromisoformat(data["date_from"]), date.fromisoformat(data["date_to"])
+    nights = (date_to - date_from).days
+    total = Decimal(str(data["selected_room_price"])) * nights
+    lines = [
+        "Проверьте бронь:\n",
+        f"🏨 {html.escape(data['selected_hotel_name'])}",
+        f"🛏 {html.escape(data['selected_room_type'])}",
+        f"📅 {date_from:%d.%m.%Y} — {date_to:%d.%m.%Y} ({nights} ноч.)",
+        f"👤 {html.escape(data['guest_name'])}",
+        f"📞 {data['guest_phone']}",
+    ]
+    if data.get("guest_email"):
+        lines.append(f"✉️ {html.escape(data['guest_email'])}")
+    lines.append(f"\n💳 Итого: {total} ₽")
+    return "\n".join(lines)
+
+
+def confirm_keyboard():
+    return InlineKeyboardMarkup(
+        inline_keyboard=[[
+            InlineKeyboardButton(text="✅ Подтвердить", callback_data="booking:confirm"),
+            InlineKeyboardButton(text="❌ Отменить", callback_data="booking:cancel"),
+        ]]
+    )
+
+
+BOOKING_FIELDS = (
+    "selected_room_id", "selected_room_type", "selected_room_price",
+    "date_from", "date_to", "guest_name", "guest_phone", "guest_email", "booking_key",
+)
+
+
+async def finish_booking(state: FSMContext):
+    # Выбранный отель остаётся — гость может дальше спрашивать консьержа
+    data = await state.get_data()
+    await state.set_data({k: v for k, v in data.items() if k not in BOOKING_FIELDS})
+    await state.set_state(AiStates.ai_mode)
+
+
+@dp.callback_query(F.data == "booking:cancel", BookingStates.confirming)
+async def cancel_booking(callback: CallbackQuery, state: FSMContext):
+    await finish_booking(state)
+    await callback.message.edit_text("Бронирование отменено.")
+    await callback.answer()
+
+
+@dp.callback_query(F.data == "booking:confirm", BookingStates.confirming)
+async def confirm_booking(callback: CallbackQuery, state: FSMContext):
+    await callback.answer()
+    data = await state.get_data()
+    room_id = data["selected_room_id"]
+
+    # Единственная проверка свободности за весь диалог — прямо перед записью.
+    # Мимо кэша ответов API: брони партнёров через api_backend его не сбрасывают
+    try:
+        free = await api.get_all("/rooms/", params={
+            "hotel": data["selected_hotel_id"],
+            "date_from": data["date_from"],
+            "date_to": data["date_to"],
+            "ids": room_id,
+            "fields": "id",
+        }, fresh=True)
+    except httpx.HTTPError as e:
+        logging.error(f"Availability check failed: {e!r}")
+        await callback.message.answer("Сервис бронирования недоступен, попробуйте «Подтвердить» ещё раз.")
+        return
+    if not free:
+        await callback.message.edit_text(
+            "😔 Этот номер уже занят на выбранные даты.\n📅 Введите другую дату заезда (ДД.ММ.ГГГГ):"
+        )
+        await state.set_state(BookingStates.entering_date_from)
+        return
+
+    payload = {
+        "hotel": data["selected_hotel_id"],
+        "room": room_id,
+        "guest_name": data["guest_name"],
+        "guest_phone": data["guest_phone"],
+        "guest_email": data.get("guest_email"),
+        "date_from": data["date_from"],
+        "date_to": data["date_to"],
+    }
+    try:
+        r = await api.post("/booking/", json=payload, idempotency_key=data["booking_key"])
+    except httpx.HTTPError as e:
+        logging.error(f"Booking request failed: {e!r}")
+        await callback.message.answer("Сервис бронирования недоступен, попробуйте «Подтвердить» ещё раз.")
+        return
+
+    if r.status_code == 409:
+        await callback.message.edit_text(
+            "😔 Номер только что заняли.\n📅 Введите другую дату заезда (ДД.ММ.ГГГГ):"
+        )
+        await state.set_state(BookingStates.entering_date_from)
+        return
+    if r.status_code not in (200, 201):
+        logging.error(f"Booking rejected: HTTP {r.status_code} {r.text[:300]}")
+        await callback.message.answer("Не получилось оформить бронь. Попробуйте позже или свяжитесь с отелем.")
+        return
+
+    booking = r.json()
+    await finish_booking(state)
+    await callback.message.edit_text(
+        f"✅ Бронь №{booking['id']} оформлена!\n"
+        f"Сумма: {booking['total_price']} ₽. Отель свяжется с вами для подтверждения."
+    )
+
+
 # ===================================================
 # 360° ТУРЫ
 # ===================================================
 @dp.callback_query(F.data.startswith("tourhotel:"))
 async def choose_tour_hotel(callback: CallbackQuery):
     hotel_id = int(callback.data.split(":")[1])
-    rooms = await api_get("/rooms/", params={"hotel": hotel_id})
+    rooms = await fetch_rooms(hotel_id)
     if not rooms:
         await callback.message.answer("Нет номеров с 360° туром.", reply_markup=bottom_menu())
         return
@@ -355,9 +707,41 @@ async def open_tour(callback: CallbackQuery):
 # ЗАПУСК
 # ===================================================
 async def main():
-    await dp.start_polling(bot)
+    api.start()
+    gigachat.start()
+    # Модель эмбеддингов грузится в фоне, бот начинает принимать апдейты сразу
+    warmup = asyncio.create_task(rag.awarm_up())
+    try:
+        if BOT_MODE == "webhook":
+            pipeline = UpdatePipeline(
+                dp, bot, workers=WEBHOOK_WORKERS, queue_size=WEBHOOK_QUEUE_SIZE, max_queued=WEBHOOK_MAX_QUEUED
+            )
+            await run_webhook(
+                bot, pipeline,
+                url=WEBHOOK_URL, path=WEBHOOK_PATH, host=WEBHOOK_HOST, port=WEBHOOK_PORT,
+                secret=WEBHOOK_SECRET,
+                metrics_fn=lambda: {
+                    "pipeline": pipeline.metrics(),
+                    "handlers": handler_timing.metrics(),
+                    "ai_throttling": ai_throttling.metrics(),
+                    "rag": rag.rag_metrics(),
+                    "hotels_cache": hotels_cache.stats(),
+                    "answer_cache": answer_cache.stats(),
+                },
+                invalidate_hotels_fn=hotels_cache.invalidate,
+                admin_token=BOT_ADMIN_TOKEN,
+            )
+        else:
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
+    finally:
+        warmup.cancel()
+        rag.shutdown()
+        await api.close()
+        await gigachat.close()
+        await dp.storage.close()
+        await bot.session.close()
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
\ No newline at end of file
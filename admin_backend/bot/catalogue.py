@@ -0,0 +1,102 @@
+# admin_backend/bot/catalogue.py
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class HotelCatalogue:
+    """
+    Кэш списка отелей в памяти процесса бота.
+
+    - свежие данные (моложе ttl) отдаются без запроса к API;
+    - устаревшие, но моложе ttl + stale_ttl, отдаются сразу, а обновление
+      запускается в фоне (stale-while-revalidate);
+    - при промахе все конкурентные запросы ждут один и тот же fetch (single-flight).
+    """
+
+    def __init__(self, fetch, ttl: float = 300.0, stale_ttl: float = 3600.0):
+        self._fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+        self._hotels: list[dict] | None = None
+        self._fetched_at = 0.0
+        self._refresh_task: asyncio.Task | None = None
+        # Растёт при invalidate(): fetch, начатый до сброса, в кэш не попадёт
+        self._generation = 0
+
+        # Растёт при каждом изменении содержимого каталога
+        self.version = 0
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    async def get(self) -> list[dict]:
+        if self._hotels is not None:
+            age = time.monotonic() - self._fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                return self._hotels
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._start_refresh()
+                return self._hotels
+
+        self.misses += 1
+        # shield: отмена одного ожидающего апдейта не должна отменять общий fetch
+        return await asyncio.shield(self._start_refresh())
+
+    async def find(self, hotel_id: int) -> dict | None:
+        hotels = await self.get()
+        return next((h for h in hotels if h["id"] == hotel_id), None)
+
+    def invalidate(self):
+        """Сбросить кэш: следующий get() сходит в API."""
+        self._hotels = None
+        self._fetched_at = 0.0
+        self._refresh_task = None
+        self._generation += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            "version": self.version,
+        }
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+            self._refresh_task.add_done_callback(self._on_refresh_done)
+        return self._refresh_task
+
+    async def _refresh(self) -> list[dict]:
+        generation = self._generation
+        hotels = await self._fetch()
+        self.refreshes += 1
+        if generation != self._generation:
+            return hotels
+        if hotels != self._hotels:
+            self.version += 1
+        self._hotels = hotels
+        self._fetched_at = time.monotonic()
+        return hotels
+
+    def _on_refresh_done(self, task: asyncio.Task):
+        if task.cancelled():
+            return
+        e = task.exception()
+        if e is not None:
+            # Для фонового обновления это единственное место, где ошибку видно
+            self.errors += 1
+            logger.error(f"Hotel catalogue refresh failed: {e!r}")
@@ -0,0 +1,126 @@
+# admin_backend/bot/chunking.py
+import os
+import re
+
+# line — как раньше, одна строка = один чанк;
+# sentence — окна из предложений, могут пересекать абзацы;
+# paragraph — окна из предложений внутри одного абзаца
+CHUNK_MODE = os.getenv("RAG_CHUNK_MODE", "sentence")
+# all-MiniLM-L6-v2 молча обрезает вход длиннее 256 wordpiece-токенов, считая [CLS] и [SEP]
+MODEL_MAX_TOKENS = 256
+# Бюджет чанка в wordpiece-токенах модели эмбеддингов (см. count_wordpieces)
+CHUNK_MAX_TOKENS = min(int(os.getenv("RAG_CHUNK_TOKENS", "200")), MODEL_MAX_TOKENS - 2)
+# Сколько последних предложений окна повторяется в начале следующего
+CHUNK_OVERLAP = int(os.getenv("RAG_CHUNK_OVERLAP", "1"))
+MIN_LENGTH = 30
+
+# Без токенизатора модели: её словарь (bert-base-uncased) режет русское слово
+# в среднем на 3–4 wordpiece, английское — на 1–2; оцениваем с запасом
+WORDPIECES_PER_WORD = 4
+WORDPIECES_PER_ASCII_WORD = 2
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_RE = re.compile(r"(?<=[.!?…;])\s+")
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+
+_tokenizer = None
+
+
+def count_tokens(text: str) -> int:
+    """Грубая оценка числа токенов: слова и знаки препинания."""
+    return len(_TOKEN_RE.findall(text))
+
+
+def set_tokenizer(tokenizer):
+    """Считать бюджет чанков токенизатором модели (SentenceTransformer.tokenizer); None — оценкой."""
+    global _tokenizer
+    _tokenizer = tokenizer
+
+
+def count_wordpieces(text: str) -> int:
+    """Сколько wordpiece-токенов модели эмбеддингов займёт текст (без [CLS]/[SEP])."""
+    if _tokenizer is not None:
+        return len(_tokenizer.tokenize(text))
+    return sum(
+        1 if not t[0].isalnum() else WORDPIECES_PER_ASCII_WORD if t.isascii() else WORDPIECES_PER_WORD
+        for t in _TOKEN_RE.findall(text)
+    )
+
+
+def config_signature() -> str:
+    """Меняется вместе с настройками нарезки: по ней загрузка понимает, что чанки надо пересобрать."""
+    return f"{CHUNK_MODE}:{CHUNK_MAX_TOKENS}:{CHUNK_OVERLAP}:{MIN_LENGTH}"
+
+
+def _sentences(paragraph: str) -> list[str]:
+    result = []
+    for line in paragraph.split("\n"):
+        result += [s.strip() for s in _SENTENCE_RE.split(line) if s.strip()]
+    return result
+
+
+def _sized(units: list[str], max_tokens: int):
+    """(предложение, токенов); длиннее бюджета режем по словам, иначе модель обрежет хвост."""
+    for unit in units:
+        n = count_wordpieces(unit)
+        if n <= max_tokens:
+            yield unit, n
+            continue
+        words: list[str] = []
+        tokens = 0
+        for word in unit.split():
+            k = count_wordpieces(word)
+            if words and tokens + k > max_tokens:
+                yield " ".join(words), tokens
+                words, tokens = [], 0
+            words.append(word)
+            tokens += k
+        if words:
+            yield " ".join(words), tokens
+
+
+def _windows(units: list[str], max_tokens: int, overlap: int) -> list[str]:
+    chunks = []
+    window: list[tuple[str, int]] = []
+    tokens = 0
+    for unit, n in _sized(units, max_tokens):
+        if window and tokens + n > max_tokens:
+            chunks.append(" ".join(u for u, _ in window))
+            window = window[-overlap:] if overlap else []
+            tokens = sum(k for _, k in window)
+            # Перекрытие не должно само по себе переполнять окно
+            while window and tokens + n > max_tokens:
+                tokens -= window.pop(0)[1]
+        window.append((unit, n))
+        tokens += n
+    if window:
+        chunks.append(" ".join(u for u, _ in window))
+    return chunks
+
+
+def split_into_chunks(
+    text: str,
+    mode: str = None,
+    max_tokens: int = None,
+    overlap: int = None,
+    min_length: int = MIN_LENGTH,
+) -> list[str]:
+    mode = mode or CHUNK_MODE
+    max_tokens = max_tokens or CHUNK_MAX_TOKENS
+    overlap = CHUNK_OVERLAP if overlap is None else overlap
+
+    if mode == "line":
+        return [line.strip() for line in text.split("\n") if len(line.strip()) >= min_length]
+
+    paragraphs = [p for p in _PARAGRAPH_RE.split(text) if p.strip()]
+    if mode == "paragraph":
+        chunks = []
+        for p in paragraphs:
+            chunks += _windows(_sentences(p), max_tokens, overlap)
+    elif mode == "sentence":
+        chunks = _windows([s for p in paragraphs for s in _sentences(p)], max_tokens, overlap)
+    else:
+        raise ValueError(f"Unknown chunk mode: {mode}")
+
+    return [c for c in chunks if len(c) >= min_length]
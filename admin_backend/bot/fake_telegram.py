@@ -0,0 +1,175 @@
+# admin_backend/bot/fake_telegram.py
+"""
+Нагрузочная проверка webhook-режима без Telegram.
+
+Заглушка Bot API (принимает sendMessage и прочие вызовы бота):
+    python fake_telegram.py serve --port 8081 --delay 0.05
+
+Бот против заглушки:
+    BOT_MODE=webhook TELEGRAM_API_URL=http://127.0.0.1:8081 WEBHOOK_PORT=8080 python bot.py
+
+Генератор апдейтов: чаты шлют /start, кнопки меню и вопросы к AI,
+в конце печатаются принятые/отклонённые (503) апдейты, задержки и /metrics бота.
+    python fake_telegram.py load --webhook http://127.0.0.1:8080/webhook --chats 200 --updates 5000
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import Counter
+
+import httpx
+from aiohttp import web
+
+TEXTS = [
+    "🏢 Отели",
+    "🎥 Туры 360°",
+    "Во сколько завтрак?",
+    "Есть ли трансфер из аэропорта?",
+    "Покажи семейный номер",
+    "Хочу забронировать номер",
+]
+
+
+# ---------- заглушка Bot API ----------
+
+class StubState:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls: Counter = Counter()
+        self.message_ids = itertools.count(1)
+
+
+async def bot_method(request: web.Request):
+    state: StubState = request.app["state"]
+    method = request.match_info["method"]
+    params = dict(await request.post())
+    state.calls[method] += 1
+    await asyncio.sleep(state.delay)
+
+    if method == "getMe":
+        result = {"id": 1, "is_bot": True, "first_name": "SmartHotel", "username": "smarthotel_bot"}
+    elif method in ("sendMessage", "editMessageText", "sendPhoto"):
+        result = {
+            "message_id": next(state.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": int(params.get("chat_id", 0)), "type": "private"},
+            "text": params.get("text", ""),
+        }
+    else:
+        result = True
+    return web.json_response({"ok": True, "result": result})
+
+
+async def stats(request: web.Request):
+    return web.json_response(dict(request.app["state"].calls))
+
+
+def make_app(delay: float = 0.0) -> web.Application:
+    app = web.Application()
+    app["state"] = StubState(delay)
+    app.router.add_post("/bot{token}/{method}", bot_method)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+# ---------- генератор апдейтов ----------
+
+def make_update(update_id: int, chat_id: int, text: str) -> dict:
+    user = {"id": chat_id, "is_bot": False, "first_name": f"Гость {chat_id}"}
+    message = {
+        "message_id": update_id,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "private"},
+        "from": user,
+        "text": text,
+    }
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text)}]
+    return {"update_id": update_id, "message": message}
+
+
+def make_updates(chats: int, total: int, seed: int = 42) -> list[dict]:
+    rnd = random.Random(seed)
+    ids = itertools.count(1)
+    updates = [make_update(next(ids), 10_000 + c, "/start") for c in range(chats)]
+    while len(updates) < total:
+        updates.append(make_update(next(ids), 10_000 + rnd.randrange(chats), rnd.choice(TEXTS)))
+    return updates
+
+
+async def run_load(webhook: str, updates: list[dict], concurrency: int, secret: str = "") -> dict:
+    queue = list(reversed(updates))
+    statuses: Counter = Counter()
+    latencies = []
+    headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret else {}
+
+    async def worker(client):
+        while queue:
+            update = queue.pop()
+            start = time.perf_counter()
+            try:
+                r = await client.post(webhook, json=update, headers=headers)
+                statuses[r.status_code] += 1
+            except httpx.HTTPError:
+                statuses["error"] += 1
+            latencies.append(time.perf_counter() - start)
+
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=concurrency), timeout=30) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {"rps": len(latencies) / elapsed, "p50": pct(0.50), "p99": pct(0.99), "statuses": dict(statuses)}
+
+
+async def load(args):
+    updates = make_updates(args.chats, args.updates, args.seed)
+    result = await run_load(args.webhook, updates, args.concurrency, args.secret)
+    print(
+        f"{len(updates)} апдейтов от {args.chats} чатов, {args.concurrency} параллельно: "
+        f"{result['rps']:.0f} апд/с, p50 {result['p50']:.1f} мс, p99 {result['p99']:.1f} мс, "
+        f"ответы {result['statuses']}"
+    )
+
+    metrics_url = args.webhook.rsplit("/", 1)[0] + "/metrics"
+    async with httpx.AsyncClient(timeout=10) as client:
+        # Ждём, пока бот разберёт очередь, и печатаем его метрики
+        for _ in range(int(args.drain_timeout * 10)):
+            metrics = (await client.get(metrics_url)).json()
+            pipeline = metrics.get("pipeline", metrics)
+            if pipeline["queued"] == 0 and pipeline["in_flight"] == 0:
+                break
+            await asyncio.sleep(0.1)
+    print(json.dumps(metrics, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="заглушка Bot API")
+    serve.add_argument("--port", type=int, default=8081)
+    serve.add_argument("--delay", type=float, default=0.0, help="задержка ответа Bot API, сек")
+
+    gen = sub.add_parser("load", help="послать апдейты в webhook бота")
+    gen.add_argument("--webhook", default="http://127.0.0.1:8080/webhook")
+    gen.add_argument("--secret", default="")
+    gen.add_argument("--chats", type=int, default=200)
+    gen.add_argument("--updates", type=int, default=5000)
+    gen.add_argument("--concurrency", type=int, default=100)
+    gen.add_argument("--seed", type=int, default=42)
+    gen.add_argument("--drain-timeout", type=float, default=60)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        web.run_app(make_app(args.delay), host="127.0.0.1", port=args.port)
+    else:
+        asyncio.run(load(args))
@@ -0,0 +1,274 @@
+# admin_backend/bot/fsm_storage.py
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Mapping
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+logger = logging.getLogger(__name__)
+
+
+def _dumps(data: Mapping[str, Any]) -> str:
+    # Компактно: без пробелов и без \uXXXX для кириллицы
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _state_name(state: StateType) -> str | None:
+    return state.state if isinstance(state, State) else state
+
+
+def _key(key: StorageKey) -> str:
+    return (
+        f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id or ''}:"
+        f"{key.business_connection_id or ''}:{key.destiny}"
+    )
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    FSM-хранилище в файле SQLite: переживает перезапуск и общее для нескольких
+    воркеров бота на одной машине (WAL, ожидание блокировки вместо ошибки).
+
+    Смена состояния пишется сразу, вместе со всем, что ещё не записано:
+    другой воркер не увидит новый шаг со старыми данными, а падение процесса
+    не откатит разговор назад. Одновременные записи разных чатов уходят
+    одной транзакцией (пока идёт запись, следующие копятся в очереди).
+    flush_interval > 0 — изменения только данных откладываются на столько
+    секунд (или до max_pending): меньше транзакций, но другие воркеры видят
+    их с задержкой, а при падении они теряются. Для нескольких воркеров — 0.
+    Разговор, который не менялся ttl секунд, считается брошенным и удаляется.
+    """
+
+    def __init__(
+        self,
+        path: str = "fsm.sqlite3",
+        *,
+        ttl: float = 7 * 24 * 3600,
+        flush_interval: float = 0.0,
+        max_pending: int = 500,
+        cleanup_interval: float = 600,
+        busy_timeout: float = 10.0,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.cleanup_interval = cleanup_interval
+        self.busy_timeout = busy_timeout
+
+        # Все обращения к sqlite3 — в одном выделенном потоке
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fsm")
+        self._conn: sqlite3.Connection | None = None
+
+        # ключ -> {"state": ..., "data": ...}: только изменённые части записи
+        self._pending: dict[str, dict[str, Any]] = {}
+        # Пачка, которая прямо сейчас пишется в базу: читается до коммита
+        self._flushing: dict[str, dict[str, Any]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+        self._last_cleanup = time.monotonic()
+
+        self.writes = 0
+        self.flushes = 0
+        self.rows_flushed = 0
+
+    # ---------- поток базы ----------
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS fsm ("
+                " key TEXT PRIMARY KEY, state TEXT, data TEXT NOT NULL DEFAULT '{}', expires REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS fsm_expires_idx ON fsm (expires)")
+        return self._conn
+
+    def _read(self, key: str) -> tuple[str | None, str | None]:
+        row = self._connect().execute(
+            "SELECT state, data FROM fsm WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row if row else (None, None)
+
+    def _write(self, batch: dict[str, dict[str, Any]], cleanup: bool):
+        now = time.time()
+        expires = now + self.ttl
+        both, states, datas = [], [], []
+        for key, change in batch.items():
+            if "state" in change and "data" in change:
+                both.append((key, change["state"], _dumps(change["data"]), expires))
+            elif "state" in change:
+                states.append((key, change["state"], expires, now))
+            else:
+                datas.append((key, _dumps(change["data"]), expires, now))
+
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO fsm (key, state, data, expires) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET state = excluded.state, data = excluded.data, "
+                "expires = excluded.expires",
+                both,
+            )
+            # Частичное обновление: у просроченной записи вторая половина сбрасывается
+            conn.executemany(
+                "INSERT INTO fsm (key, state, expires) VALUES (?1, ?2, ?3) "
+                "ON CONFLICT (key) DO UPDATE SET state = excluded.state, expires = excluded.expires, "
+                "data = CASE WHEN fsm.expires > ?4 THEN fsm.data ELSE '{}' END",
+                states,
+            )
+            conn.executemany(
+                "INSERT INTO fsm (key, data, expires) VALUES (?1, ?2, ?3) "
+                "ON CONFLICT (key) DO UPDATE SET data = excluded.data, expires = excluded.expires, "
+                "state = CASE WHEN fsm.expires > ?4 THEN fsm.state ELSE NULL END",
+                datas,
+            )
+            # Пустые записи (разговор завершён через state.clear()) не храним
+            conn.executemany(
+                "DELETE FROM fsm WHERE key = ? AND state IS NULL AND data = '{}'",
+                [(key,) for key in batch],
+            )
+            if cleanup:
+                conn.execute("DELETE FROM fsm WHERE expires <= ?", (now,))
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # ---------- буфер записи ----------
+
+    def _buffer(self, key: str, field: str, value: Any):
+        self._pending.setdefault(key, {})[field] = value
+        self.writes += 1
+
+    async def _after_write(self, now: bool = False):
+        if now or self.flush_interval <= 0 or len(self._pending) >= self.max_pending:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Не удалось записать состояние FSM, повторим при следующей записи")
+
+    async def flush(self):
+        """Записать накопленные изменения одной транзакцией."""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            self._flushing, self._pending = self._pending, {}
+            cleanup = time.monotonic() - self._last_cleanup >= self.cleanup_interval
+            try:
+                await self._run(self._write, self._flushing, cleanup)
+            except Exception:
+                # Не теряем изменения: более свежие из _pending важнее
+                for key, change in self._flushing.items():
+                    self._pending[key] = {**change, **self._pending.get(key, {})}
+                raise
+            finally:
+                batch, self._flushing = self._flushing, {}
+            if cleanup:
+                self._last_cleanup = time.monotonic()
+            self.flushes += 1
+            self.rows_flushed += len(batch)
+
+    def _buffered(self, key: str, field: str):
+        for source in (self._pending, self._flushing):
+            change = source.get(key)
+            if change is not None and field in change:
+                return True, change[field]
+        return False, None
+
+    # ---------- BaseStorage ----------
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        self._buffer(_key(key), "state", _state_name(state))
+        await self._after_write(now=True)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        found, state = self._buffered(_key(key), "state")
+        if found:
+            return state
+        state, _ = await self._run(self._read, _key(key))
+        return state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        self._buffer(_key(key), "data", dict(data))
+        await self._after_write()
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        found, data = self._buffered(_key(key), "data")
+        if found:
+            return dict(data)
+        _, raw = await self._run(self._read, _key(key))
+        return json.loads(raw) if raw else {}
+
+    async def close(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        try:
+            await self.flush()
+        finally:
+            await self._run(self._close)
+            self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "writes": self.writes,
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+        }
+
+
+def make_storage() -> BaseStorage:
+    """
+    FSM-хранилище по FSM_STORAGE:
+    sqlite (по умолчанию) — файл FSM_SQLITE_PATH, общий для воркеров одной машины;
+    redis — REDIS_URL, общий для воркеров на разных машинах (нужен пакет redis);
+    memory — в памяти процесса, как раньше.
+    """
+    kind = os.getenv("FSM_STORAGE", "sqlite").strip().lower()
+    ttl = float(os.getenv("FSM_TTL", str(7 * 24 * 3600)))
+
+    if kind == "memory":
+        return MemoryStorage()
+
+    if kind == "redis":
+        try:
+            from aiogram.fsm.storage.redis import RedisStorage
+        except ImportError as e:
+            raise RuntimeError("FSM_STORAGE=redis требует пакет redis: pip install redis") from e
+        return RedisStorage.from_url(
+            os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0"),
+            state_ttl=int(ttl),
+            data_ttl=int(ttl),
+            json_dumps=_dumps,
+        )
+
+    if kind == "sqlite":
+        return SQLiteStorage(
+            os.getenv("FSM_SQLITE_PATH", "fsm.sqlite3"),
+            ttl=ttl,
+            flush_interval=float(os.getenv("FSM_FLUSH_INTERVAL", "0")),
+            max_pending=int(os.getenv("FSM_MAX_PENDING", "500")),
+        )
+
+    raise ValueError(f"Неизвестное FSM_STORAGE: {kind}")
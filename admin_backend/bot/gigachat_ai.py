@@ -1,76 +1,255 @@
+import asyncio
+import json
+import logging
 import os
+import time
 import uuid
-import requests
+
+import httpx
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 AUTH_KEY = os.getenv("GIGACHAT_AUTH_KEY")
 AUTH_URL = os.getenv("GIGACHAT_AUTH")
 API_URL  = os.getenv("GIGACHAT_API")
 
-
-def get_token():
-    """Получить Access Token через Authorization Key из .env"""
-
-    headers = {
-        "Content-Type": "application/x-www-form-urlencoded",
-        "Accept": "application/json",
-        "RqUID": str(uuid.uuid4()),
-        "Authorization": f"Basic {AUTH_KEY}",
-    }
-
-    # Важно: тело — строка, НЕ словарь
-    data = "scope=GIGACHAT_API_PERS&grant_type=client_credentials"
-
-    print("--- TOKEN DEBUG ---")
-    print("Sending request to:", AUTH_URL)
-
-    try:
-        resp = requests.post(AUTH_URL, headers=headers, data=data, verify=False)
-    except Exception as e:
-        print("ERROR:", e)
-        return None
-
-    print("STATUS:", resp.status_code)
-    print("RESPONSE:", resp.text)
-    print("-------------------")
-
-    if resp.status_code != 200:
-        return None
-
-    try:
-        token = resp.json().get("access_token")
-    except:
-        return None
-
-    return token
-
-
-def ask_gigachat(prompt: str):
+UNAVAILABLE = "AI временно недоступен."
+UNAVAILABLE_RETRY = "AI временно недоступен. Попробуйте позже."
+
+
+class StreamInterrupted(Exception):
+    """Поток оборвался после первых фрагментов: ответ неполный."""
+
+
+class GigaChatClient:
+    """
+    Асинхронный клиент GigaChat: один пул соединений, кэш Access Token
+    с обновлением заранее до истечения и ограничение числа параллельных запросов.
+    """
+
+    # Токен живёт ~30 минут; если сервер не сообщил срок — считаем так
+    DEFAULT_TOKEN_TTL = 30 * 60
+
+    def __init__(
+        self,
+        auth_key: str,
+        auth_url: str,
+        api_url: str,
+        *,
+        model: str = "GigaChat-Pro",
+        scope: str = "GIGACHAT_API_PERS",
+        verify: bool = False,
+        timeout: float = 60.0,
+        connect_timeout: float = 5.0,
+        max_concurrency: int = 8,
+        refresh_margin: float = 60.0,
+    ):
+        self.auth_key = auth_key
+        self.auth_url = auth_url
+        self.api_url = api_url
+        self.model = model
+        self.scope = scope
+        self.verify = verify
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.refresh_margin = refresh_margin
+
+        self._client: httpx.AsyncClient | None = None
+        self._token: str | None = None
+        self._token_expires_at = 0.0
+        self._token_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @classmethod
+    def from_env(cls) -> "GigaChatClient":
+        return cls(
+            AUTH_KEY,
+            AUTH_URL,
+            API_URL,
+            model=os.getenv("GIGACHAT_MODEL", "GigaChat-Pro"),
+            scope=os.getenv("GIGACHAT_SCOPE", "GIGACHAT_API_PERS"),
+            verify=os.getenv("GIGACHAT_VERIFY_SSL", "0").lower() in ("1", "true", "yes"),
+            timeout=float(os.getenv("GIGACHAT_TIMEOUT", "60")),
+            connect_timeout=float(os.getenv("GIGACHAT_CONNECT_TIMEOUT", "5")),
+            max_concurrency=int(os.getenv("GIGACHAT_MAX_CONCURRENCY", "8")),
+            refresh_margin=float(os.getenv("GIGACHAT_TOKEN_REFRESH_MARGIN", "60")),
+        )
+
+    def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(verify=self.verify, timeout=self.timeout)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _token_valid(self) -> bool:
+        return self._token is not None and time.time() < self._token_expires_at - self.refresh_margin
+
+    async def get_token(self, stale: str | None = None) -> str | None:
+        """
+        Access Token из кэша или через Authorization Key.
+        stale — токен, который сервер отверг: его нужно заменить, даже если срок не вышел.
+        """
+        if self._token_valid() and self._token != stale:
+            return self._token
+
+        # Single-flight: пока один запрос обновляет токен, остальные ждут его
+        async with self._token_lock:
+            if self._token_valid() and self._token != stale:
+                return self._token
+            await self._fetch_token()
+            return self._token
+
+    async def _fetch_token(self):
+        self.start()
+        headers = {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Accept": "application/json",
+            "RqUID": str(uuid.uuid4()),
+            "Authorization": f"Basic {self.auth_key}",
+        }
+        # Важно: тело — строка, НЕ словарь
+        data = f"scope={self.scope}&grant_type=client_credentials"
+
+        try:
+            resp = await self._client.post(self.auth_url, headers=headers, content=data)
+        except httpx.HTTPError as e:
+            logger.error(f"GigaChat auth error: {e!r}")
+            return
+
+        if resp.status_code != 200:
+            logger.error(f"GigaChat auth failed: HTTP {resp.status_code}")
+            return
+
+        try:
+            body = resp.json()
+            token = body["access_token"]
+        except (ValueError, KeyError):
+            logger.error("GigaChat auth: unexpected response")
+            return
+
+        # expires_at приходит в миллисекундах от эпохи
+        expires_at = body.get("expires_at")
+        self._token = token
+        self._token_expires_at = expires_at / 1000 if expires_at else time.time() + self.DEFAULT_TOKEN_TTL
+
+    def _payload(self, prompt: str) -> dict:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.3
+        }
+
+    async def ask(self, prompt: str) -> str:
+        """Запрос в GigaChat API"""
+        token = await self.get_token()
+        if not token:
+            return UNAVAILABLE_RETRY
+
+        try:
+            async with self._semaphore:
+                resp = await self._post_chat(token, prompt)
+                if resp.status_code == 401:
+                    # Токен отозван раньше срока — обновляем один раз
+                    token = await self.get_token(stale=token)
+                    if not token:
+                        return UNAVAILABLE
+                    resp = await self._post_chat(token, prompt)
+        except httpx.HTTPError as e:
+            logger.error(f"GigaChat request error: {e!r}")
+            return UNAVAILABLE
+
+        try:
+            return resp.json()["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError):
+            logger.error(f"GigaChat: unexpected response, HTTP {resp.status_code}")
+            return UNAVAILABLE
+
+    async def stream(self, prompt: str):
+        """
+        Потоковый ответ GigaChat (SSE): отдаёт фрагменты текста по мере генерации.
+        При ошибке до первого фрагмента отдаёт сообщение о недоступности,
+        после — бросает StreamInterrupted (в том числе если не пришёл [DONE]).
+        """
+        token = await self.get_token()
+        if not token:
+            yield UNAVAILABLE_RETRY
+            return
+
+        payload = self._payload(prompt)
+        payload["stream"] = True
+        started = False
+
+        async with self._semaphore:
+            for attempt in range(2):
+                headers = {
+                    "Authorization": f"Bearer {token}",
+                    "Content-Type": "application/json",
+                    "Accept": "text/event-stream",
+                }
+                try:
+                    self.start()
+                    async with self._client.stream("POST", self.api_url, headers=headers, json=payload) as resp:
+                        if resp.status_code == 401 and attempt == 0:
+                            token = await self.get_token(stale=token)
+                            if not token:
+                                break
+                            continue
+                        if resp.status_code != 200:
+                            logger.error(f"GigaChat stream failed: HTTP {resp.status_code}")
+                            break
+
+                        async for line in resp.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                return
+                            try:
+                                delta = json.loads(data)["choices"][0]["delta"].get("content", "")
+                            except (ValueError, KeyError, IndexError):
+                                continue
+                            if delta:
+                                started = True
+                                yield delta
+                        error = "stream closed without [DONE]"
+                except httpx.HTTPError as e:
+                    error = repr(e)
+
+                logger.error(f"GigaChat stream error: {error}")
+                if started:
+                    raise StreamInterrupted(error)
+                break
+
+        if not started:
+            yield UNAVAILABLE
+
+    async def _post_chat(self, token: str, prompt: str) -> httpx.Response:
+        self.start()
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        }
+        return await self._client.post(self.api_url, headers=headers, json=self._payload(prompt))
+
+
+gigachat = GigaChatClient.from_env()
+
+
+async def get_token():
+    """Получить Access Token через Authorization Key из .env (с кэшем)"""
+    return await gigachat.get_token()
+
+
+async def ask_gigachat(prompt: str):
     """Запрос в GigaChat API"""
+    return await gigachat.ask(prompt)
+
 
-    token = get_token()
-    if not token:
-        return "AI временно недоступен. Попробуйте позже."
-
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
-
-    payload = {
-        "model": "GigaChat-Pro",
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.3
-    }
-
-    try:
-        resp = requests.post(API_URL, headers=headers, json=payload, verify=False)
-    except Exception:
-        return "AI временно недоступен."
-
-    try:
-        return resp.json()["choices"][0]["message"]["content"]
-    except:
-        return "AI временно недоступен."
+def stream_gigachat(prompt: str):
+    """Потоковый запрос в GigaChat API: асинхронный итератор фрагментов ответа"""
+    return gigachat.stream(prompt)
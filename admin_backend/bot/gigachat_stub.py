@@ -0,0 +1,112 @@
+# admin_backend/bot/gigachat_stub.py
+"""
+Локальная заглушка OAuth и chat/completions GigaChat для проверки клиента без сети.
+
+    python gigachat_stub.py --port 8090 --delay 0.5
+    python gigachat_stub.py --fail-after 3   # рвать потоковый ответ после 3 фрагментов
+
+    GIGACHAT_AUTH=http://127.0.0.1:8090/oauth
+    GIGACHAT_API=http://127.0.0.1:8090/chat/completions
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from aiohttp import web
+
+
+class StubState:
+    def __init__(self, delay: float, token_ttl: float, fail_after: int | None = None):
+        self.delay = delay
+        self.token_ttl = token_ttl
+        self.fail_after = fail_after
+        self.tokens: dict[str, float] = {}
+        self.token_requests = 0
+        self.chat_requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+
+async def oauth(request: web.Request):
+    state: StubState = request.app["state"]
+    state.token_requests += 1
+    if not request.headers.get("Authorization", "").startswith("Basic "):
+        return web.json_response({"message": "no auth key"}, status=401)
+
+    token = uuid.uuid4().hex
+    expires_at = time.time() + state.token_ttl
+    state.tokens[token] = expires_at
+    return web.json_response({"access_token": token, "expires_at": int(expires_at * 1000)})
+
+
+async def chat(request: web.Request):
+    state: StubState = request.app["state"]
+    token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if state.tokens.get(token, 0) < time.time():
+        return web.json_response({"message": "token expired"}, status=401)
+
+    body = await request.json()
+    prompt = body["messages"][-1]["content"]
+
+    state.chat_requests += 1
+    state.in_flight += 1
+    state.max_in_flight = max(state.max_in_flight, state.in_flight)
+    try:
+        await asyncio.sleep(state.delay)
+    finally:
+        state.in_flight -= 1
+
+    answer = f"Ответ заглушки на: {prompt[-60:]}"
+    if body.get("stream"):
+        return await _stream_answer(request, answer, state.delay, state.fail_after)
+    return web.json_response({"choices": [{"message": {"role": "assistant", "content": answer}}]})
+
+
+async def _stream_answer(
+    request: web.Request, answer: str, delay: float, fail_after: int | None = None
+) -> web.StreamResponse:
+    resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await resp.prepare(request)
+    words = answer.split(" ")
+    for i, word in enumerate(words):
+        if i == fail_after:
+            # Обрыв соединения посреди ответа, без [DONE]
+            request.transport.close()
+            return resp
+        delta = word if i == 0 else " " + word
+        chunk = {"choices": [{"delta": {"role": "assistant", "content": delta}, "index": 0}]}
+        await resp.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+        await asyncio.sleep(delay / len(words))
+    await resp.write(b"data: [DONE]\n\n")
+    await resp.write_eof()
+    return resp
+
+
+async def stats(request: web.Request):
+    state: StubState = request.app["state"]
+    return web.json_response({
+        "token_requests": state.token_requests,
+        "chat_requests": state.chat_requests,
+        "max_in_flight": state.max_in_flight,
+    })
+
+
+def make_app(delay: float = 0.5, token_ttl: float = 1800, fail_after: int | None = None) -> web.Application:
+    app = web.Application()
+    app["state"] = StubState(delay, token_ttl, fail_after)
+    app.router.add_post("/oauth", oauth)
+    app.router.add_post("/chat/completions", chat)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--delay", type=float, default=0.5, help="задержка ответа чата, сек")
+    parser.add_argument("--token-ttl", type=float, default=1800)
+    parser.add_argument("--fail-after", type=int, default=None, help="оборвать поток после N фрагментов")
+    args = parser.parse_args()
+    web.run_app(make_app(args.delay, args.token_ttl, args.fail_after), host="127.0.0.1", port=args.port)
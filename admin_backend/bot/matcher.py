@@ -0,0 +1,110 @@
+# admin_backend/bot/matcher.py
+from collections import deque
+from typing import Iterable, NamedTuple
+
+
+class AhoCorasick:
+    """Автомат Ахо–Корасик: все вхождения набора строк за один проход по тексту."""
+
+    def __init__(self, patterns: Iterable[tuple[str, object]]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[object]] = [[]]
+
+        for word, value in patterns:
+            if word:
+                self._add(word, value)
+        self._build()
+
+    def _add(self, word: str, value):
+        node = 0
+        for ch in word:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(value)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                # Вхождения суффиксов тоже являются вхождениями
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str):
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                yield from out[node]
+
+
+# ===================================================
+# РАЗБОР СООБЩЕНИЙ БОТА
+# ===================================================
+class TextMatch(NamedTuple):
+    hotel: dict | None
+    room_key: str | None
+    booking: bool
+
+
+_HOTEL, _ROOM, _BOOKING = "hotel", "room", "booking"
+
+# (приоритет, ключ тура): меньше — важнее; «семейный» проверяется раньше номеров
+ROOM_KEYWORDS = [("семейн", (0, "семейный"))]
+ROOM_KEYWORDS += [(f"номер {i}", (i, f"стандарт {i}")) for i in range(1, 7)]
+ROOM_KEYWORDS += [("стандарт", (100, "стандарт 1"))]
+
+ROOM_EXACT = {str(i): (i, f"стандарт {i}") for i in range(1, 7)}
+
+
+class MessageMatcher:
+    """
+    Находит в сообщении за один проход: название отеля из каталога,
+    ключ номера для 360° тура и фразу-триггер бронирования.
+    """
+
+    def __init__(self, hotels: list[dict], booking_phrases: Iterable[str]):
+        self.hotels = hotels
+        patterns = [(h["name"].lower(), (_HOTEL, i)) for i, h in enumerate(hotels)]
+        patterns += [(word, (_ROOM, value)) for word, value in ROOM_KEYWORDS]
+        patterns += [(phrase.lower(), (_BOOKING, None)) for phrase in booking_phrases]
+        self._automaton = AhoCorasick(patterns)
+
+    def match(self, text: str) -> TextMatch:
+        text = text.lower().strip()
+
+        hotel_idx = None
+        room = ROOM_EXACT.get(text)
+        booking = False
+
+        for kind, value in self._automaton.iter_matches(text):
+            if kind == _HOTEL:
+                # Как и раньше, побеждает первый отель в порядке каталога
+                if hotel_idx is None or value < hotel_idx:
+                    hotel_idx = value
+            elif kind == _ROOM:
+                if room is None or value < room:
+                    room = value
+            else:
+                booking = True
+
+        return TextMatch(
+            hotel=self.hotels[hotel_idx] if hotel_idx is not None else None,
+            room_key=room[1] if room else None,
+            booking=booking,
+        )
@@ -0,0 +1,206 @@
+# admin_backend/bot/pipeline.py
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.types import TelegramObject, Update
+
+logger = logging.getLogger(__name__)
+
+# Место в пуле UpdatePipeline, которое держит текущий апдейт (None — polling)
+_current_slot: ContextVar[asyncio.Semaphore | None] = ContextVar("pipeline_slot", default=None)
+
+
+def _percentiles(latencies) -> dict:
+    values = sorted(latencies)
+
+    def pct(p):
+        return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 1) if values else None
+
+    return {"p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99)}
+
+
+@asynccontextmanager
+async def idle():
+    """
+    Ожидание внутри хендлера, которое не должно занимать место в пуле
+    UpdatePipeline: другие чаты в это время обрабатываются. Вне пула ничего не делает.
+    """
+    slot = _current_slot.get()
+    if slot is None:
+        yield
+        return
+    slot.release()
+    try:
+        yield
+    finally:
+        # shield: при отмене место всё равно вернётся в счёт, и выход из пула его отпустит
+        await asyncio.shield(slot.acquire())
+
+
+def update_chat_id(update: Update) -> int | None:
+    """Чат, к которому относится апдейт: по нему держим порядок обработки."""
+    event = update.event
+    chat = getattr(event, "chat", None)
+    if chat is None:
+        message = getattr(event, "message", None)  # callback_query
+        chat = getattr(message, "chat", None)
+    if chat is not None:
+        return chat.id
+    user = getattr(event, "from_user", None)
+    return user.id if user is not None else None
+
+
+class HandlerTiming(BaseMiddleware):
+    """
+    Время работы каждого хендлера (по имени функции).
+    Вешается внутренним middleware на наблюдатели: dp.message.middleware(timing).
+    """
+
+    def __init__(self, window: int = 1000):
+        self._latencies: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._calls: dict[str, int] = defaultdict(int)
+        self._errors: dict[str, int] = defaultdict(int)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        name = data["handler"].callback.__name__
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            self._errors[name] += 1
+            raise
+        finally:
+            self._calls[name] += 1
+            self._latencies[name].append(time.perf_counter() - start)
+
+    def metrics(self) -> dict:
+        return {
+            name: {"calls": self._calls[name], "errors": self._errors[name], **_percentiles(latencies)}
+            for name, latencies in sorted(self._latencies.items())
+        }
+
+
+class UpdatePipeline:
+    """
+    Очередь апдейтов для webhook-режима: у каждого чата своя очередь, которую
+    разбирает одна задача, поэтому апдейты чата обрабатываются строго по порядку.
+    Одновременно работают не больше workers хендлеров на все чаты: медленный
+    ответ AI занимает одно место в пуле и задерживает только свой чат.
+    Ожидание, не занятое работой (задержка throttling), отпускает место — см. idle().
+
+    submit() не ждёт обработки: если очередь чата (queue_size) или общая
+    (max_queued) заполнена, возвращает False — webhook отвечает Telegram
+    ошибкой, и тот повторит доставку позже.
+    """
+
+    def __init__(self, dp: Dispatcher, bot: Bot, workers: int = 64, queue_size: int = 100, max_queued: int = 10_000):
+        self.dp = dp
+        self.bot = bot
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_queued = max_queued
+
+        self._slots: asyncio.Semaphore | None = None
+        # чат -> очередь (время приёма, апдейт) и задача, которая её разбирает
+        self._chats: dict[int, deque[tuple[float, Update]]] = {}
+        self._tasks: dict[int, asyncio.Task] = {}
+        self._queued = 0
+
+        self.accepted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.errors = 0
+        self.in_flight = 0
+        self._wait: deque[float] = deque(maxlen=1000)
+        self._total: deque[float] = deque(maxlen=1000)
+
+    def start(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+    def submit(self, update: Update) -> bool:
+        chat_id = update_chat_id(update)
+        key = chat_id if chat_id is not None else update.update_id
+        queue = self._chats.get(key)
+        if self._queued >= self.max_queued or (queue is not None and len(queue) >= self.queue_size):
+            self.rejected += 1
+            return False
+
+        if queue is None:
+            queue = self._chats[key] = deque()
+        queue.append((time.perf_counter(), update))
+        self._queued += 1
+        self.accepted += 1
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._run_chat(key, queue))
+        return True
+
+    async def _run_chat(self, key: int, queue: deque):
+        try:
+            while queue:
+                enqueued, update = queue.popleft()
+                self._queued -= 1
+                # Место в пуле берём на каждый апдейт: длинная очередь одного чата не держит его
+                async with self._slots:
+                    token = _current_slot.set(self._slots)
+                    start = time.perf_counter()
+                    self._wait.append(start - enqueued)
+                    self.in_flight += 1
+                    try:
+                        await self.dp.feed_update(self.bot, update)
+                    except Exception:
+                        self.errors += 1
+                        logger.exception("Ошибка обработки апдейта %s", update.update_id)
+                    finally:
+                        _current_slot.reset(token)
+                        self.in_flight -= 1
+                        self.processed += 1
+                        self._total.append(time.perf_counter() - enqueued)
+        finally:
+            del self._chats[key]
+            del self._tasks[key]
+
+    async def drain(self, timeout: float = 10.0):
+        """Дождаться обработки принятых апдейтов (при остановке)."""
+        deadline = time.monotonic() + timeout
+        while self._tasks:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                logger.warning("Не дождались обработки %s апдейтов", self.queued() + self.in_flight)
+                return
+            await asyncio.wait(list(self._tasks.values()), timeout=left)
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def queued(self) -> int:
+        return self._queued
+
+    def metrics(self) -> dict:
+        return {
+            "workers": self.workers,
+            "chats": len(self._chats),
+            "queued": self.queued(),
+            "in_flight": self.in_flight,
+            "max_queue": max((len(q) for q in self._chats.values()), default=0),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "errors": self.errors,
+            "wait": _percentiles(self._wait),
+            "total": _percentiles(self._total),
+        }
@@ -1,88 +1,554 @@
 # admin_backend/bot/rag.py
+import asyncio
+import hashlib
+import importlib
+import json
+import logging
 import os
-import chromadb
-from sentence_transformers import SentenceTransformer
+import sys
+import threading
+import time
+import weakref
+from itertools import islice
+
+import chunking
+from rag_batcher import MicroBatcher
+from retrieval import BM25Index, fit_budget, rrf_fuse
+
+# chromadb и sentence_transformers (а с ними torch) импортируются лениво:
+# import rag не должен тормозить старт бота
+
+logger = logging.getLogger(__name__)
 
 CHROMA_DIR = "chroma_db"
 KNOWLEDGE_DIR = "knowledge"
 COLLECTION_NAME = "hotel_knowledge"
 
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Размер батча внутри model.encode
+ENCODE_BATCH_SIZE = int(os.getenv("RAG_ENCODE_BATCH", "64"))
+# Сколько чанков отдаём в один вызов encode (ограничивает память)
+PIPELINE_BATCH = int(os.getenv("RAG_PIPELINE_BATCH", "512"))
+# Сколько чанков пишем в Chroma за один add
+WRITE_BATCH = int(os.getenv("RAG_WRITE_BATCH", "1000"))
+# >0 — кодировать в пуле процессов sentence-transformers
+ENCODE_WORKERS = int(os.getenv("RAG_WORKERS", "0"))
+
+# Сколько чанков по умолчанию уходит в контекст и их общий бюджет в токенах
+TOP_K = int(os.getenv("RAG_TOP_K", "3"))
+CONTEXT_MAX_TOKENS = int(os.getenv("RAG_CONTEXT_TOKENS", "600"))
+# Гибридный поиск: BM25 + вектор, объединение через Reciprocal Rank Fusion
+HYBRID = os.getenv("RAG_HYBRID", "1").lower() in ("1", "true", "yes")
+RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+# Во сколько раз больше кандидатов берём из каждого поиска перед слиянием
+CANDIDATES_FACTOR = 3
+
 _client = None
 _collection = None
 _model = None
 
+# Прогрев идёт в отдельном потоке, а обработчики могут вызвать загрузку сами
+_load_lock = threading.RLock()
+_ready = threading.Event()
+_warming = threading.Event()
+# Ожидающие прогрева хендлеры ждут asyncio.Event своего loop, а не поток из пула
+_ready_lock = threading.Lock()
+_ready_events: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Event]" = weakref.WeakKeyDictionary()
 
-def get_chroma_collection():
-    global _client, _collection, _model
+# Замеры старта, секунды: import_chromadb, import_sentence_transformers,
+# open_collection, load_model, warmup_encode, first_query
+STARTUP_TIMINGS: dict[str, float] = {}
+
+
+def _timed(name: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    STARTUP_TIMINGS[name] = time.perf_counter() - start
+    return result
+
+
+def get_collection():
+    global _client, _collection
     if _collection is None:
-        _client = chromadb.PersistentClient(path=CHROMA_DIR)
-        _collection = _client.get_or_create_collection(
-            name=COLLECTION_NAME,
-            metadata={"hnsw:space": "cosine"}
-        )
-        _model = SentenceTransformer("all-MiniLM-L6-v2")
-    return _collection, _model
+        with _load_lock:
+            if _collection is None:
+                chromadb = _timed("import_chromadb", lambda: importlib.import_module("chromadb"))
+                start = time.perf_counter()
+                _client = chromadb.PersistentClient(path=CHROMA_DIR)
+                _collection = _client.get_or_create_collection(
+                    name=COLLECTION_NAME,
+                    metadata={"hnsw:space": "cosine"}
+                )
+                STARTUP_TIMINGS["open_collection"] = time.perf_counter() - start
+    return _collection
+
+
+def get_model():
+    global _model
+    if _model is None:
+        with _load_lock:
+            if _model is None:
+                st = _timed("import_sentence_transformers", lambda: importlib.import_module("sentence_transformers"))
+                _model = _timed("load_model", lambda: st.SentenceTransformer("all-MiniLM-L6-v2"))
+    return _model
+
+
+def warm_up():
+    """Загрузить коллекцию и модель и прогнать пробный encode (первый вызов самый медленный)."""
+    _warming.set()
+    try:
+        get_collection()
+        model = get_model()
+        _timed("warmup_encode", lambda: model.encode(["прогрев"]))
+        _set_ready()
+    finally:
+        _warming.clear()
+    logger.info("RAG warm-up: " + ", ".join(f"{k}={v:.2f}s" for k, v in STARTUP_TIMINGS.items()))
+
+
+async def awarm_up():
+    """Прогрев в фоне: запускается из main() и не блокирует event loop."""
+    _warming.set()
+    try:
+        await asyncio.to_thread(warm_up)
+    except Exception as e:
+        logger.error(f"RAG warm-up failed: {e!r}")
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def is_warming_up() -> bool:
+    return _warming.is_set()
+
+
+def _set_ready():
+    with _ready_lock:
+        _ready.set()
+        events = list(_ready_events.items())
+        _ready_events.clear()
+    for loop, event in events:
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            pass  # loop уже закрыт
+
+
+async def wait_ready(timeout: float) -> bool:
+    """Дождаться прогрева не дольше timeout секунд; True — модель готова."""
+    with _ready_lock:
+        if _ready.is_set():
+            return True
+        loop = asyncio.get_running_loop()
+        event = _ready_events.get(loop)
+        if event is None:
+            event = _ready_events[loop] = asyncio.Event()
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+    except asyncio.TimeoutError:
+        return False
+    return True
+
+
+def get_chroma_collection():
+    return get_collection(), get_model()
 
 
 def split_into_chunks(text: str, min_length=30) -> list[str]:
-    return [line.strip() for line in text.split("\n") if len(line.strip()) >= min_length]
+    """Нарезка по настройкам RAG_CHUNK_MODE / RAG_CHUNK_TOKENS / RAG_CHUNK_OVERLAP."""
+    return chunking.split_into_chunks(text, min_length=min_length)
+
+
+def chunk_id(hotel_name: str, chunk: str) -> str:
+    """Id чанка зависит только от его текста: неизменённые чанки не переэмбеддятся."""
+    return f"{hotel_name}_{hashlib.sha1(chunk.encode('utf-8')).hexdigest()[:16]}"
 
 
-def load_all_knowledge():
-    collection, model = get_chroma_collection()
+def _manifest_path() -> str:
+    return os.path.join(CHROMA_DIR, MANIFEST_NAME)
 
-    # Очистка
+
+def _load_manifest() -> dict:
     try:
-        collection.delete(where={})
-    except:
+        with open(_manifest_path(), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "files": {}}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "files": {}}
+    return manifest
+
+
+def _save_manifest(manifest: dict):
+    os.makedirs(CHROMA_DIR, exist_ok=True)
+    tmp = _manifest_path() + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp, _manifest_path())
+
+
+def _reset_collection():
+    global _collection
+    get_collection()
+    try:
+        _client.delete_collection(COLLECTION_NAME)
+    except Exception:
         pass
+    _collection = None
+    try:
+        os.remove(_manifest_path())
+    except OSError:
+        pass
+
+
+def _batched(iterable, n: int):
+    it = iter(iterable)
+    while batch := list(islice(it, n)):
+        yield batch
+
+
+def _file_hash(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return hashlib.sha256(f.read().strip().encode("utf-8")).hexdigest()
+
+
+class _Progress:
+    def __init__(self, every: float = 5.0):
+        self.every = every
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.done = 0
+
+    def add(self, n: int):
+        self.done += n
+        now = time.perf_counter()
+        if now - self.last >= self.every:
+            self.last = now
+            print(f"⏳ {self.done} чанков, {self.rate():.0f} чанков/с")
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def rate(self) -> float:
+        elapsed = self.elapsed()
+        return self.done / elapsed if elapsed else 0.0
+
+
+def _iter_new_chunks(collection, changed, known: dict, stats: dict):
+    """
+    Потоково отдаёт (id, чанк, отель) для чанков, которых ещё нет в коллекции.
+    Заодно удаляет осиротевшие чанки изменённых файлов.
+    """
+    for hotel_name, path, file_hash in changed:
+        with open(path, "r", encoding="utf-8") as f:
+            chunks = list(dict.fromkeys(split_into_chunks(f.read().strip())))
+        ids = [chunk_id(hotel_name, c) for c in chunks]
+
+        # Что уже лежит в коллекции — берём из неё самой, а не из манифеста
+        existing = set(collection.get(where={"hotel": hotel_name}, include=[])["ids"])
+        orphaned = list(existing - set(ids))
+        if orphaned:
+            collection.delete(ids=orphaned)
+            stats["deleted"] += len(orphaned)
+
+        known[hotel_name] = {"sha256": file_hash, "chunks": len(ids)}
+        for i, c in zip(ids, chunks):
+            if i not in existing:
+                yield i, c, hotel_name
+
+
+def _write(collection, ids, embeddings, documents, hotels):
+    # ⚠️ ОБЯЗАТЕЛЬНО передавать metadatas!
+    collection.add(
+        ids=ids,
+        embeddings=embeddings,
+        documents=documents,
+        metadatas=[{"hotel": h} for h in hotels]  # ← ЭТО КРИТИЧНО!
+    )
+
+
+def load_all_knowledge(full: bool = False, workers: int = None) -> dict:
+    """
+    Инкрементальная загрузка knowledge/*.txt в Chroma.
+
+    Файлы с неизменившимся хешем пропускаются. Новые чанки всех изменённых
+    файлов идут одним потоком: кодируются батчами по PIPELINE_BATCH
+    (в пуле из workers процессов, если задан) и пишутся в Chroma пачками
+    по WRITE_BATCH, так что память не зависит от размера корпуса.
+    full=True — пересоздать коллекцию с нуля.
+    """
+    stats = {"files": 0, "changed": 0, "added": 0, "deleted": 0, "seconds": 0.0, "chunks_per_sec": 0.0}
 
     if not os.path.exists(KNOWLEDGE_DIR):
         print("❌ Папка knowledge/ не найдена")
-        return
+        return stats
 
-    files = [f for f in os.listdir(KNOWLEDGE_DIR) if f.endswith(".txt")]
+    files = sorted(f for f in os.listdir(KNOWLEDGE_DIR) if f.endswith(".txt"))
     if not files:
         print("❌ Нет .txt файлов в knowledge/")
-        return
+        return stats
 
-    total = 0
+    if full:
+        _reset_collection()
+    manifest = _load_manifest()
+    known = manifest["files"]
+    # Поменялись настройки нарезки — пересобираем чанки всех файлов
+    rechunk = manifest.get("chunker") != chunking.config_signature()
+    manifest["chunker"] = chunking.config_signature()
+
+    changed = []
     for filename in files:
         hotel_name = filename.replace(".txt", "")
-        with open(os.path.join(KNOWLEDGE_DIR, filename), "r", encoding="utf-8") as f:
-            text = f.read().strip()
-
-        chunks = split_into_chunks(text)
-        embeddings = model.encode(chunks).tolist()
-        ids = [f"{hotel_name}_{i}" for i in range(len(chunks))]
-        metadatas = [{"hotel": hotel_name} for _ in chunks]
-
-        # ⚠️ ОБЯЗАТЕЛЬНО передавать metadatas!
-        collection.add(
-            ids=ids,
-            embeddings=embeddings,
-            documents=chunks,
-            metadatas=metadatas  # ← ЭТО КРИТИЧНО!
-        )
-        total += len(chunks)
-        print(f"✅ Загружено {len(chunks)} чанков для {hotel_name}")
+        path = os.path.join(KNOWLEDGE_DIR, filename)
+        file_hash = _file_hash(path)
+        if rechunk or known.get(hotel_name, {}).get("sha256") != file_hash:
+            changed.append((hotel_name, path, file_hash))
+
+    removed = [h for h in known if f"{h}.txt" not in files]
+    stats["files"] = len(files)
+    stats["changed"] = len(changed)
+    if not changed and not removed:
+        print(f"✅ Без изменений ({len(files)} файлов)")
+        return stats
+
+    if changed:
+        # Бюджет чанков считаем токенизатором самой модели, чтобы она не обрезала их хвосты
+        chunking.set_tokenizer(getattr(get_model(), "tokenizer", None))
 
-    print(f"🧮 Всего фрагментов: {total}")
+    collection = get_collection()
+    for hotel_name in removed:
+        collection.delete(where={"hotel": hotel_name})
+        del known[hotel_name]
+        print(f"🗑 Удалены чанки для {hotel_name}")
+
+    write_batch = WRITE_BATCH
+    if hasattr(_client, "get_max_batch_size"):
+        write_batch = min(write_batch, _client.get_max_batch_size())
+
+    workers = ENCODE_WORKERS if workers is None else workers
+    progress = _Progress()
+    model = None
+    pool = None
+    buffer = ([], [], [], [])
+    try:
+        for batch in _batched(_iter_new_chunks(collection, changed, known, stats), PIPELINE_BATCH):
+            if model is None:
+                model = get_model()
+                if workers > 0:
+                    pool = model.start_multi_process_pool(target_devices=["cpu"] * workers)
 
+            ids, chunks, hotels = zip(*batch)
+            if pool is not None:
+                embeddings = model.encode_multi_process(list(chunks), pool, batch_size=ENCODE_BATCH_SIZE)
+            else:
+                embeddings = model.encode(list(chunks), batch_size=ENCODE_BATCH_SIZE)
 
-def knowledge_query(query: str, filter: dict = None) -> str:
-    collection, model = get_chroma_collection()
-    query_emb = model.encode([query]).tolist()
+            for part, values in zip(buffer, (ids, embeddings.tolist(), chunks, hotels)):
+                part.extend(values)
+            while len(buffer[0]) >= write_batch:
+                _write(collection, *(part[:write_batch] for part in buffer))
+                for part in buffer:
+                    del part[:write_batch]
+            progress.add(len(batch))
 
-    results = collection.query(
-        query_embeddings=query_emb,
-        n_results=3,
-        where=filter  # ← фильтр будет работать ТОЛЬКО если metadatas были сохранены
+        if buffer[0]:
+            _write(collection, *buffer)
+    finally:
+        if pool is not None:
+            model.stop_multi_process_pool(pool)
+
+    _save_manifest(manifest)
+
+    stats["added"] = progress.done
+    stats["seconds"] = progress.elapsed()
+    stats["chunks_per_sec"] = progress.rate()
+    print(
+        f"🧮 Файлов изменено: {len(changed)} из {len(files)}, "
+        f"добавлено чанков: {stats['added']}, удалено: {stats['deleted']}, "
+        f"{stats['seconds']:.1f} с, {stats['chunks_per_sec']:.0f} чанков/с"
     )
+    return stats
+
+
+_manifest_cache = (None, {})
+
+
+def _manifest_mtime():
+    try:
+        return os.stat(_manifest_path()).st_mtime_ns
+    except OSError:
+        return None
+
+
+def knowledge_version(hotel_name: str) -> str:
+    """
+    Версия базы знаний отеля — хеш его файла на момент последней загрузки в Chroma.
+    Меняется, только когда load_all_knowledge действительно загрузил новый текст.
+    """
+    global _manifest_cache
+    mtime = _manifest_mtime()
+    if _manifest_cache[0] != mtime:
+        _manifest_cache = (mtime, _load_manifest()["files"])
+    return _manifest_cache[1].get(hotel_name, {}).get("sha256", "")
+
+
+# ===================================================
+# ПОИСК
+# ===================================================
+_bm25_lock = threading.Lock()
+_bm25_indexes: dict = {}
+_bm25_version = None
+
+
+def _get_bm25(hotel_name: str | None) -> BM25Index:
+    """Лексический индекс по чанкам отеля (или всей коллекции); пересобирается после загрузки."""
+    global _bm25_version
+    with _bm25_lock:
+        mtime = _manifest_mtime()
+        if mtime != _bm25_version:
+            _bm25_indexes.clear()
+            _bm25_version = mtime
+        index = _bm25_indexes.get(hotel_name)
+        if index is None:
+            where = {"hotel": hotel_name} if hotel_name else None
+            found = get_collection().get(where=where, include=["documents"])
+            index = BM25Index(found["ids"], found["documents"])
+            _bm25_indexes[hotel_name] = index
+        return index
+
+
+def _search(items: list[tuple]) -> list[str]:
+    """
+    items — (запрос, эмбеддинг, фильтр, k, бюджет токенов).
+    Векторный поиск — один query на каждый уникальный фильтр,
+    затем для каждого запроса слияние с BM25 и обрезка по бюджету.
+    """
+    groups: dict[str, list[int]] = {}
+    for i, item in enumerate(items):
+        groups.setdefault(json.dumps(item[2], sort_keys=True), []).append(i)
+
+    results = [""] * len(items)
+    for idxs in groups.values():
+        filter = items[idxs[0]][2]
+        n = max(items[i][3] for i in idxs) * (CANDIDATES_FACTOR if HYBRID else 1)
+        found = get_collection().query(
+            query_embeddings=[items[i][1] for i in idxs],
+            n_results=n,
+            where=filter  # ← фильтр будет работать ТОЛЬКО если metadatas были сохранены
+        )
+        all_ids = found.get("ids") or []
+        all_docs = found.get("documents") or []
+
+        # BM25 умеет только фильтр по отелю
+        lexical = HYBRID and (not filter or set(filter) == {"hotel"})
+        for row, i in enumerate(idxs):
+            query, _, _, k, max_tokens = items[i]
+            vector = list(zip(all_ids[row], all_docs[row])) if row < len(all_ids) else []
+            if lexical:
+                bm25 = _get_bm25(filter["hotel"] if filter else None)
+                lexical_hits = [(doc_id, doc) for doc_id, doc, _ in bm25.search(query, k * CANDIDATES_FACTOR)]
+                ranked = rrf_fuse([vector, lexical_hits], RRF_K)
+            else:
+                ranked = vector
+            results[i] = _format_docs(fit_budget([doc for _, doc in ranked], k, max_tokens))
+    return results
+
+
+def embed_query(query: str) -> list[float]:
+    _, model = get_chroma_collection()
+    return model.encode([query])[0].tolist()
+
+
+def _format_docs(docs) -> str:
+    return "\n".join(docs) if docs else ""
+
+
+def knowledge_query(
+    query: str,
+    filter: dict = None,
+    query_emb: list[float] = None,
+    k: int = None,
+    max_tokens: int = None,
+) -> str:
+    first = "first_query" not in STARTUP_TIMINGS
+    start = time.perf_counter()
+
+    if query_emb is None:
+        query_emb = embed_query(query)
+    context = _search([(query, query_emb, filter, k or TOP_K, max_tokens or CONTEXT_MAX_TOKENS)])[0]
+
+    if first:
+        STARTUP_TIMINGS["first_query"] = time.perf_counter() - start
+        logger.info(f"RAG first query: {STARTUP_TIMINGS['first_query']:.2f}s")
+    return context
+
+
+# ===================================================
+# АСИНХРОННЫЙ API
+# ===================================================
+def _run_batch(jobs) -> list:
+    """
+    Выполняется в пуле rag: все тексты без эмбеддинга кодируются одним
+    вызовом encode, поиск — через _search (один query на каждый фильтр).
+    """
+    need = [j for j in jobs if j.emb is None]
+    if need:
+        embeddings = get_model().encode([j.query for j in need], batch_size=ENCODE_BATCH_SIZE)
+        for j, emb in zip(need, embeddings.tolist()):
+            j.emb = emb
+
+    results = [None] * len(jobs)
+    searches = []
+    for i, j in enumerate(jobs):
+        if j.kind == "embed":
+            results[i] = j.emb
+        else:
+            searches.append(i)
+
+    if searches:
+        items = [
+            (jobs[i].query, jobs[i].emb, jobs[i].filter,
+             jobs[i].params.get("k") or TOP_K, jobs[i].params.get("max_tokens") or CONTEXT_MAX_TOKENS)
+            for i in searches
+        ]
+        for i, context in zip(searches, _search(items)):
+            results[i] = context
+    return results
+
+
+_batcher = MicroBatcher(
+    _run_batch,
+    workers=int(os.getenv("RAG_QUERY_WORKERS", "2")),
+    window=float(os.getenv("RAG_BATCH_WINDOW_MS", "5")) / 1000,
+    max_batch=int(os.getenv("RAG_MAX_BATCH", "32")),
+)
+
+
+async def aembed_query(query: str) -> list[float]:
+    return await _batcher.submit("embed", query)
+
+
+async def aknowledge_query(
+    query: str,
+    filter: dict = None,
+    query_emb: list[float] = None,
+    k: int = None,
+    max_tokens: int = None,
+) -> str:
+    return await _batcher.submit("search", query, filter, query_emb, k=k, max_tokens=max_tokens)
+
+
+def rag_metrics() -> dict:
+    """Глубина очереди, размер батчей и задержки асинхронного API."""
+    return _batcher.metrics()
+
 
-    docs = results.get("documents", [])
-    return "\n".join(docs[0]) if docs and docs[0] else ""
+def shutdown():
+    _batcher.shutdown()
 
 
 if __name__ == "__main__":
-    load_all_knowledge()
\ No newline at end of file
+    load_all_knowledge(full="--full" in sys.argv)
\ No newline at end of file
@@ -0,0 +1,107 @@
+# admin_backend/bot/rag_batcher.py
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job:
+    __slots__ = ("kind", "query", "filter", "emb", "params", "future", "enqueued")
+
+    def __init__(self, kind: str, query: str, filter: dict | None, emb, params: dict, future: asyncio.Future):
+        self.kind = kind
+        self.query = query
+        self.filter = filter
+        self.emb = emb
+        self.params = params
+        self.future = future
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    Собирает запросы, пришедшие в течение window секунд (но не больше max_batch),
+    и выполняет их одним вызовом run_batch(jobs) в выделенном пуле потоков,
+    чтобы encode и поиск не блокировали event loop.
+    run_batch возвращает список результатов в порядке jobs.
+    """
+
+    def __init__(self, run_batch, workers: int = 2, window: float = 0.005, max_batch: int = 32):
+        self._run_batch = run_batch
+        self.workers = workers
+        self.window = window
+        self.max_batch = max_batch
+
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending: list[Job] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._running = 0
+
+        self.jobs = 0
+        self.batches = 0
+        self.errors = 0
+        self._latencies: deque[float] = deque(maxlen=1000)
+
+    async def submit(self, kind: str, query: str, filter: dict | None = None, emb=None, **params):
+        loop = asyncio.get_running_loop()
+        job = Job(kind, query, filter, emb, params, loop.create_future())
+        self._pending.append(job)
+        self.jobs += 1
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await job.future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="rag")
+        self.batches += 1
+        self._running += len(batch)
+        fut = asyncio.get_running_loop().run_in_executor(self._executor, self._run_batch, batch)
+        fut.add_done_callback(lambda f: self._resolve(batch, f))
+
+    def _resolve(self, batch: list[Job], fut: asyncio.Future):
+        self._running -= len(batch)
+        now = time.perf_counter()
+        error = fut.exception() if not fut.cancelled() else asyncio.CancelledError()
+        if error is not None:
+            self.errors += 1
+        for i, job in enumerate(batch):
+            self._latencies.append(now - job.enqueued)
+            if job.future.done():
+                continue
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(fut.result()[i])
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def metrics(self) -> dict:
+        lat = sorted(self._latencies)
+
+        def pct(p):
+            return lat[min(len(lat) - 1, int(len(lat) * p))] * 1000 if lat else 0.0
+
+        return {
+            "queue_depth": len(self._pending) + self._running,
+            "jobs": self.jobs,
+            "batches": self.batches,
+            "avg_batch": self.jobs / self.batches if self.batches else 0.0,
+            "errors": self.errors,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+        }
@@ -0,0 +1,78 @@
+# admin_backend/bot/retrieval.py
+import math
+import re
+from collections import Counter, defaultdict
+
+from chunking import count_tokens
+
+_WORD_RE = re.compile(r"\w+")
+
+# Грубый стемминг для русского: слова длиннее STEM_LEN обрезаются
+# («завтрак», «завтраки», «завтраков» -> «завтра»)
+STEM_LEN = 6
+
+
+def tokenize(text: str) -> list[str]:
+    return [w[:STEM_LEN] for w in _WORD_RE.findall(text.lower()) if len(w) > 1]
+
+
+class BM25Index:
+    """Инвертированный индекс BM25 по чанкам: строится один раз, поиск — только по термам запроса."""
+
+    def __init__(self, ids: list[str], docs: list[str], k1: float = 1.5, b: float = 0.75):
+        self.ids = ids
+        self.docs = docs
+        self.k1 = k1
+        self.b = b
+
+        self._postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self._lengths = []
+        for i, doc in enumerate(docs):
+            terms = tokenize(doc)
+            self._lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self._postings[term].append((i, tf))
+
+        n = len(docs)
+        self._avgdl = sum(self._lengths) / n if n else 0.0
+        self._idf = {
+            term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in self._postings.items()
+        }
+
+    def search(self, query: str, k: int) -> list[tuple[str, str, float]]:
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self._postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / self._avgdl)
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        best = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+        return [(self.ids[i], self.docs[i], s) for i, s in best]
+
+
+def rrf_fuse(rankings: list[list[tuple[str, str]]], rrf_k: int = 60) -> list[tuple[str, str]]:
+    """Reciprocal Rank Fusion: каждый список (id, документ) даёт 1 / (rrf_k + ранг)."""
+    scores: dict[str, float] = defaultdict(float)
+    docs: dict[str, str] = {}
+    for ranking in rankings:
+        for rank, (doc_id, doc) in enumerate(ranking):
+            scores[doc_id] += 1 / (rrf_k + rank + 1)
+            docs[doc_id] = doc
+    return [(doc_id, docs[doc_id]) for doc_id in sorted(scores, key=scores.get, reverse=True)]
+
+
+def fit_budget(docs: list[str], k: int, max_tokens: int) -> list[str]:
+    """Первые k документов, пока их суммарный размер укладывается в max_tokens."""
+    result = []
+    used = 0
+    for doc in docs[:k]:
+        n = count_tokens(doc)
+        if result and used + n > max_tokens:
+            break
+        result.append(doc)
+        used += n
+    return result
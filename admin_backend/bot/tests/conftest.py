@@ -0,0 +1,16 @@
+"""
+Тесты модулей бота (pytest из admin_backend/bot):
+
+    cd admin_backend/bot
+    python -m pytest tests
+"""
+import os
+import sys
+from pathlib import Path
+
+BOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BOT_DIR))
+
+# bot.py читает окружение при импорте: фиктивный токен и состояния в памяти
+os.environ.setdefault("BOT_TOKEN", "123456:TEST-token")
+os.environ["FSM_STORAGE"] = "memory"
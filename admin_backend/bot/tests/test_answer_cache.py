@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+from answer_cache import SemanticAnswerCache
+
+
+class SemanticAnswerCacheTests(TestCase):
+    def test_similar_question_hits_per_hotel(self):
+        cache = SemanticAnswerCache(threshold=0.9)
+        cache.put("EcoHouse", [1.0, 0.0], "Завтрак с 7 до 10.")
+        self.assertEqual(cache.get("EcoHouse", [0.99, 0.05]), "Завтрак с 7 до 10.")
+        self.assertIsNone(cache.get("EcoHouse", [0.0, 1.0]))
+        self.assertIsNone(cache.get("Sea", [1.0, 0.0]))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_expired_entries_are_dropped(self):
+        cache = SemanticAnswerCache(ttl=-1)
+        cache.put("EcoHouse", [1.0, 0.0], "ответ")
+        self.assertIsNone(cache.get("EcoHouse", [1.0, 0.0]))
+        self.assertEqual(cache.stats()["expirations"], 1)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = SemanticAnswerCache(max_entries=2)
+        cache.put("A", [1.0, 0.0], "a")
+        cache.put("B", [1.0, 0.0], "b")
+        cache.get("A", [1.0, 0.0])
+        cache.put("C", [1.0, 0.0], "c")
+        self.assertEqual(cache.get("A", [1.0, 0.0]), "a")
+        self.assertIsNone(cache.get("B", [1.0, 0.0]))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_knowledge_version_change_drops_hotel_answers(self):
+        versions = {"A": 1, "B": 1}
+        cache = SemanticAnswerCache(version_fn=versions.get)
+        cache.put("A", [1.0, 0.0], "a")
+        cache.put("B", [1.0, 0.0], "b")
+        versions["A"] = 2
+        self.assertIsNone(cache.get("A", [1.0, 0.0]))
+        self.assertEqual(cache.get("B", [1.0, 0.0]), "b")
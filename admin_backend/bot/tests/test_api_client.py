@@ -0,0 +1,75 @@
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from api_client import ApiClient
+
+
+class ApiClientTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.responses = []
+        self.requests = []
+        self.api = ApiClient("http://api.test/api", retries=2, backoff=0)
+        self.api._client = httpx.AsyncClient(base_url=self.api.base_url, transport=httpx.MockTransport(self.handle))
+
+    async def asyncTearDown(self):
+        await self.api.close()
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def test_etag_answers_304_from_cache(self):
+        self.responses = [
+            httpx.Response(200, json=[{"id": 1}], headers={"ETag": '"v1"'}),
+            httpx.Response(304),
+        ]
+        first = await self.api.get("/hotels/", params={"fields": "id"})
+        second = await self.api.get("/hotels/", params={"fields": "id"})
+        self.assertEqual(first, second)
+        self.assertEqual(self.requests[1].headers["If-None-Match"], '"v1"')
+        self.assertEqual(self.api.not_modified, 1)
+
+    async def test_get_retries_transport_errors_and_5xx(self):
+        self.responses = [httpx.ConnectError("refused"), httpx.Response(503), httpx.Response(200, json={"ok": 1})]
+        self.assertEqual(await self.api.get("/hotels/"), {"ok": 1})
+        self.assertEqual(len(self.requests), 3)
+
+    async def test_get_gives_up_after_retries(self):
+        self.responses = [httpx.Response(502)] * 3
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.api.get("/hotels/")
+
+    async def test_post_without_key_is_not_retried(self):
+        self.responses = [httpx.Response(503)]
+        r = await self.api.post("/booking/", json={})
+        self.assertEqual(r.status_code, 503)
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_post_with_key_is_retried_with_same_key(self):
+        self.responses = [httpx.ReadTimeout("slow"), httpx.Response(201, json={"id": 7})]
+        r = await self.api.post("/booking/", json={}, idempotency_key="k1")
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual([req.headers["Idempotency-Key"] for req in self.requests], ["k1", "k1"])
+
+    async def test_get_all_follows_next_links(self):
+        self.responses = [
+            httpx.Response(200, json={"results": [1, 2], "next": "http://api.test/api/rooms/?cursor=x"}),
+            httpx.Response(200, json={"results": [3], "next": None}),
+        ]
+        self.assertEqual(await self.api.get_all("/rooms/"), [1, 2, 3])
+        self.assertEqual(self.requests[1].url.params["cursor"], "x")
+
+    async def test_fresh_get_all_bypasses_server_cache(self):
+        self.responses = [
+            httpx.Response(200, json={"results": [1], "next": "http://api.test/api/rooms/?cursor=x"}),
+            httpx.Response(200, json={"results": [2], "next": None}),
+            httpx.Response(200, json={"results": [], "next": None}),
+        ]
+        self.assertEqual(await self.api.get_all("/rooms/", fresh=True), [1, 2])
+        self.assertEqual([req.headers.get("Cache-Control") for req in self.requests], ["no-cache", "no-cache"])
+        await self.api.get("/hotels/")
+        self.assertNotIn("Cache-Control", self.requests[2].headers)
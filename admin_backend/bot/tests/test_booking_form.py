@@ -0,0 +1,55 @@
+from datetime import date
+from unittest import TestCase
+
+from booking_form import (
+    MAX_DAYS_AHEAD, MAX_NIGHTS, check_date_from, check_date_to, normalize_email, normalize_name,
+    normalize_phone, parse_date,
+)
+
+
+class ParseDateTests(TestCase):
+    def test_separators(self):
+        for text in ("05.01.2027", "05/01/2027", " 05-01-2027 "):
+            self.assertEqual(parse_date(text), date(2027, 1, 5))
+
+    def test_garbage_and_impossible_dates(self):
+        for text in ("завтра", "2027-01-05", "31.02.2027", ""):
+            self.assertIsNone(parse_date(text))
+
+
+class DateRangeTests(TestCase):
+    today = date(2026, 10, 17)
+
+    def test_date_from(self):
+        self.assertIsNone(check_date_from(self.today, self.today))
+        self.assertIsNotNone(check_date_from(date(2026, 10, 16), self.today))
+        self.assertIsNone(check_date_from(date.fromordinal(self.today.toordinal() + MAX_DAYS_AHEAD), self.today))
+        self.assertIsNotNone(check_date_from(date.fromordinal(self.today.toordinal() + MAX_DAYS_AHEAD + 1), self.today))
+
+    def test_date_to(self):
+        start = date(2027, 1, 1)
+        self.assertIsNotNone(check_date_to(start, start))
+        self.assertIsNone(check_date_to(date(2027, 1, 2), start))
+        self.assertIsNone(check_date_to(date.fromordinal(start.toordinal() + MAX_NIGHTS), start))
+        self.assertIsNotNone(check_date_to(date.fromordinal(start.toordinal() + MAX_NIGHTS + 1), start))
+
+
+class NormalizeTests(TestCase):
+    def test_phone_formats(self):
+        for text in ("+7 900 123-45-67", "8 (900) 1234567", "9001234567", "79001234567"):
+            self.assertEqual(normalize_phone(text), "+79001234567", text)
+        self.assertEqual(normalize_phone("+44 20 7946 0958"), "+442079460958")
+
+    def test_bad_phones(self):
+        for text in ("123", "+7 900 abc", "8900123456789012", "телефон"):
+            self.assertIsNone(normalize_phone(text), text)
+
+    def test_email(self):
+        self.assertEqual(normalize_email("  Anna@Example.RU "), "anna@example.ru")
+        self.assertIsNone(normalize_email("anna@example"))
+        self.assertIsNone(normalize_email("an na@example.ru"))
+
+    def test_name(self):
+        self.assertEqual(normalize_name("  Анна   Смирнова "), "Анна Смирнова")
+        self.assertIsNone(normalize_name("А"))
+        self.assertIsNone(normalize_name("12345"))
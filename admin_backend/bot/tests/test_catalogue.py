@@ -0,0 +1,74 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from catalogue import HotelCatalogue
+
+
+class HotelCatalogueTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.calls = 0
+        self.hotels = [{"id": 1, "name": "EcoHouse"}]
+        self.fail = False
+
+    async def fetch(self):
+        self.calls += 1
+        hotels = list(self.hotels)
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("API недоступен")
+        return hotels
+
+    async def test_concurrent_misses_share_one_fetch(self):
+        catalogue = HotelCatalogue(self.fetch)
+        results = await asyncio.gather(*(catalogue.get() for _ in range(10)))
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(r == self.hotels for r in results))
+        self.assertEqual(await catalogue.find(1), self.hotels[0])
+        self.assertEqual(catalogue.stats()["hits"], 1)
+
+    async def test_stale_data_is_served_while_refreshing(self):
+        catalogue = HotelCatalogue(self.fetch, ttl=10, stale_ttl=100)
+        await catalogue.get()
+        self.hotels = [{"id": 2, "name": "Sea"}]
+        catalogue._fetched_at -= 50
+
+        self.assertEqual((await catalogue.get())[0]["id"], 1)
+        await catalogue._refresh_task
+        self.assertEqual((await catalogue.get())[0]["id"], 2)
+        self.assertEqual(catalogue.version, 2)
+        self.assertEqual(catalogue.stats()["stale_hits"], 1)
+
+    async def test_background_refresh_error_keeps_old_data(self):
+        catalogue = HotelCatalogue(self.fetch, ttl=10, stale_ttl=100)
+        old = await catalogue.get()
+        self.fail = True
+        catalogue._fetched_at -= 50
+
+        with self.assertLogs("catalogue", "ERROR"):
+            self.assertIs(await catalogue.get(), old)
+            await asyncio.wait([catalogue._refresh_task])
+        self.assertEqual(catalogue.stats()["errors"], 1)
+
+    async def test_invalidate_forces_one_new_fetch(self):
+        catalogue = HotelCatalogue(self.fetch)
+        await catalogue.get()
+        self.hotels = [{"id": 2, "name": "Sea"}]
+
+        catalogue.invalidate()
+        results = await asyncio.gather(*(catalogue.get() for _ in range(5)))
+        self.assertEqual(self.calls, 2)
+        self.assertTrue(all(r == self.hotels for r in results))
+        self.assertEqual(await catalogue.find(2), self.hotels[0])
+        self.assertEqual(self.calls, 2)
+
+    async def test_fetch_started_before_invalidate_is_not_cached(self):
+        catalogue = HotelCatalogue(self.fetch)
+        first = asyncio.create_task(catalogue.get())
+        while not self.calls:
+            await asyncio.sleep(0)
+        self.hotels = [{"id": 2, "name": "Sea"}]
+        catalogue.invalidate()
+
+        self.assertEqual((await first)[0]["id"], 1)
+        self.assertEqual((await catalogue.get())[0]["id"], 2)
+        self.assertEqual(self.calls, 2)
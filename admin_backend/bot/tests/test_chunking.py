@@ -0,0 +1,73 @@
+from unittest import TestCase
+
+import chunking
+from chunking import count_wordpieces, set_tokenizer, split_into_chunks
+from retrieval import BM25Index, fit_budget, rrf_fuse, tokenize
+
+
+class CharTokenizer:
+    """Худший случай для словаря модели: каждая буква — отдельный wordpiece."""
+
+    def tokenize(self, text):
+        return [ch for ch in text if not ch.isspace()]
+
+
+class ChunkingTests(TestCase):
+    def test_estimate_counts_russian_words_as_several_wordpieces(self):
+        self.assertEqual(count_wordpieces("Завтрак с 7 до 10."), 4 * 3 + 2 * 2 + 1)
+        self.assertEqual(count_wordpieces("Wi-Fi"), 2 + 1 + 2)
+
+    def test_budget_stays_below_model_limit(self):
+        self.assertLessEqual(chunking.CHUNK_MAX_TOKENS, chunking.MODEL_MAX_TOKENS - 2)
+
+    def test_windows_respect_budget_with_overlap(self):
+        text = " ".join(f"Предложение номер {i} про завтрак." for i in range(40))
+        chunks = split_into_chunks(text, mode="sentence", max_tokens=60, overlap=1, min_length=1)
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(count_wordpieces(c) <= 60 for c in chunks))
+        # Последнее предложение окна повторяется в начале следующего
+        self.assertTrue(chunks[1].startswith(chunks[0].rsplit(". ", 1)[-1]))
+
+    def test_long_sentence_is_split_by_words(self):
+        text = " ".join(["слово"] * 100) + "."
+        chunks = split_into_chunks(text, mode="sentence", max_tokens=40, overlap=0, min_length=1)
+        self.assertTrue(all(count_wordpieces(c) <= 40 for c in chunks))
+        self.assertEqual(" ".join(chunks), text)
+
+    def test_model_tokenizer_is_used_when_set(self):
+        set_tokenizer(CharTokenizer())
+        self.addCleanup(set_tokenizer, None)
+        self.assertEqual(count_wordpieces("ab cd"), 4)
+        # По оценке два предложения (9 + 9) влезли бы в один чанк, а по буквам (11 + 11) — нет
+        chunks = split_into_chunks("абвгд еёжзи. клмно прсту.", mode="sentence", max_tokens=20, min_length=1)
+        self.assertEqual(chunks, ["абвгд еёжзи.", "клмно прсту."])
+
+    def test_paragraph_mode_keeps_paragraphs_apart(self):
+        text = "Завтрак с 7 до 10 в ресторане.\n\nТрансфер из аэропорта по запросу."
+        chunks = split_into_chunks(text, mode="paragraph", min_length=1)
+        self.assertEqual(len(chunks), 2)
+
+    def test_line_mode_filters_short_lines(self):
+        text = "коротко\nзавтрак с 7 до 10 в ресторане на первом этаже"
+        self.assertEqual(split_into_chunks(text, mode="line"), ["завтрак с 7 до 10 в ресторане на первом этаже"])
+
+
+class RetrievalTests(TestCase):
+    def test_tokenize_stems_and_drops_short_words(self):
+        self.assertEqual(tokenize("Завтраки и ЗАВТРАКОВ"), ["завтра", "завтра"])
+
+    def test_bm25_ranks_matching_document_first(self):
+        index = BM25Index(["a", "b", "c"], ["завтрак в ресторане", "трансфер из аэропорта", "парковка у отеля"])
+        self.assertEqual(index.search("во сколько завтрак?", k=2)[0][0], "a")
+        self.assertEqual(index.search("бассейн", k=2), [])
+
+    def test_rrf_prefers_documents_ranked_high_in_both_lists(self):
+        fused = rrf_fuse([[("a", "A"), ("b", "B"), ("c", "C")], [("b", "B"), ("c", "C"), ("d", "D")]], rrf_k=60)
+        self.assertEqual([doc_id for doc_id, _ in fused], ["b", "c", "a", "d"])
+        self.assertEqual(dict(fused)["b"], "B")
+
+    def test_fit_budget_keeps_at_least_one_document(self):
+        docs = ["один два три", "четыре пять", "шесть"]
+        self.assertEqual(fit_budget(docs, k=3, max_tokens=5), docs[:2])
+        self.assertEqual(fit_budget(docs, k=3, max_tokens=1), docs[:1])
+        self.assertEqual(fit_budget(docs, k=1, max_tokens=100), docs[:1])
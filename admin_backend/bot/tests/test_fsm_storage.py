@@ -0,0 +1,67 @@
+import asyncio
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from aiogram.fsm.storage.base import StorageKey
+
+from fsm_storage import SQLiteStorage
+
+KEY = StorageKey(bot_id=1, chat_id=10, user_id=10)
+
+
+class SQLiteStorageTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "fsm.sqlite3")
+
+    async def storage(self, **kwargs) -> SQLiteStorage:
+        storage = SQLiteStorage(self.path, **kwargs)
+        self.addAsyncCleanup(storage.close)
+        return storage
+
+    async def test_two_workers_see_each_other_immediately(self):
+        a, b = await self.storage(), await self.storage()
+        await a.set_data(KEY, {"hotel": "EcoHouse"})
+        await a.set_state(KEY, "BookingStates:entering_phone")
+        self.assertEqual(await b.get_state(KEY), "BookingStates:entering_phone")
+        self.assertEqual(await b.get_data(KEY), {"hotel": "EcoHouse"})
+
+        await b.set_data(KEY, {"hotel": "EcoHouse", "phone": "+79001234567"})
+        self.assertEqual((await a.get_data(KEY))["phone"], "+79001234567")
+
+    async def test_state_change_writes_through_buffered_data(self):
+        a, b = await self.storage(flush_interval=60), await self.storage()
+        await a.set_data(KEY, {"guest_name": "Анна"})
+        # Только данные — отложены до flush_interval
+        self.assertEqual(await b.get_data(KEY), {})
+        self.assertEqual(await a.get_data(KEY), {"guest_name": "Анна"})
+
+        await a.set_state(KEY, "BookingStates:entering_phone")
+        self.assertEqual(await b.get_state(KEY), "BookingStates:entering_phone")
+        self.assertEqual(await b.get_data(KEY), {"guest_name": "Анна"})
+
+    async def test_concurrent_writes_share_transactions(self):
+        storage = await self.storage()
+        keys = [StorageKey(bot_id=1, chat_id=i, user_id=i) for i in range(50)]
+        await asyncio.gather(*(storage.set_state(k, "AiStates:ai_mode") for k in keys))
+        self.assertEqual(storage.stats()["rows_flushed"], 50)
+        self.assertLess(storage.stats()["flushes"], 50)
+
+    async def test_state_survives_restart_and_clear_removes_row(self):
+        first = SQLiteStorage(self.path, flush_interval=60)
+        await first.set_data(KEY, {"hotel": "EcoHouse"})
+        await first.close()
+
+        second = await self.storage()
+        self.assertEqual(await second.get_data(KEY), {"hotel": "EcoHouse"})
+        await second.set_state(KEY, None)
+        await second.set_data(KEY, {})
+        row = second._connect().execute("SELECT COUNT(*) FROM fsm").fetchone()
+        self.assertEqual(row[0], 0)
+
+    async def test_abandoned_conversation_expires(self):
+        storage = await self.storage(ttl=-1)
+        await storage.set_state(KEY, "AiStates:ai_mode")
+        self.assertIsNone(await storage.get_state(KEY))
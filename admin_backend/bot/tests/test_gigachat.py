@@ -0,0 +1,74 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from aiohttp.test_utils import TestServer
+
+from gigachat_ai import UNAVAILABLE, GigaChatClient, StreamInterrupted
+from gigachat_stub import make_app
+
+
+class GigaChatClientTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = TestServer(make_app(delay=0.05))
+        await self.server.start_server()
+        self.stub = self.server.app["state"]
+        self.client = GigaChatClient(
+            "key",
+            str(self.server.make_url("/oauth")),
+            str(self.server.make_url("/chat/completions")),
+            max_concurrency=3,
+        )
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.server.close()
+
+    async def test_one_token_for_concurrent_requests(self):
+        answers = await asyncio.gather(*(self.client.ask(f"вопрос {i}") for i in range(10)))
+        self.assertTrue(all(a.startswith("Ответ заглушки") for a in answers))
+        self.assertEqual(self.stub.token_requests, 1)
+        self.assertEqual(self.stub.chat_requests, 10)
+
+    async def test_concurrency_is_limited(self):
+        await asyncio.gather(*(self.client.ask("вопрос") for _ in range(10)))
+        self.assertLessEqual(self.stub.max_in_flight, 3)
+
+    async def test_revoked_token_is_refreshed_once(self):
+        await self.client.ask("первый")
+        self.stub.tokens.clear()
+        answer = await self.client.ask("второй")
+        self.assertIn("второй", answer)
+        self.assertEqual(self.stub.token_requests, 2)
+
+    async def test_auth_failure_is_reported(self):
+        self.client.auth_url = str(self.server.make_url("/missing"))
+        self.assertNotIn("Ответ заглушки", await self.client.ask("вопрос"))
+
+    async def test_stream_yields_deltas(self):
+        deltas = [delta async for delta in self.client.stream("привет")]
+        self.assertGreater(len(deltas), 1)
+        self.assertEqual("".join(deltas), "Ответ заглушки на: привет")
+
+    async def test_stream_refreshes_revoked_token(self):
+        await self.client.get_token()
+        self.stub.tokens.clear()
+        text = "".join([delta async for delta in self.client.stream("привет")])
+        self.assertEqual(text, "Ответ заглушки на: привет")
+        self.assertEqual(self.stub.token_requests, 2)
+
+    async def test_stream_unavailable_before_first_delta(self):
+        self.client.api_url = str(self.server.make_url("/missing"))
+        self.assertEqual([delta async for delta in self.client.stream("привет")], [UNAVAILABLE])
+
+    async def test_stream_failure_after_first_delta_raises(self):
+        self.stub.fail_after = 2
+        deltas = []
+        with self.assertRaises(StreamInterrupted), self.assertLogs("gigachat_ai", "ERROR"):
+            async for delta in self.client.stream("привет"):
+                deltas.append(delta)
+        self.assertEqual(deltas, ["Ответ", " заглушки"])
+
+    async def test_stream_failure_before_first_delta_is_unavailable(self):
+        self.stub.fail_after = 0
+        with self.assertLogs("gigachat_ai", "ERROR"):
+            self.assertEqual([delta async for delta in self.client.stream("привет")], [UNAVAILABLE])
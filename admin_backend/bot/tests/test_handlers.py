@@ -0,0 +1,122 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+import bot
+from gigachat_ai import StreamInterrupted
+
+HOTELS = [{"id": 1, "name": "EcoHouse", "address": "", "description": ""}]
+ROOMS = [
+    {"id": 10, "room_number": "2", "room_type": "Стандарт", "price_per_night": "7800.00"},
+    {"id": 11, "room_number": "5", "room_type": "Семейный", "price_per_night": "13500.00"},
+]
+
+
+class HandleMessageTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.state = FSMContext(MemoryStorage(), StorageKey(bot_id=1, chat_id=1, user_id=1))
+        await self.state.update_data(selected_hotel_id=1, selected_hotel_name="EcoHouse")
+        patches = [
+            patch.object(bot.hotels_cache, "get", AsyncMock(return_value=HOTELS)),
+            patch.object(bot, "fetch_rooms", AsyncMock(return_value=ROOMS)),
+            patch.object(bot, "start_booking", AsyncMock()),
+            patch.object(bot, "STREAM_ANSWERS", True),
+            patch.object(bot, "aembed_query", AsyncMock(return_value=[1.0, 0.0])),
+            patch.object(bot, "aknowledge_query", AsyncMock(return_value="контекст")),
+            patch.object(bot.rag, "is_warming_up", lambda: False),
+            patch.object(bot, "answer_cache", MagicMock(get=MagicMock(return_value=None))),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def message(self, text):
+        message = MagicMock()
+        message.text = text
+        message.answer = AsyncMock()
+        return message
+
+    async def test_known_room_shows_card(self):
+        message = self.message("расскажи про номер 2")
+        await bot.handle_message(message, self.state)
+        self.assertIn("Номер: 2", message.answer.call_args.args[0])
+        bot.start_booking.assert_not_called()
+
+    async def test_family_room_is_found_by_type(self):
+        message = self.message("есть семейный?")
+        await bot.handle_message(message, self.state)
+        self.assertIn("Семейный", message.answer.call_args.args[0])
+
+    async def test_missing_room_falls_through_to_booking(self):
+        # «стандарт» даёт ключ «стандарт 1», а номера 1 в отеле нет
+        message = self.message("забронировать стандарт 3")
+        await bot.handle_message(message, self.state)
+        bot.start_booking.assert_awaited_once_with(message, self.state)
+
+    async def test_complete_stream_answer_is_cached(self):
+        async def chunks(prompt):
+            yield "Завтрак "
+            yield "с 7 до 10."
+
+        message = self.message("когда завтрак?")
+        with patch.object(bot, "stream_gigachat", chunks):
+            await bot.handle_message(message, self.state)
+        bot.answer_cache.put.assert_called_once_with("EcoHouse", [1.0, 0.0], "Завтрак с 7 до 10.")
+
+    async def test_interrupted_stream_answer_is_not_cached(self):
+        async def chunks(prompt):
+            yield "Завтрак "
+            raise StreamInterrupted("reset")
+
+        message = self.message("когда завтрак?")
+        with patch.object(bot, "stream_gigachat", chunks):
+            await bot.handle_message(message, self.state)
+        # Первый фрагмент уже показан, пометка об обрыве дописана правкой
+        self.assertIn("прервался", message.answer.return_value.edit_text.call_args.args[0])
+        bot.answer_cache.put.assert_not_called()
+
+
+class ConfirmBookingTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.state = FSMContext(MemoryStorage(), StorageKey(bot_id=1, chat_id=1, user_id=1))
+        await self.state.set_state(bot.BookingStates.confirming)
+        await self.state.update_data(
+            selected_hotel_id=1, selected_room_id=10, guest_name="Анна Смирнова", guest_phone="+79001234567",
+            guest_email=None, date_from="2027-01-05", date_to="2027-01-07", booking_key="k" * 32,
+        )
+        self.callback = MagicMock()
+        self.callback.answer = AsyncMock()
+        self.callback.message.answer = AsyncMock()
+        self.callback.message.edit_text = AsyncMock()
+
+    def api(self, free, status, body=None):
+        response = MagicMock(status_code=status, text="")
+        response.json.return_value = body or {}
+        p = patch.multiple(
+            bot.api, get_all=AsyncMock(return_value=free), post=AsyncMock(return_value=response)
+        )
+        p.start()
+        self.addCleanup(p.stop)
+
+    async def test_booking_is_sent_once_with_idempotency_key(self):
+        self.api([{"id": 10}], 201, {"id": 77, "total_price": "15600.00"})
+        await bot.confirm_booking(self.callback, self.state)
+        bot.api.post.assert_awaited_once()
+        self.assertEqual(bot.api.post.await_args.kwargs["idempotency_key"], "k" * 32)
+        self.assertIn("№77", self.callback.message.edit_text.call_args.args[0])
+        self.assertEqual(await self.state.get_state(), bot.AiStates.ai_mode.state)
+
+    async def test_conflict_asks_for_other_dates(self):
+        self.api([{"id": 10}], 409)
+        await bot.confirm_booking(self.callback, self.state)
+        self.assertEqual(await self.state.get_state(), bot.BookingStates.entering_date_from.state)
+
+    async def test_taken_room_is_not_posted(self):
+        self.api([], 201)
+        await bot.confirm_booking(self.callback, self.state)
+        bot.api.post.assert_not_awaited()
+        self.assertTrue(bot.api.get_all.await_args.kwargs["fresh"])
+        self.assertEqual(await self.state.get_state(), bot.BookingStates.entering_date_from.state)
@@ -0,0 +1,41 @@
+from unittest import TestCase
+
+from matcher import AhoCorasick, MessageMatcher
+
+HOTELS = [{"id": 1, "name": "EcoHouse"}, {"id": 2, "name": "Eco"}]
+
+
+class AhoCorasickTests(TestCase):
+    def test_finds_overlapping_and_nested_patterns(self):
+        automaton = AhoCorasick([("he", 1), ("she", 2), ("his", 3), ("hers", 4)])
+        self.assertEqual(sorted(automaton.iter_matches("ushers")), [1, 2, 4])
+
+    def test_repeated_occurrences_are_reported_each_time(self):
+        automaton = AhoCorasick([("аб", "x")])
+        self.assertEqual(list(automaton.iter_matches("абвабаб")), ["x", "x", "x"])
+
+    def test_empty_patterns_are_ignored(self):
+        automaton = AhoCorasick([("", 1), ("a", 2)])
+        self.assertEqual(list(automaton.iter_matches("bab")), [2])
+
+
+class MessageMatcherTests(TestCase):
+    def setUp(self):
+        self.matcher = MessageMatcher(HOTELS, ["забронировать", "бронь"])
+
+    def test_first_hotel_in_catalogue_wins(self):
+        self.assertEqual(self.matcher.match("Хочу в ecohouse").hotel["id"], 1)
+
+    def test_room_keys(self):
+        self.assertEqual(self.matcher.match("покажи номер 4").room_key, "стандарт 4")
+        self.assertEqual(self.matcher.match("3").room_key, "стандарт 3")
+        self.assertEqual(self.matcher.match("стандарт").room_key, "стандарт 1")
+        # Семейный важнее номера, как бы ни шли слова в тексте
+        self.assertEqual(self.matcher.match("номер 2 или семейный").room_key, "семейный")
+
+    def test_booking_trigger(self):
+        found = self.matcher.match("Забронировать номер 5")
+        self.assertTrue(found.booking)
+        self.assertEqual(found.room_key, "стандарт 5")
+        self.assertFalse(self.matcher.match("какие услуги?").booking)
+        self.assertIsNone(self.matcher.match("какие услуги?").room_key)
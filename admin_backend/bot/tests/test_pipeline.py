@@ -0,0 +1,166 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message, Update
+from aiohttp.test_utils import TestClient, TestServer
+
+from fake_telegram import make_update
+from pipeline import UpdatePipeline, idle
+from webhook import ADMIN_HEADER, SECRET_HEADER, make_app
+
+
+class PipelineTestCase(IsolatedAsyncioTestCase):
+    workers = 2
+    queue_size = 100
+
+    async def asyncSetUp(self):
+        self.log = []
+        self.running = 0
+        self.max_running = 0
+        self.ids = iter(range(1, 10_000))
+
+        dp = Dispatcher()
+
+        @dp.message()
+        async def handler(message: Message):
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            try:
+                if message.text.startswith("медленно"):
+                    await asyncio.sleep(0.3)
+                elif message.text.startswith("жду"):
+                    async with idle():
+                        await asyncio.sleep(0.3)
+                else:
+                    await asyncio.sleep(0.01)
+            finally:
+                self.running -= 1
+            self.log.append((message.chat.id, message.text))
+
+        self.bot = Bot("123456:TEST-token")
+        self.pipeline = UpdatePipeline(dp, self.bot, workers=self.workers, queue_size=self.queue_size)
+        self.pipeline.start()
+
+    async def asyncTearDown(self):
+        await self.pipeline.stop()
+        await self.bot.session.close()
+
+    def update(self, chat_id: int, text: str) -> Update:
+        return Update.model_validate(make_update(next(self.ids), chat_id, text), context={"bot": self.bot})
+
+
+class UpdatePipelineTests(PipelineTestCase):
+    async def test_chat_order_is_kept(self):
+        for i in range(5):
+            self.assertTrue(self.pipeline.submit(self.update(1, f"{'медленно ' if i == 0 else ''}{i}")))
+        await self.pipeline.drain()
+        self.assertEqual([text[-1] for _, text in self.log], list("01234"))
+
+    async def test_slow_chat_does_not_block_others(self):
+        # Чаты 1 и 3 при шардировании chat_id % 2 попали бы к одному обработчику
+        self.pipeline.submit(self.update(1, "медленно"))
+        for i in range(3):
+            self.pipeline.submit(self.update(3, str(i)))
+        await asyncio.sleep(0.2)
+        self.assertEqual([chat for chat, _ in self.log], [3, 3, 3])
+        await self.pipeline.drain()
+        self.assertEqual(self.log[-1], (1, "медленно"))
+
+    async def test_workers_limit_handlers_in_flight(self):
+        for chat in range(10):
+            self.pipeline.submit(self.update(chat, "привет"))
+        await self.pipeline.drain()
+        self.assertEqual(len(self.log), 10)
+        self.assertEqual(self.max_running, 2)
+        metrics = self.pipeline.metrics()
+        self.assertEqual((metrics["processed"], metrics["queued"], metrics["chats"]), (10, 0, 0))
+
+    async def test_idle_wait_frees_the_slot(self):
+        self.pipeline.submit(self.update(1, "жду"))
+        self.pipeline.submit(self.update(2, "жду"))
+        self.pipeline.submit(self.update(3, "привет"))
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.log, [(3, "привет")])
+        await self.pipeline.drain()
+        self.assertEqual(len(self.log), 3)
+
+
+class QueueLimitTests(PipelineTestCase):
+    workers = 1
+    queue_size = 2
+
+    async def test_full_chat_queue_is_rejected(self):
+        self.pipeline.submit(self.update(1, "медленно"))
+        await asyncio.sleep(0)  # первый апдейт уже в обработке, не в очереди
+        self.assertTrue(self.pipeline.submit(self.update(1, "a")))
+        self.assertTrue(self.pipeline.submit(self.update(1, "b")))
+        self.assertFalse(self.pipeline.submit(self.update(1, "c")))
+        self.assertTrue(self.pipeline.submit(self.update(2, "d")))
+        self.assertEqual(self.pipeline.metrics()["rejected"], 1)
+
+    async def test_total_limit_is_rejected(self):
+        self.pipeline.max_queued = 1
+        self.assertTrue(self.pipeline.submit(self.update(1, "a")))
+        self.assertFalse(self.pipeline.submit(self.update(2, "b")))
+
+
+class WebhookTests(PipelineTestCase):
+    workers = 1
+    queue_size = 1
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.invalidations = 0
+        app = make_app(self.pipeline, secret="s3cret", invalidate_hotels_fn=self.invalidate, admin_token="adm1n")
+        self.client = TestClient(TestServer(app))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await super().asyncTearDown()
+
+    def invalidate(self):
+        self.invalidations += 1
+
+    async def post(self, body, secret="s3cret"):
+        return await self.client.post("/webhook", json=body, headers={SECRET_HEADER: secret})
+
+    async def test_update_is_accepted_and_processed(self):
+        r = await self.post(make_update(1, 1, "привет"))
+        self.assertEqual(r.status, 200)
+        await self.pipeline.drain()
+        self.assertEqual(self.log, [(1, "привет")])
+
+    async def test_wrong_secret_is_rejected(self):
+        r = await self.post(make_update(1, 1, "привет"), secret="wrong")
+        self.assertEqual(r.status, 401)
+
+    async def test_garbage_is_dropped(self):
+        r = await self.post({"hello": "world"})
+        self.assertEqual(r.status, 200)
+        self.assertEqual(self.pipeline.metrics()["accepted"], 0)
+
+    async def test_full_queue_answers_503(self):
+        statuses = [(await self.post(make_update(i, 1, "медленно"))).status for i in range(1, 4)]
+        self.assertEqual(statuses, [200, 200, 503])
+
+    async def test_metrics(self):
+        r = await self.client.get("/metrics")
+        self.assertEqual((await r.json())["workers"], 1)
+
+    async def test_hotels_invalidate_needs_admin_token(self):
+        r = await self.client.post("/hotels/invalidate", headers={ADMIN_HEADER: "wrong"})
+        self.assertEqual(r.status, 401)
+        r = await self.client.post("/hotels/invalidate", headers={ADMIN_HEADER: "adm1n"})
+        self.assertEqual(r.status, 204)
+        self.assertEqual(self.invalidations, 1)
+
+    async def test_no_invalidate_route_without_token(self):
+        client = TestClient(TestServer(make_app(self.pipeline, invalidate_hotels_fn=self.invalidate)))
+        await client.start_server()
+        try:
+            r = await client.post("/hotels/invalidate", headers={ADMIN_HEADER: ""})
+            self.assertEqual(r.status, 404)
+        finally:
+            await client.close()
@@ -0,0 +1,44 @@
+import asyncio
+import threading
+from unittest import IsolatedAsyncioTestCase
+
+from rag_batcher import MicroBatcher
+
+
+class MicroBatcherTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.batches = []
+        self.threads = set()
+
+    def run_batch(self, jobs):
+        self.batches.append([job.query for job in jobs])
+        self.threads.add(threading.current_thread().name)
+        if any(job.query == "ошибка" for job in jobs):
+            raise RuntimeError("encode failed")
+        return [job.query.upper() for job in jobs]
+
+    async def test_requests_within_window_share_one_call(self):
+        batcher = MicroBatcher(self.run_batch, window=0.05)
+        self.addCleanup(batcher.shutdown)
+        results = await asyncio.gather(*(batcher.submit("embed", q) for q in ("а", "б", "в")))
+        self.assertEqual(results, ["А", "Б", "В"])
+        self.assertEqual(self.batches, [["а", "б", "в"]])
+        # encode идёт в пуле потоков, а не в event loop
+        self.assertTrue(all(name.startswith("rag") for name in self.threads))
+
+    async def test_full_batch_is_flushed_without_waiting(self):
+        batcher = MicroBatcher(self.run_batch, window=60, max_batch=2)
+        self.addCleanup(batcher.shutdown)
+        results = await asyncio.wait_for(asyncio.gather(batcher.submit("embed", "а"), batcher.submit("embed", "б")), 5)
+        self.assertEqual(results, ["А", "Б"])
+
+    async def test_error_reaches_every_job_of_the_batch(self):
+        batcher = MicroBatcher(self.run_batch, window=0.05)
+        self.addCleanup(batcher.shutdown)
+        results = await asyncio.gather(
+            batcher.submit("embed", "ошибка"), batcher.submit("embed", "а"), return_exceptions=True
+        )
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        metrics = batcher.metrics()
+        self.assertEqual((metrics["jobs"], metrics["batches"], metrics["errors"]), (2, 1, 1))
+        self.assertEqual(metrics["queue_depth"], 0)
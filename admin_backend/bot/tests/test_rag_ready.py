@@ -0,0 +1,30 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest import IsolatedAsyncioTestCase
+
+import rag
+
+
+class WaitReadyTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        rag._ready.clear()
+        self.addCleanup(rag._ready.clear)
+
+    async def test_waiters_do_not_hold_executor_threads(self):
+        # Один поток в пуле: если бы каждый ожидающий занимал поток, прогрев не запустился бы
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        asyncio.get_running_loop().set_default_executor(executor)
+
+        waiters = [asyncio.create_task(rag.wait_ready(5)) for _ in range(20)]
+        await asyncio.sleep(0)
+        await asyncio.to_thread(rag._set_ready)
+        self.assertEqual(await asyncio.gather(*waiters), [True] * 20)
+
+    async def test_timeout(self):
+        self.assertFalse(await rag.wait_ready(0.01))
+        self.assertFalse(rag.is_ready())
+
+    async def test_already_ready(self):
+        rag._set_ready()
+        self.assertTrue(await rag.wait_ready(0))
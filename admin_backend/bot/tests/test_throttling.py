@@ -0,0 +1,96 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import AsyncMock, patch
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message, Update
+
+from fake_telegram import make_update
+from pipeline import UpdatePipeline
+from throttling import AiThrottling, TokenBucket
+
+
+class TokenBucketTests(TestCase):
+    def test_burst_then_growing_waits(self):
+        bucket = TokenBucket(rate=0.5, burst=2)
+        self.assertEqual([bucket.reserve(10) for _ in range(2)], [0.0, 0.0])
+        waits = [bucket.reserve(10) for _ in range(3)]
+        self.assertAlmostEqual(waits[0], 2.0, places=2)
+        self.assertAlmostEqual(waits[1], 4.0, places=2)
+        self.assertAlmostEqual(waits[2], 6.0, places=2)
+
+    def test_too_long_wait_is_refused_without_taking_a_token(self):
+        bucket = TokenBucket(rate=0.5, burst=1)
+        bucket.reserve(10)
+        self.assertIsNone(bucket.reserve(1))
+        self.assertAlmostEqual(bucket.reserve(10), 2.0, places=2)
+
+    def test_refill_is_capped_by_burst(self):
+        bucket = TokenBucket(rate=1, burst=3)
+        for _ in range(3):
+            bucket.reserve(0)
+        self.assertFalse(bucket.is_full())
+        bucket.updated -= 100
+        self.assertTrue(bucket.is_full())
+        self.assertEqual(bucket.tokens, 3)
+
+
+class AiThrottlingTests(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.handled = []
+        self.throttling = AiThrottling(rate=5, burst=1, max_wait=0.5, typing_delay=0)
+        self.ids = iter(range(1, 1000))
+
+        self.dp = Dispatcher()
+        self.dp.message.middleware(self.throttling)
+
+        @self.dp.message(flags={"ai": True})
+        async def ask(message: Message):
+            await asyncio.sleep(0.05)
+            self.handled.append((message.chat.id, message.text))
+
+        self.bot = Bot("123456:TEST-token")
+        self.addAsyncCleanup(self.bot.session.close)
+        # Все запросы к Bot API (ответы, «печатает…») уходят сюда
+        self.sent = AsyncMock()
+        p = patch.object(Bot, "__call__", self.sent)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def update(self, chat_id: int, text: str) -> Update:
+        return Update.model_validate(make_update(next(self.ids), chat_id, text), context={"bot": self.bot})
+
+    async def feed(self, *updates):
+        await asyncio.gather(*(self.dp.feed_update(self.bot, u) for u in updates))
+
+    async def test_duplicate_question_is_answered_once(self):
+        await self.feed(self.update(1, "Есть парковка?"), self.update(1, "есть  парковка?"))
+        self.assertEqual(self.handled, [(1, "Есть парковка?")])
+        self.assertEqual(self.throttling.metrics()["coalesced"], 1)
+
+    async def test_extra_questions_wait_or_are_refused(self):
+        await self.feed(*(self.update(1, f"вопрос {i}") for i in range(5)))
+        metrics = self.throttling.metrics()
+        # burst 1, дальше по 0.2 с: ждать не дольше 0.5 с могут ещё двое
+        self.assertEqual((metrics["passed"], metrics["delayed"], metrics["rejected"]), (3, 2, 2))
+        self.assertEqual(len(self.handled), 3)
+        texts = [getattr(call.args[0], "text", None) for call in self.sent.await_args_list]
+        self.assertEqual(texts.count(AiThrottling.BUSY_TEXT), 2)
+
+    async def test_other_chats_are_not_throttled(self):
+        await self.feed(*(self.update(chat, "вопрос") for chat in range(5)))
+        self.assertEqual(len(self.handled), 5)
+        self.assertEqual(self.throttling.metrics()["delayed"], 0)
+
+    async def test_delay_does_not_hold_pipeline_worker(self):
+        pipeline = UpdatePipeline(self.dp, self.bot, workers=1)
+        pipeline.start()
+        self.addAsyncCleanup(pipeline.stop)
+        pipeline.submit(self.update(1, "первый"))
+        pipeline.submit(self.update(1, "второй"))  # ждёт токена ~0.2 с
+        await asyncio.sleep(0.08)
+        pipeline.submit(self.update(2, "другой чат"))
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.handled, [(1, "первый"), (2, "другой чат")])
+        await pipeline.drain()
+        self.assertEqual(self.handled[-1], (1, "второй"))
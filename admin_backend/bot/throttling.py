@@ -0,0 +1,139 @@
+# admin_backend/bot/throttling.py
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import Message, TelegramObject
+from aiogram.utils.chat_action import ChatActionSender
+
+from pipeline import idle
+
+
+class TokenBucket:
+    """
+    Ведро токенов: burst вопросов сразу, дальше rate в секунду.
+    reserve() выдаёт места в очереди по порядку: токены могут уйти в минус,
+    и каждый следующий ждёт дольше предыдущего.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, max_wait: float) -> float | None:
+        """Сколько ждать своего токена, сек; None — очередь длиннее max_wait."""
+        self._refill(time.monotonic())
+        wait = max(0.0, (1 - self.tokens) / self.rate)
+        if wait > max_wait:
+            return None
+        self.tokens -= 1
+        return wait
+
+    def is_full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.burst
+
+
+def _question_key(chat_id: int, text: str) -> tuple[int, str]:
+    return chat_id, " ".join(text.lower().split())
+
+
+class AiThrottling(BaseMiddleware):
+    """
+    Ограничение дорогих AI-хендлеров (флаг {"ai": True}) по чатам.
+
+    - Одинаковый вопрос, пока первый ещё в работе, не запускается второй раз:
+      повтор ждёт завершения первого, ответ гость получит один.
+    - Ведро токенов на чат: лишние вопросы не теряются, а ждут своей очереди,
+      гость в это время видит «печатает…». Если ждать дольше max_wait —
+      бот просит повторить позже.
+    - Общий предел одновременных запросов к LLM — семафор GigaChatClient
+      (GIGACHAT_MAX_CONCURRENCY); пока вопрос ждёт его, индикатор тоже виден.
+
+    Пока вопрос ждёт токена или ответа на такой же вопрос, место в пуле
+    webhook-обработчиков (pipeline.idle) свободно для других чатов.
+    """
+
+    BUSY_TEXT = "⏳ Я ещё отвечаю на ваши предыдущие вопросы. Повторите этот чуть позже, пожалуйста."
+
+    def __init__(self, rate: float = 0.2, burst: int = 3, max_wait: float = 30.0, typing_delay: float = 0.3):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.typing_delay = typing_delay
+
+        self._buckets: dict[int, TokenBucket] = {}
+        self._in_flight: dict[tuple[int, str], asyncio.Future] = {}
+
+        self.passed = 0
+        self.delayed = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    def _bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            if len(self._buckets) >= 10_000:
+                # Полные вёдра ничем не отличаются от новых — выбрасываем
+                self._buckets = {k: b for k, b in self._buckets.items() if not b.is_full()}
+            bucket = self._buckets[chat_id] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if not get_flag(data, "ai") or not isinstance(event, Message) or not event.text:
+            return await handler(event, data)
+
+        key = _question_key(event.chat.id, event.text)
+        running = self._in_flight.get(key)
+        if running is not None:
+            self.coalesced += 1
+            async with idle():
+                await asyncio.shield(running)
+            return None
+
+        wait = self._bucket(event.chat.id).reserve(self.max_wait)
+        if wait is None:
+            self.rejected += 1
+            await event.answer(self.BUSY_TEXT)
+            return None
+
+        done = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = done
+        try:
+            async with ChatActionSender.typing(
+                bot=data["bot"], chat_id=event.chat.id, initial_sleep=0.0 if wait else self.typing_delay
+            ):
+                if wait:
+                    self.delayed += 1
+                    async with idle():
+                        await asyncio.sleep(wait)
+                self.passed += 1
+                return await handler(event, data)
+        finally:
+            del self._in_flight[key]
+            done.set_result(None)
+
+    def metrics(self) -> dict:
+        return {
+            "chats": len(self._buckets),
+            "in_flight": len(self._in_flight),
+            "passed": self.passed,
+            "delayed": self.delayed,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,114 @@
+# admin_backend/bot/webhook.py
+import asyncio
+import hmac
+import json
+import logging
+import signal
+
+from aiohttp import web
+from aiogram import Bot
+from aiogram.types import Update
+from pydantic import ValidationError
+
+from pipeline import UpdatePipeline
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+ADMIN_HEADER = "X-Admin-Token"
+
+
+async def receive_update(request: web.Request):
+    secret = request.app["secret"]
+    if secret and not hmac.compare_digest(request.headers.get(SECRET_HEADER, ""), secret):
+        return web.Response(status=401)
+
+    pipeline: UpdatePipeline = request.app["pipeline"]
+    try:
+        update = Update.model_validate(await request.json(), context={"bot": pipeline.bot})
+    except (json.JSONDecodeError, ValidationError):
+        # Повтор доставки не поможет — принимаем и забываем
+        logger.warning("Непонятный апдейт: %s", (await request.text())[:200])
+        return web.Response()
+
+    if not pipeline.submit(update):
+        # Очередь чата полна: Telegram повторит доставку позже
+        return web.Response(status=503, headers={"Retry-After": "1"})
+    return web.Response()
+
+
+async def metrics(request: web.Request):
+    return web.json_response(request.app["metrics"](), dumps=lambda d: json.dumps(d, ensure_ascii=False))
+
+
+async def invalidate_hotels(request: web.Request):
+    if not hmac.compare_digest(request.headers.get(ADMIN_HEADER, ""), request.app["admin_token"]):
+        return web.Response(status=401)
+    request.app["invalidate_hotels"]()
+    return web.Response(status=204)
+
+
+def make_app(
+    pipeline: UpdatePipeline,
+    path: str = "/webhook",
+    secret: str = "",
+    metrics_fn=None,
+    invalidate_hotels_fn=None,
+    admin_token: str = "",
+) -> web.Application:
+    app = web.Application()
+    app["pipeline"] = pipeline
+    app["secret"] = secret
+    app["metrics"] = metrics_fn or pipeline.metrics
+    app.router.add_post(path, receive_update)
+    app.router.add_get("/metrics", metrics)
+    # Без токена ручки сброса нет: сбрасывать кэш может только админка
+    if invalidate_hotels_fn is not None and admin_token:
+        app["invalidate_hotels"] = invalidate_hotels_fn
+        app["admin_token"] = admin_token
+        app.router.add_post("/hotels/invalidate", invalidate_hotels)
+    return app
+
+
+async def run_webhook(
+    bot: Bot,
+    pipeline: UpdatePipeline,
+    *,
+    url: str,
+    path: str = "/webhook",
+    host: str = "0.0.0.0",
+    port: int = 8080,
+    secret: str = "",
+    metrics_fn=None,
+    invalidate_hotels_fn=None,
+    admin_token: str = "",
+):
+    """Поднять HTTP-сервер, зарегистрировать webhook и работать до SIGTERM/SIGINT."""
+    pipeline.start()
+    app = make_app(pipeline, path, secret, metrics_fn, invalidate_hotels_fn, admin_token)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("Webhook слушает %s:%s%s, воркеров %s", host, port, path, pipeline.workers)
+    try:
+        if url:
+            await bot.set_webhook(
+                url.rstrip("/") + path,
+                secret_token=secret or None,
+                max_connections=100,
+                drop_pending_updates=False,
+            )
+        # Как start_polling: SIGTERM/SIGINT — штатная остановка с дообработкой очереди
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        await stop.wait()
+    finally:
+        # Сначала перестаём принимать, потом дорабатываем уже принятое
+        await runner.cleanup()
+        await pipeline.drain()
+        await pipeline.stop()
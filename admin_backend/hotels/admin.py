@@ -4,4 +4,5 @@ from .models import Hotel
 @admin.register(Hotel)
 class HotelAdmin(admin.ModelAdmin):
     list_display = ("name", "slug", "api_key")
+    search_fields = ("name", "slug")
     prepopulated_fields = {"slug": ("name",)}
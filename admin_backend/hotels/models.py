@@ -16,6 +16,7 @@ class Hotel(models.Model):
     api_key = models.CharField(max_length=64, unique=True, default=secrets.token_hex(32), verbose_name="API ключ")
     address = models.CharField(max_length=255, blank=True, verbose_name="Адрес")
     description = models.TextField(blank=True, verbose_name="Описание")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Изменено")
 
     class Meta:
         verbose_name = "Отель"
@@ -6,4 +6,11 @@ from .models import Room
 class RoomAdmin(admin.ModelAdmin):
     list_display = ("room_number", "room_type", "price_per_night", "hotel", "is_available")
     list_filter = ("hotel", "is_available")
-    search_fields = ("room_number", "room_type")
+    list_select_related = ("hotel",)
+    search_fields = ("room_number", "room_type", "hotel__name")
+    autocomplete_fields = ("hotel",)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Автодополнение номера в брони: Room.__str__ показывает отель
+        queryset, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        return queryset.select_related("hotel"), may_have_duplicates
@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-17 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0004_alter_hotel_api_key'),
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='room',
+            constraint=models.UniqueConstraint(fields=('hotel', 'room_number'), name='room_unique_hotel_number'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['hotel'], name='room_available_by_hotel_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:52
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0003_room_updated_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='room',
+            name='room_available_by_hotel_idx',
+        ),
+    ]
@@ -13,10 +13,14 @@ class Room(models.Model):
     room_type = models.CharField(max_length=255, verbose_name="Тип номера")
     price_per_night = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Цена за ночь")
     is_available = models.BooleanField(default=True, verbose_name="Свободен")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Изменено")
 
     class Meta:
         verbose_name = "Номер"
         verbose_name_plural = "Номера"
+        constraints = [
+            models.UniqueConstraint(fields=["hotel", "room_number"], name="room_unique_hotel_number"),
+        ]
 
     def __str__(self):
         return f"{self.room_number} ({self.hotel.name})"
@@ -1,3 +1,42 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from hotels.models import Hotel
+from .models import Room
+
+
+class RoomAdminQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        cls.hotels = [
+            Hotel.objects.create(name=f"Hotel {i}", slug=f"hotel-{i}", api_key=f"k{i}") for i in range(5)
+        ]
+
+    def add_rooms(self, n):
+        start = Room.objects.count()
+        Room.objects.bulk_create(
+            Room(hotel=self.hotels[i % 5], room_number=str(i), room_type="Стандарт", price_per_night=5000)
+            for i in range(start, start + n)
+        )
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.client.force_login(self.admin)
+        url = "/admin/rooms/room/"
+
+        self.add_rooms(5)
+        with self.assertNumQueries(6):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.add_rooms(50)
+        with self.assertNumQueries(6):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_autocomplete_selects_hotel(self):
+        self.client.force_login(self.admin)
+        self.add_rooms(20)
+        params = {"app_label": "bookings", "model_name": "booking", "field_name": "room", "term": "Стандарт"}
+        with self.assertNumQueries(4):
+            r = self.client.get("/admin/autocomplete/", params)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(r.json()["results"]), 20)
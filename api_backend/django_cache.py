@@ -0,0 +1,81 @@
+"""
+Сброс кэша ответов Django API (admin_backend/api/cache.py) после брони через
+партнёрский API: сигналы Django здесь не срабатывают.
+
+Ответы Django лежат под поколениями областей (gen:rooms, gen:rooms:<hotel>).
+Удаляем ключи поколений — Django заведёт новые, и старые ответы перестанут читаться.
+Бэкенд и адрес — те же переменные окружения, что у Django:
+
+    API_CACHE_BACKEND=redis | file | locmem
+    API_CACHE_LOCATION=...
+    API_CACHE_TTL=300
+
+locmem живёт в памяти процессов Django и отсюда недоступен: списки там отстают
+не дольше API_CACHE_TTL, а бот перед бронью проверяет номер мимо кэша.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Как у CACHES["api"] в settings Django: KEY_PREFIX "api", версия ключа 1
+KEY_PREFIX = "api:1:"
+
+DEFAULT_LOCATIONS = {
+    "file": os.path.join(tempfile.gettempdir(), "smarthotel-api-cache"),
+    "redis": "redis://127.0.0.1:6379/1",
+}
+
+
+class DjangoCache:
+    def __init__(self, backend: str = "locmem", location: str = "", enabled: bool = True):
+        self.backend = backend
+        self.location = location or DEFAULT_LOCATIONS.get(backend, "")
+        self.enabled = enabled and backend in DEFAULT_LOCATIONS
+        self._redis = None
+        if self.enabled and backend == "redis":
+            try:
+                from redis.asyncio import Redis
+            except ImportError as e:
+                raise RuntimeError("API_CACHE_BACKEND=redis требует пакет redis: pip install redis") from e
+            self._redis = Redis.from_url(self.location)
+
+        self.bumps = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> "DjangoCache":
+        return cls(
+            os.getenv("API_CACHE_BACKEND", "locmem"),
+            os.getenv("API_CACHE_LOCATION", ""),
+            enabled=int(os.getenv("API_CACHE_TTL", "300")) > 0,
+        )
+
+    async def bump(self, *scopes: str):
+        """Сбросить закэшированные ответы областей. Ошибка кэша бронь не отменяет — только в лог."""
+        if not self.enabled:
+            return
+        keys = [f"{KEY_PREFIX}gen:{scope}" for scope in scopes]
+        try:
+            if self._redis is not None:
+                await self._redis.delete(*keys)
+            else:
+                await asyncio.to_thread(self._delete_files, keys)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Django cache bump failed: {e!r}")
+        else:
+            self.bumps += 1
+
+    def _delete_files(self, keys: list[str]):
+        # Имя файла — как у FileBasedCache: md5 ключа + .djcache
+        for key in keys:
+            (Path(self.location) / (hashlib.md5(key.encode()).hexdigest() + ".djcache")).unlink(missing_ok=True)
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
@@ -1,6 +1,49 @@
-from fastapi import FastAPI
+"""
+Партнёрский API SmartHotel: проверка свободных номеров и бронь по slug отеля.
+Работает с той же базой, что и Django (см. db.py), асинхронно и с пулом соединений.
 
-app = FastAPI(title="SmartHotel API")
+    cd api_backend
+    uvicorn main:app --port 8001
+
+Партнёр передаёт API-ключ отеля (поле api_key в админке) в заголовке X-Api-Key.
+"""
+import hmac
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response, status
+
+from db import make_engine
+from django_cache import DjangoCache
+from queries import HotelCache, HotelRow, ReserveConflict, RoomNotFound, available_rooms, reserve
+from schemas import CheckRequest, CheckResponse, ReserveRequest, ReserveResponse, RoomOffer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    engine = make_engine()
+    app.state.engine = engine
+    app.state.hotels = HotelCache(engine, ttl=float(os.getenv("HOTEL_SLUG_CACHE_TTL", "60")))
+    app.state.django_cache = DjangoCache.from_env()
+    try:
+        yield
+    finally:
+        await app.state.django_cache.close()
+        await engine.dispose()
+
+
+app = FastAPI(title="SmartHotel API", lifespan=lifespan)
+
+
+async def partner_hotel(
+    hotel_slug: str, request: Request, x_api_key: str = Header("", alias="X-Api-Key")
+) -> HotelRow:
+    hotel = await request.app.state.hotels.get(hotel_slug)
+    if hotel is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Отель не найден.")
+    if not hmac.compare_digest(x_api_key, hotel.api_key):
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Неверный API-ключ отеля.")
+    return hotel
 
 
 @app.get("/ping")
@@ -8,27 +51,77 @@ def ping():
     return {"status": "ok"}
 
 
-@app.post("/api/{hotel_slug}/check")
-def check_availability(hotel_slug: str):
-    """
-    Черновой эндпоинт проверки доступности отеля.
-    Пока просто возвращает hotel_slug, дальше привяжем к базе.
-    """
-    return {
-        "hotel": hotel_slug,
-        "status": "ok",
-        "message": "Проверка доступности работает (заглушка)."
-    }
+@app.post("/api/{hotel_slug}/check", response_model=CheckResponse)
+async def check_availability(body: CheckRequest, request: Request, hotel: HotelRow = Depends(partner_hotel)):
+    """Свободные номера отеля на даты с итоговой стоимостью проживания."""
+    async with request.app.state.engine.connect() as conn:
+        found = await available_rooms(
+            conn, hotel.id, body.date_from, body.date_to, room_type=body.room_type, max_price=body.max_price
+        )
+    return CheckResponse(
+        hotel=hotel.slug,
+        date_from=body.date_from,
+        date_to=body.date_to,
+        nights=body.nights,
+        rooms=[
+            RoomOffer(
+                id=room.id,
+                room_number=room.room_number,
+                room_type=room.room_type,
+                price_per_night=room.price_per_night,
+                total_price=room.price_per_night * body.nights,
+            )
+            for room in found
+        ],
+    )
 
 
-@app.post("/api/{hotel_slug}/reserve")
-def reserve_room(hotel_slug: str):
+@app.post(
+    "/api/{hotel_slug}/reserve",
+    response_model=ReserveResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={200: {"description": "Повтор с тем же Idempotency-Key"}, 409: {"description": "Номер занят"}},
+)
+async def reserve_room(
+    body: ReserveRequest,
+    request: Request,
+    response: Response,
+    hotel: HotelRow = Depends(partner_hotel),
+    idempotency_key: str = Header("", alias="Idempotency-Key", max_length=64),
+):
     """
-    Черновой эндпоинт бронирования.
-    Сейчас заглушка, позже сюда прикрутим логику и AI.
+    Бронь номера. Заголовок Idempotency-Key делает повторный запрос безопасным:
+    вернётся уже созданная бронь (200 вместо 201). Занятые даты — 409 Conflict.
     """
-    return {
-        "hotel": hotel_slug,
-        "result": "reserved_mock",
-        "message": "Бронирование пока фейковое, но API жив."
-    }
+    try:
+        booking, created = await reserve(
+            request.app.state.engine,
+            hotel.id,
+            room_id=body.room_id,
+            guest_name=body.guest_name,
+            guest_phone=body.guest_phone,
+            guest_email=body.guest_email,
+            date_from=body.date_from,
+            date_to=body.date_to,
+            idempotency_key=idempotency_key.strip() or None,
+        )
+    except RoomNotFound:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Номер не найден в этом отеле.")
+    except ReserveConflict as e:
+        raise HTTPException(status.HTTP_409_CONFLICT, str(e))
+
+    if created:
+        # Как сигнал booking_changed у Django: списки номеров отеля устарели
+        await request.app.state.django_cache.bump("rooms", f"rooms:{hotel.id}")
+    else:
+        response.status_code = status.HTTP_200_OK
+    return ReserveResponse(
+        booking_id=booking["id"],
+        hotel=hotel.slug,
+        room_id=booking["room_id"],
+        date_from=booking["date_from"],
+        date_to=booking["date_to"],
+        total_price=booking["total_price"],
+        is_confirmed=booking["is_confirmed"],
+        created=created,
+    )
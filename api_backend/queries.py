@@ -0,0 +1,204 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import exists, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from db import bookings, for_write, hotels, icontains, room_nights, rooms
+
+
+class ReserveConflict(Exception):
+    """Номер занят на эти даты или ключ идемпотентности использован для другой брони."""
+
+
+class RoomNotFound(Exception):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class HotelRow:
+    id: int
+    slug: str
+    name: str
+    api_key: str
+
+
+class HotelCache:
+    """
+    Отели по slug в памяти процесса: на горячем пути нет запроса за отелем.
+    Изменения в админке видны через ttl секунд; несуществующий slug
+    помнится короче, чтобы новый отель появился быстро. Сверх max_size
+    вытесняется давно не запрошенный slug.
+    """
+
+    def __init__(self, engine: AsyncEngine, ttl: float = 60.0, miss_ttl: float = 5.0, max_size: int = 10_000):
+        self.engine = engine
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.max_size = max_size
+        self._items: OrderedDict[str, tuple[float, HotelRow | None]] = OrderedDict()
+        # Один запрос к базе на slug, даже если промахнулись сразу многие
+        self._loading: dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, slug: str) -> HotelRow | None:
+        item = self._items.get(slug)
+        if item is not None and item[0] > time.monotonic():
+            self.hits += 1
+            self._items.move_to_end(slug)
+            return item[1]
+
+        loading = self._loading.get(slug)
+        if loading is not None:
+            return await asyncio.shield(loading)
+
+        self.misses += 1
+        future = self._loading[slug] = asyncio.get_running_loop().create_future()
+        try:
+            hotel = await self._load(slug)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # ошибка уйдёт ждущим, не в лог "never retrieved"
+            raise
+        else:
+            future.set_result(hotel)
+        finally:
+            del self._loading[slug]
+
+        self._items[slug] = (time.monotonic() + (self.ttl if hotel else self.miss_ttl), hotel)
+        self._items.move_to_end(slug)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.evictions += 1
+        return hotel
+
+    async def _load(self, slug: str) -> HotelRow | None:
+        query = select(hotels.c.id, hotels.c.slug, hotels.c.name, hotels.c.api_key).where(hotels.c.slug == slug)
+        async with self.engine.connect() as conn:
+            row = (await conn.execute(query)).first()
+        return HotelRow(*row) if row else None
+
+    def invalidate(self, slug: str | None = None):
+        if slug is None:
+            self._items.clear()
+        else:
+            self._items.pop(slug, None)
+
+
+def stay_nights(date_from: date, date_to: date) -> list[date]:
+    return [date_from + timedelta(days=i) for i in range((date_to - date_from).days)]
+
+
+def _busy_rooms(date_from: date, date_to: date):
+    return select(room_nights.c.room_id).where(room_nights.c.night >= date_from, room_nights.c.night < date_to)
+
+
+async def available_rooms(
+    conn: AsyncConnection,
+    hotel_id: int,
+    date_from: date,
+    date_to: date,
+    room_type: str | None = None,
+    max_price: Decimal | None = None,
+) -> list:
+    """Свободные на [date_from, date_to) номера отеля — один запрос, как available_rooms у Django."""
+    query = (
+        select(rooms.c.id, rooms.c.room_number, rooms.c.room_type, rooms.c.price_per_night)
+        .where(
+            rooms.c.hotel_id == hotel_id,
+            rooms.c.is_available.is_(True),
+            rooms.c.id.not_in(_busy_rooms(date_from, date_to)),
+        )
+        .order_by(rooms.c.price_per_night, rooms.c.id)
+    )
+    if room_type:
+        query = query.where(icontains(conn, rooms.c.room_type, room_type))
+    if max_price is not None:
+        query = query.where(rooms.c.price_per_night <= max_price)
+    return (await conn.execute(query)).all()
+
+
+async def _replay(conn: AsyncConnection, key: str, room_id: int, date_from: date, date_to: date):
+    query = select(bookings).where(bookings.c.idempotency_key == key)
+    booking = (await conn.execute(query)).first()
+    if booking is not None and (booking.room_id, booking.date_from, booking.date_to) != (room_id, date_from, date_to):
+        raise ReserveConflict("Ключ идемпотентности уже использован для другой брони.")
+    return booking
+
+
+async def reserve(
+    engine: AsyncEngine,
+    hotel_id: int,
+    *,
+    room_id: int,
+    guest_name: str,
+    guest_phone: str,
+    guest_email: str | None,
+    date_from: date,
+    date_to: date,
+    idempotency_key: str | None = None,
+) -> tuple[dict, bool]:
+    """
+    Бронь номера одной транзакцией: та же логика, что bookings.services.create_booking
+    у Django. Возвращает (бронь, создана ли сейчас); повтор с тем же ключом
+    возвращает ранее созданную бронь.
+    """
+    nights = stay_nights(date_from, date_to)
+    async with engine.connect() as conn:
+        conn = await for_write(conn)
+        try:
+            async with conn.begin():
+                # Postgres: брони одного номера выстраиваются в очередь на этой строке
+                room_query = (
+                    select(rooms.c.id, rooms.c.price_per_night, rooms.c.is_available)
+                    .where(rooms.c.id == room_id, rooms.c.hotel_id == hotel_id)
+                    .with_for_update()
+                )
+                room = (await conn.execute(room_query)).first()
+                if room is None:
+                    raise RoomNotFound()
+
+                if idempotency_key:
+                    existing = await _replay(conn, idempotency_key, room_id, date_from, date_to)
+                    if existing is not None:
+                        return existing._asdict(), False
+
+                busy = exists(_busy_rooms(date_from, date_to).where(room_nights.c.room_id == room_id))
+                if not room.is_available or await conn.scalar(select(busy)):
+                    raise ReserveConflict("Номер уже забронирован на эти даты.")
+
+                values = {
+                    "hotel_id": hotel_id,
+                    "room_id": room_id,
+                    "guest_name": guest_name,
+                    "guest_phone": guest_phone,
+                    "guest_email": guest_email,
+                    "date_from": date_from,
+                    "date_to": date_to,
+                    "total_price": room.price_per_night * len(nights),
+                    "is_confirmed": False,
+                    "created_at": datetime.now(timezone.utc),
+                    "idempotency_key": idempotency_key or None,
+                }
+                booking_id = await conn.scalar(insert(bookings).values(**values).returning(bookings.c.id))
+                await conn.execute(
+                    insert(room_nights),
+                    [{"room_id": room_id, "booking_id": booking_id, "night": night} for night in nights],
+                )
+        except IntegrityError:
+            # Гонку проиграли: параллельный запрос с тем же ключом или те же ночи
+            if idempotency_key:
+                existing = await _replay(conn, idempotency_key, room_id, date_from, date_to)
+                if existing is not None:
+                    return existing._asdict(), False
+            raise ReserveConflict("Номер уже забронирован на эти даты.")
+
+    return {"id": booking_id, **values}, True
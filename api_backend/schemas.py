@@ -0,0 +1,66 @@
+from datetime import date
+from decimal import Decimal
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+# Через партнёрский API дольше не бронируем
+MAX_NIGHTS = 60
+
+
+class StayRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    date_from: date
+    date_to: date
+
+    @model_validator(mode="after")
+    def check_dates(self):
+        if self.date_to <= self.date_from:
+            raise ValueError("Дата выезда должна быть позже даты заезда.")
+        if (self.date_to - self.date_from).days > MAX_NIGHTS:
+            raise ValueError(f"Не больше {MAX_NIGHTS} ночей за одну бронь.")
+        return self
+
+    @property
+    def nights(self) -> int:
+        return (self.date_to - self.date_from).days
+
+
+class CheckRequest(StayRequest):
+    room_type: str | None = Field(None, max_length=255, description="Подстрока типа номера, без учёта регистра")
+    max_price: Decimal | None = Field(None, gt=0, description="Цена за ночь не выше")
+
+
+class RoomOffer(BaseModel):
+    id: int
+    room_number: str
+    room_type: str
+    price_per_night: Decimal
+    total_price: Decimal
+
+
+class CheckResponse(BaseModel):
+    hotel: str
+    date_from: date
+    date_to: date
+    nights: int
+    rooms: list[RoomOffer]
+
+
+class ReserveRequest(StayRequest):
+    room_id: int = Field(gt=0)
+    guest_name: str = Field(min_length=2, max_length=255)
+    guest_phone: str = Field(min_length=5, max_length=50, pattern=r"^\+?[\d\s()\-]+$")
+    guest_email: str | None = Field(None, max_length=254, pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+class ReserveResponse(BaseModel):
+    booking_id: int
+    hotel: str
+    room_id: int
+    date_from: date
+    date_to: date
+    total_price: Decimal
+    is_confirmed: bool
+    # False — повтор запроса с тем же Idempotency-Key, бронь создана раньше
+    created: bool
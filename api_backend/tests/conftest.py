@@ -0,0 +1,71 @@
+"""
+Тесты партнёрского API на временной SQLite, схему которой строит Django:
+
+    cd api_backend
+    python -m pytest tests
+"""
+import os
+import shutil
+import subprocess
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import httpx
+import pytest
+
+API_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(API_DIR))
+
+from db import DJANGO_DIR  # noqa: E402
+
+SEED = """
+from hotels.models import Hotel
+from rooms.models import Room
+hotel = Hotel.objects.create(name="EcoHouse", slug="ecohouse", api_key="eco-key")
+Room.objects.create(hotel=hotel, room_number="1", room_type="Стандарт", price_per_night="7800.00")
+Room.objects.create(hotel=hotel, room_number="2", room_type="Семейный люкс", price_per_night="13500.50")
+Room.objects.create(hotel=hotel, room_number="3", room_type="100% вид на море", price_per_night="9900.00")
+other = Hotel.objects.create(name="Sea", slug="sea", api_key="sea-key")
+Room.objects.create(hotel=other, room_number="1", room_type="Стандарт", price_per_night="5000.00")
+"""
+
+
+@pytest.fixture(scope="session")
+def template_db(tmp_path_factory) -> Path:
+    """База после manage.py migrate с двумя отелями — строится один раз на сессию."""
+    path = tmp_path_factory.mktemp("db") / "template.sqlite3"
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{path}"}
+    for args in (["migrate", "-v", "0"], ["shell", "-c", SEED]):
+        subprocess.run([sys.executable, "manage.py", *args], cwd=DJANGO_DIR, env=env, check=True)
+    return path
+
+
+@pytest.fixture
+def database_url(template_db, tmp_path, monkeypatch) -> str:
+    path = tmp_path / "db.sqlite3"
+    shutil.copy(template_db, path)
+    url = f"sqlite:///{path}"
+    monkeypatch.setenv("DATABASE_URL", url)
+    return url
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@asynccontextmanager
+async def running_app():
+    from main import app, lifespan
+
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://partner.test") as client:
+            yield client
+
+
+@pytest.fixture
+async def client(database_url):
+    async with running_app() as client:
+        yield client
@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+from django.core.cache.backends.filebased import FileBasedCache
+
+from conftest import running_app
+
+pytestmark = pytest.mark.anyio
+
+HEADERS = {"X-Api-Key": "eco-key"}
+STAY = {"date_from": "2027-01-05", "date_to": "2027-01-07"}
+GUEST = {"guest_name": "Анна Смирнова", "guest_phone": "+79001234567"}
+
+
+async def room_id(client, number: str) -> int:
+    r = await client.post("/api/ecohouse/check", json=STAY, headers=HEADERS)
+    return next(room["id"] for room in r.json()["rooms"] if room["room_number"] == number)
+
+
+async def reserve(client, room: int, key: str = "", **stay):
+    body = {"room_id": room, **GUEST, **(stay or STAY)}
+    return await client.post("/api/ecohouse/reserve", json=body, headers={**HEADERS, "Idempotency-Key": key})
+
+
+async def test_check_lists_free_rooms_with_totals(client):
+    r = await client.post("/api/ecohouse/check", json=STAY, headers=HEADERS)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["nights"] == 2
+    assert [room["room_number"] for room in body["rooms"]] == ["1", "3", "2"]
+    assert body["rooms"][2]["total_price"] == "27001.00"
+
+
+@pytest.mark.parametrize("room_type, numbers", [
+    ("семейный", ["2"]),
+    ("ЛЮКС", ["2"]),
+    ("стан", ["1"]),
+    ("100%", ["3"]),
+    ("%", ["3"]),
+    ("_", []),
+])
+async def test_check_filters_room_type_case_insensitively(client, room_type, numbers):
+    r = await client.post("/api/ecohouse/check", json={**STAY, "room_type": room_type}, headers=HEADERS)
+    assert [room["room_number"] for room in r.json()["rooms"]] == numbers
+
+
+async def test_check_filters_max_price(client):
+    r = await client.post("/api/ecohouse/check", json={**STAY, "max_price": "9900"}, headers=HEADERS)
+    assert [room["room_number"] for room in r.json()["rooms"]] == ["1", "3"]
+
+
+async def test_reserve_then_replay_with_same_key(client):
+    room = await room_id(client, "1")
+    first = await reserve(client, room, key="order-1")
+    assert first.status_code == 201
+    assert first.json()["created"] is True
+    assert first.json()["total_price"] == "15600.00"
+
+    again = await reserve(client, room, key="order-1")
+    assert again.status_code == 200
+    assert again.json()["created"] is False
+    assert again.json()["booking_id"] == first.json()["booking_id"]
+
+    r = await client.post("/api/ecohouse/check", json=STAY, headers=HEADERS)
+    assert room not in [room["id"] for room in r.json()["rooms"]]
+
+
+async def test_same_key_for_other_booking_is_conflict(client):
+    room = await room_id(client, "1")
+    assert (await reserve(client, room, key="order-1")).status_code == 201
+    r = await reserve(client, room, key="order-1", date_from="2027-02-01", date_to="2027-02-02")
+    assert r.status_code == 409
+
+
+async def test_overlap_is_conflict(client):
+    room = await room_id(client, "1")
+    assert (await reserve(client, room)).status_code == 201
+    r = await reserve(client, room, date_from="2027-01-06", date_to="2027-01-09")
+    assert r.status_code == 409
+    # Выезд в день заезда следующего гостя — не пересечение
+    assert (await reserve(client, room, date_from="2027-01-07", date_to="2027-01-08")).status_code == 201
+
+
+async def test_wrong_key_is_unauthorized(client):
+    r = await client.post("/api/ecohouse/check", json=STAY, headers={"X-Api-Key": "sea-key"})
+    assert r.status_code == 401
+    r = await client.post("/api/ecohouse/check", json=STAY)
+    assert r.status_code == 401
+
+
+async def test_unknown_slug_is_not_found(client):
+    r = await client.post("/api/nowhere/check", json=STAY, headers=HEADERS)
+    assert r.status_code == 404
+
+
+async def test_room_of_other_hotel_is_not_found(client):
+    r = await client.post("/api/sea/check", json=STAY, headers={"X-Api-Key": "sea-key"})
+    sea_room = r.json()["rooms"][0]["id"]
+    assert (await reserve(client, sea_room)).status_code == 404
+
+
+async def test_invalid_stay_is_rejected(client):
+    r = await client.post(
+        "/api/ecohouse/check", json={"date_from": "2027-01-07", "date_to": "2027-01-05"}, headers=HEADERS
+    )
+    assert r.status_code == 422
+
+
+async def test_concurrent_reserves_of_one_room(client):
+    room = await room_id(client, "2")
+    results = await asyncio.gather(*(reserve(client, room, key=f"race-{i}") for i in range(10)))
+    assert sorted(r.status_code for r in results) == [201] + [409] * 9
+
+
+async def test_concurrent_retries_with_one_key(client):
+    room = await room_id(client, "2")
+    results = await asyncio.gather(*(reserve(client, room, key="retry") for _ in range(10)))
+    assert sorted(r.status_code for r in results) == [200] * 9 + [201]
+    assert len({r.json()["booking_id"] for r in results}) == 1
+
+
+async def test_new_booking_resets_django_room_lists(database_url, tmp_path, monkeypatch):
+    # Кэш "api" Django с API_CACHE_BACKEND=file в той же папке
+    monkeypatch.setenv("API_CACHE_BACKEND", "file")
+    monkeypatch.setenv("API_CACHE_LOCATION", str(tmp_path / "cache"))
+    django_cache = FileBasedCache(str(tmp_path / "cache"), {"KEY_PREFIX": "api"})
+
+    async with running_app() as client:
+        from main import app
+
+        eco = (await app.state.hotels.get("ecohouse")).id
+        sea = (await app.state.hotels.get("sea")).id
+        scopes = ["hotels", "rooms", f"rooms:{eco}", f"rooms:{sea}"]
+        django_cache.set_many({f"gen:{scope}": "g1" for scope in scopes}, None)
+
+        room = await room_id(client, "1")
+        assert (await reserve(client, room, key="order-1")).status_code == 201
+        assert [django_cache.get(f"gen:{scope}") for scope in scopes] == ["g1", None, None, "g1"]
+
+        # Повтор с тем же ключом брони не создаёт — кэш не трогаем
+        django_cache.set("gen:rooms", "g2", None)
+        assert (await reserve(client, room, key="order-1")).status_code == 200
+        assert django_cache.get("gen:rooms") == "g2"
@@ -0,0 +1,107 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, select
+
+import queries
+from db import for_write, make_engine, rooms
+from queries import HotelCache, ReserveConflict, available_rooms, reserve
+
+pytestmark = pytest.mark.anyio
+
+STAY = {"date_from": date(2027, 1, 5), "date_to": date(2027, 1, 7)}
+GUEST = {"guest_name": "Анна Смирнова", "guest_phone": "+79001234567", "guest_email": None}
+
+
+@pytest.fixture
+async def engine(database_url):
+    engine = make_engine(database_url)
+    yield engine
+    await engine.dispose()
+
+
+async def ecohouse_room(engine, number: str) -> tuple[int, int]:
+    async with engine.connect() as conn:
+        row = (await conn.execute(
+            select(rooms.c.id, rooms.c.hotel_id).where(rooms.c.room_number == number).order_by(rooms.c.id)
+        )).first()
+    return row.id, row.hotel_id
+
+
+async def test_sqlite_connection_is_in_autocommit_mode(engine):
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        assert raw.driver_connection.isolation_level is None
+
+
+async def test_for_write_begins_immediate(engine):
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    async with engine.connect() as conn:
+        async with conn.begin():
+            pass
+        conn = await for_write(conn)
+        async with conn.begin():
+            pass
+
+    assert [s for s in statements if s.startswith("BEGIN")] == ["BEGIN", "BEGIN IMMEDIATE"]
+
+
+async def test_numeric_is_decimal(engine):
+    room_id, hotel_id = await ecohouse_room(engine, "2")
+    async with engine.connect() as conn:
+        found = await available_rooms(conn, hotel_id, **STAY)
+    assert {type(room.price_per_night) for room in found} == {Decimal}
+    assert Decimal("13500.50") in [room.price_per_night for room in found]
+
+    booking, created = await reserve(engine, hotel_id, room_id=room_id, idempotency_key="k", **GUEST, **STAY)
+    assert created and booking["total_price"] == Decimal("27001.00")
+    booking, created = await reserve(engine, hotel_id, room_id=room_id, idempotency_key="k", **GUEST, **STAY)
+    assert not created
+    assert isinstance(booking["total_price"], Decimal)
+    assert booking["total_price"] == Decimal("27001.00")
+
+
+async def test_integrity_error_replays_on_rolled_back_connection(engine, monkeypatch):
+    room_id, hotel_id = await ecohouse_room(engine, "1")
+    first, _ = await reserve(engine, hotel_id, room_id=room_id, idempotency_key="k", **GUEST, **STAY)
+
+    # Проигравший гонку не видит брони при первой проверке и упирается в UNIQUE
+    replay = queries._replay
+    calls = []
+
+    async def late_replay(*args):
+        calls.append(args[1])
+        return None if len(calls) == 1 else await replay(*args)
+
+    monkeypatch.setattr(queries, "_replay", late_replay)
+    monkeypatch.setattr(queries, "exists", lambda *_: select(False).scalar_subquery())
+    booking, created = await reserve(engine, hotel_id, room_id=room_id, idempotency_key="k", **GUEST, **STAY)
+
+    assert calls == ["k", "k"]
+    assert not created
+    assert booking["id"] == first["id"]
+
+
+async def test_integrity_error_without_key_is_conflict(engine, monkeypatch):
+    room_id, hotel_id = await ecohouse_room(engine, "1")
+    await reserve(engine, hotel_id, room_id=room_id, **GUEST, **STAY)
+
+    monkeypatch.setattr(queries, "exists", lambda *_: select(False).scalar_subquery())
+    with pytest.raises(ReserveConflict):
+        await reserve(engine, hotel_id, room_id=room_id, **GUEST, **STAY)
+
+
+async def test_hotel_cache_evicts_least_recently_used(engine):
+    cache = HotelCache(engine, max_size=2)
+    await cache.get("ecohouse")
+    await cache.get("sea")
+    await cache.get("ecohouse")
+    await cache.get("nowhere")
+
+    assert list(cache._items) == ["ecohouse", "nowhere"]
+    assert (cache.misses, cache.hits, cache.evictions) == (3, 1, 1)
+    assert (await cache.get("ecohouse")).slug == "ecohouse"
+    assert cache.hits == 2